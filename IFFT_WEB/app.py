@@ -2,6 +2,7 @@ from flask import Flask, render_template, jsonify, request, redirect, flash
 from modules.diff_visualizer import diff_visualizer_bp 
 from modules.output import output_bp
 from modules.graph import graph_bp
+from modules.results_loader import DATA_FILE, conditional_response, current_results
 import os
 import json
 import networkx as nx
@@ -11,7 +12,6 @@ import time
 
 app = Flask(__name__)
 DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')
-DATA_FILE = os.path.join(DATA_PATH, 'ifft_results.json')
 
 app.register_blueprint(diff_visualizer_bp)
 app.register_blueprint(output_bp)
@@ -68,30 +68,18 @@ def output_data():
     """
     Serve the IFFT results as JSON for the Output visualizer
     """
-    try:
-        with open(os.path.join(DATA_PATH, 'ifft_results.json'), 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
-    
-    except FileNotFoundError:
+    snapshot = current_results()
+    if snapshot is None:
         return jsonify({"error": "Results file not found"}), 404
 
+    # The results file is already JSON: serve it as is
+    return conditional_response(snapshot, lambda: app.response_class(snapshot.raw, mimetype='application/json'))
 
-@app.route('/graph-data', methods=['GET'])
-def graph_data():
+
+def build_graph_data(results):
     """
-        Generate graph data for file dependecies using stored data.
+        Build the Vis.js nodes and edges of the file dependencies in the results.
     """
-    if not os.path.exists(DATA_FILE):
-        print(f"[ERROR] No results file found. Please run IFFT analysis first.")
-        return jsonify({"error": "No results file found. Please run IFFT analysis first."}), 404
-        
-    # Load results from JSON file
-    with open(DATA_FILE, "r") as f:
-        results = json.load(f)
-
-    print(f"[DEBUG] Results: {results}")
-
     # Create graph data for nodes and edges
     nodes = set()
     edges = []
@@ -99,7 +87,6 @@ def graph_data():
     for main_file, blocks in results.items():
         nodes.add(main_file)
         for block in blocks:
-            print(f"[DEBUG] Block: {block}")
             associated_file = block.get("associated_file_name")
             if associated_file:
                 nodes.add(associated_file)
@@ -124,8 +111,22 @@ def graph_data():
     for node in nodes
 ]
 
+    return {"nodes": nodes_list, "edges": edges}
+
+
+@app.route('/graph-data', methods=['GET'])
+def graph_data():
+    """
+        Generate graph data for file dependecies using stored data.
+    """
+    snapshot = current_results()
+    if snapshot is None:
+        print(f"[ERROR] No results file found. Please run IFFT analysis first.")
+        return jsonify({"error": "No results file found. Please run IFFT analysis first."}), 404
 
-    return jsonify({"nodes": nodes_list, "edges": edges})
+    # Built and encoded once per version of the results file
+    body = snapshot.derived("graph_data", lambda results: json.dumps(build_graph_data(results)))
+    return conditional_response(snapshot, lambda: app.response_class(body, mimetype='application/json'))
 
 
 @app.route('/')
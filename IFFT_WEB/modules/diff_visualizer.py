@@ -1,11 +1,13 @@
 from flask import Blueprint, render_template, jsonify
-import json
+from modules.results_loader import conditional_response, current_results
 
 
 diff_visualizer_bp = Blueprint('diff-visualizer', __name__)
 
 @diff_visualizer_bp.route('/diff-visualizer')
 def show_diff():
-    results = json.load(open('data/ifft_results.json'))
-    return render_template('diff_visualizer.html', results_dict=results)
+    snapshot = current_results()
+    if snapshot is None:
+        return render_template('diff_visualizer.html', results_dict={})
+    return conditional_response(snapshot, lambda: render_template('diff_visualizer.html', results_dict=snapshot.results))
 
@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, jsonify
 import networkx as nx
 import plotly.graph_objects as go
-import json
+from modules.results_loader import conditional_response, current_results
 import plotly
 
 graph_bp = Blueprint('graph', __name__)
@@ -9,7 +9,9 @@ graph_bp = Blueprint('graph', __name__)
 @graph_bp.route('/graph')
 def show_graph():
     
-    results = json.load(open('data/ifft_results.json'))
-    return render_template('graph.html', results_dict=results)
+    snapshot = current_results()
+    if snapshot is None:
+        return render_template('graph.html', results_dict={})
+    return conditional_response(snapshot, lambda: render_template('graph.html', results_dict=snapshot.results))
 
 
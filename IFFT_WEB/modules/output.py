@@ -1,11 +1,13 @@
 from flask import Blueprint, render_template, jsonify
-import json
+from modules.results_loader import conditional_response, current_results
 
 
 output_bp = Blueprint('output', __name__)
 
 @output_bp.route('/output-viewer')
 def show_output():
-    results = json.load(open('data/ifft_results.json'))
-    return render_template('output.html', results_dict=results)
+    snapshot = current_results()
+    if snapshot is None:
+        return render_template('output.html', results_dict={})
+    return conditional_response(snapshot, lambda: render_template('output.html', results_dict=snapshot.results))
 
@@ -0,0 +1,133 @@
+"""Shared loader of the IFFT results
+
+`data/ifft_results.json` is parsed once and kept in memory until the file
+changes (a new modification time, size or inode, as `ifft.py` replaces it), so
+requests no longer re-read and re-parse it. What the views derive from the
+results (the JSON body, the graph) is computed once per version of the file.
+
+Every version has an ETag and a Last-Modified date; responses carry them and
+answer a browser that already has the current version with a 304, without
+rendering anything. Last-Modified only has a one-second resolution, so it is
+neither sent nor trusted while the file could still change within its second.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, make_response, request, session
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ifft_results.json')
+# Part of the ETags, so pages cached before a restart (and maybe rendered from older templates) are sent again
+SERVER_ID = f"{time.time_ns():x}"
+
+
+class ResultsSnapshot:
+    """One version of the results file: its content, parsed, and its validators."""
+
+    def __init__(self, raw, results, stat):
+        self.raw = raw
+        self.results = results
+        self.etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}-{SERVER_ID}"
+        self.last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        # The file can still be replaced within its last second, and keep the same Last-Modified
+        self._settled_at = int(stat.st_mtime) + 1
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def last_modified_settled(self):
+        """Whether a new version of the file would have a later Last-Modified than this one."""
+        return time.time() >= self._settled_at
+
+    def derived(self, name, compute):
+        """Return `compute(results)`, computed once for this version of the results."""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = compute(self.results)
+            return self._derived[name]
+
+
+class ResultsLoader:
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self._snapshot = None
+        self._key = None
+        # The key and error of a version that could not be parsed, so it is not read again
+        self._failed_key = None
+        self._failed_error = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Return the current results, parsing the file only when it changed since the last call.
+
+        Returns:
+            ResultsSnapshot: The current version of the results.
+
+        Raises:
+            FileNotFoundError: If IFFT was not run yet.
+        """
+        stat = os.stat(self.path)
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            if key == self._failed_key:
+                if self._snapshot is None:
+                    raise self._failed_error
+            elif key != self._key:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                try:
+                    results = json.loads(raw)
+                except ValueError as e:
+                    # Written in place by hand or by an older IFFT, and not complete yet
+                    self._failed_key, self._failed_error = key, e
+                    if self._snapshot is None:
+                        raise
+                    logging.error(f"Could not parse {self.path}, serving the previous results: {e}")
+                    return self._snapshot
+                self._snapshot = ResultsSnapshot(raw, results, stat)
+                self._key = key
+            return self._snapshot
+
+
+results_loader = ResultsLoader()
+
+
+def current_results():
+    """Return the current version of the results, or None if IFFT was not run yet."""
+    try:
+        return results_loader.load()
+    except FileNotFoundError:
+        return None
+
+
+def conditional_response(snapshot, build):
+    """
+    Answer with `build()` for the given version of the results, or with a 304 when the browser has it.
+
+    Args:
+        snapshot (ResultsSnapshot): The version of the results the response is built from.
+        build (callable): Returns the response body (or a response) when it has to be sent.
+
+    Returns:
+        Response: The response, with the ETag and Last-Modified of the results.
+    """
+    if session.get('_flashes'):
+        # A pending flash message makes the page differ from the one the browser has
+        not_modified = False
+    elif request.if_none_match:
+        not_modified = request.if_none_match.contains(snapshot.etag)
+    else:
+        not_modified = (request.if_modified_since is not None and snapshot.last_modified_settled()
+                        and request.if_modified_since >= snapshot.last_modified)
+
+    response = Response(status=304) if not_modified else make_response(build())
+    response.set_etag(snapshot.etag)
+    if snapshot.last_modified_settled():
+        response.last_modified = snapshot.last_modified
+    # Let the browser keep the response, but check that it is still current first
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,110 @@
+"""Benchmark: asynchronous git layer against the blocking one
+
+Generates a synthetic repository (see `synthetic_repo.py`) with a large change
+set and compares, in wall time:
+
+- the git work alone: the diff of the index plus reading every modified file
+  as staged, one `git cat-file --batch` request at a time (`StagedBlobReader`)
+  against `AsyncGit` (pipelined requests over several batch processes, the
+  diff overlapping them)
+- a whole scan: `scan_files` against `async_scan_files`, in manual and auto mode
+- how long the event loop stalls when a scan runs from a coroutine: the longest
+  gap between the ticks of a 1 ms timer while the scan runs
+
+Usage:
+    python3 benchmarks/bench_async_git.py [--repeat 3] [--max-concurrency 8] [generator options]
+
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ifft_core.async_git import AsyncGit, async_scan_files
+from ifft_core.git_blobs import StagedBlobReader
+from ifft_core.ifft_parser import get_modified_lines_by_file, scan_files
+from synthetic_repo import add_generator_arguments, generate_repository, generator_params
+from timing import best_time
+
+
+def blocking_git(repo_path):
+    """Diff the index, then read every modified Python file as staged, one request at a time."""
+    hunks_by_file = get_modified_lines_by_file(repo_path, True)
+    with StagedBlobReader(repo_path, skip_clean_files=False) as blob_reader:
+        return [blob_reader.read_staged(name) for name in hunks_by_file if name.endswith(".py")]
+
+
+async def async_git(repo_path, max_concurrency):
+    """The same git work through AsyncGit."""
+    git = AsyncGit(repo_path, max_concurrency)
+    hunks_by_file = await git.modified_lines_by_file(True)
+    return await git.read_objects([f":{name}" for name in hunks_by_file if name.endswith(".py")])
+
+
+async def longest_stall(scan):
+    """Run `scan()` while a 1 ms timer ticks, returning the longest gap between two ticks, in seconds."""
+    gaps = []
+    done = False
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticks = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    await scan()
+    done = True
+    await ticks
+    return max(gaps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the asynchronous git layer with the blocking one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs of each benchmark")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Maximum number of git processes at once")
+    add_generator_arguments(parser)
+    parser.set_defaults(files=1000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    concurrency = args.max_concurrency
+
+    with tempfile.TemporaryDirectory() as path:
+        generate_repository(path, **generator_params(args))
+        rows = [
+            ("git: diff + staged blobs", lambda: blocking_git(path), lambda: asyncio.run(async_git(path, concurrency))),
+        ]
+        for auto_mode in (False, True):
+            rows.append((f"scan ({'auto' if auto_mode else 'manual'})",
+                         lambda auto_mode=auto_mode: scan_files(path, auto_mode=auto_mode, use_cache=False),
+                         lambda auto_mode=auto_mode: asyncio.run(async_scan_files(
+                             path, auto_mode=auto_mode, use_cache=False, max_concurrency=concurrency))))
+
+        print(f"{args.files} files, {os.cpu_count()} CPU(s), up to {concurrency} git processes")
+        print(f"{'benchmark':<28}{'blocking s':>12}{'async s':>12}{'speedup':>10}")
+        for name, blocking, asynchronous in rows:
+            (blocking_s, _), (async_s, _) = best_time(blocking, args.repeat), best_time(asynchronous, args.repeat)
+            print(f"{name:<28}{blocking_s:>12.3f}{async_s:>12.3f}{blocking_s / async_s:>9.2f}x")
+
+        async def blocking_scan():
+            scan_files(path, auto_mode=True, use_cache=False)
+
+        stalls = [asyncio.run(longest_stall(blocking_scan)) for _ in range(args.repeat)]
+        async_stalls = [asyncio.run(longest_stall(lambda: async_scan_files(path, auto_mode=True, use_cache=False,
+                                                                          max_concurrency=concurrency)))
+                        for _ in range(args.repeat)]
+        print(f"{'event loop stall (auto)':<28}{statistics.median(stalls) * 1000:>10.1f}ms"
+              f"{statistics.median(async_stalls) * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: commit-range analysis over a long history
+
+Builds a repository with thousands of commits through `git fast-import`
+(every commit edits one block of one of a few modules, and some also edit
+the block's associated file), then times `--range` in aggregate and
+per-commit mode and reports the peak Python memory of each, which should not
+grow with the number of commits.
+
+Usage:
+    python3 benchmarks/bench_range.py [--commits 1000 4000] [--modules 20]
+
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ifft_core.commit_range import iter_range_results
+
+
+def module_source(index, revision):
+    """The content of a module whose block holds the revision it was last edited in."""
+    return (f"import os\n\n#IFFT.If(block_{index})\nvalue = {revision}\n"
+            f"#IFFT.Then(\"target_{index}.txt\", \"label_{index}\")\n\nprint(value)\n")
+
+
+def build_history(path, commits, modules):
+    """Create `commits` commits on top of an initial one; every third one also edits the target."""
+    subprocess.run(["git", "init", "-q", path], check=True)
+    stream = []
+
+    def blob_command(file_name, content):
+        data = content.encode()
+        stream.append(f"M 100644 inline {file_name}\ndata {len(data)}\n".encode() + data + b"\n")
+
+    def commit_header(number, message):
+        stream.append(f"commit refs/heads/main\ncommitter Bench <bench@example.com> {1700000000 + number} +0000\n"
+                      f"data {len(message)}\n{message}\n".encode())
+
+    commit_header(0, "initial")
+    for index in range(modules):
+        blob_command(f"module_{index}.py", module_source(index, 0))
+        blob_command(f"target_{index}.txt", "0\n")
+
+    for number in range(1, commits + 1):
+        index = number % modules
+        commit_header(number, f"change {number}")
+        blob_command(f"module_{index}.py", module_source(index, number))
+        if number % 3 == 0:
+            blob_command(f"target_{index}.txt", f"{number}\n")
+
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, input=b"".join(stream), check=True)
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=path, check=True)
+
+
+def measure(path, per_commit):
+    """Run a range check of the whole history, returning seconds, peak KiB and the number of violations."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    violations = sum(1 for _, blocks in iter_range_results(path, f"{root_commit(path)}..main", per_commit=per_commit)
+                     for block in blocks if block.status == "modified")
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024, violations
+
+
+def root_commit(path):
+    """The initial commit, the base of the range."""
+    return subprocess.run(["git", "rev-list", "--max-parents=0", "main"], cwd=path, capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark commit-range analysis over a long history.")
+    parser.add_argument("--commits", type=int, nargs="+", default=[1000, 4000], help="History lengths to time")
+    parser.add_argument("--modules", type=int, default=20, help="Number of modules the commits edit")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'commits':>8}{'mode':>12}{'seconds':>10}{'peak KiB':>10}{'violations':>12}")
+    for commits in args.commits:
+        with tempfile.TemporaryDirectory() as path:
+            build_history(path, commits, args.modules)
+            for per_commit in (False, True):
+                seconds, peak, violations = measure(path, per_commit)
+                mode = "per-commit" if per_commit else "aggregate"
+                print(f"{commits:>8}{mode:>12}{seconds:>10.2f}{peak:>10.0f}{violations:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: restoring the markers of a file with many blocks
+
+Generates a module with thousands of IFFT blocks, removes its markers and
+compares the original restore loop (kept below as `legacy_restore`, one
+`list.insert` and one scan of the rest of the file per marker) with the
+single merge pass of `merge_ifft_markers`.
+
+Usage:
+    python3 benchmarks/bench_restore.py [--blocks 1000 5000] [--repeat 3]
+
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from block_manager.block_manager_class import block_markers, merge_ifft_markers
+from timing import best_time
+
+
+def legacy_restore(lines, metadata):
+    """The restore loop as it was before the merge pass."""
+    lines = list(lines)
+    for block in sorted(metadata, key=lambda b: -b["block_start"]):
+        block_start = block["block_start"] - 1
+        block_end = block["block_end"] - 1
+
+        if block_start < len(lines) and not lines[block_start].strip().startswith("#IFFT.If"):
+            lines.insert(block_start, f"#IFFT.If({block['associated_file_label']})\n")
+
+        if block_end >= len(lines):
+            lines.append(f"#IFFT.Then(\"{block['associated_file_name']}\", \"{block['associated_file_label']}\")\n")
+        elif not any(line.strip().startswith("#IFFT.Then") and block["associated_file_label"] in line for line in lines[block_end:]):
+            lines.insert(block_end + 1, f"#IFFT.Then(\"{block['associated_file_name']}\", \"{block['associated_file_label']}\")\n")
+    return lines
+
+
+def build_file(blocks, block_length=5):
+    """Return the lines of a module with `blocks` blocks and their metadata, and the lines without markers."""
+    lines = []
+    metadata = []
+    for i in range(blocks):
+        if_line = f"#IFFT.If(block_{i})\n"
+        then_line = f"#IFFT.Then(\"other.py\", \"label_{i}\")\n"
+        block_start = len(lines) + 1
+        lines.append(if_line)
+        lines.extend(f"value_{i}_{k} = {k}\n" for k in range(block_length))
+        lines.append(then_line)
+        metadata.append({"block_start": block_start, "block_end": len(lines), "associated_file_name": "other.py",
+                         "associated_file_label": f"label_{i}", "label": f"block_{i}", "if_line": if_line,
+                         "then_line": then_line})
+        lines.append("\n")
+    stripped = [line for line in lines if not line.startswith("#IFFT.")]
+    return lines, stripped, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark restoring the markers of a file with many blocks.")
+    parser.add_argument("--blocks", type=int, nargs="+", default=[1000, 5000], help="Blocks per file")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs (the best one is kept)")
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8}{'lines':>10}{'legacy ms':>12}{'merge ms':>12}  exact")
+    for blocks in args.blocks:
+        original, stripped, metadata = build_file(blocks)
+        legacy_seconds, _ = best_time(lambda: legacy_restore(stripped, metadata), args.repeat)
+        merge_seconds, restored = best_time(lambda: merge_ifft_markers(stripped, block_markers(metadata)), args.repeat)
+        print(f"{blocks:>8}{len(original):>10}{legacy_seconds * 1000:>12.1f}{merge_seconds * 1000:>12.1f}  "
+              f"{restored == original}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark: scan_file throughput on a synthetic 100k-line file
+
+Compares the current `scan_file` with the original line-by-line scanner (kept
+below as `legacy_scan_file`) on two synthetic files: one with a handful of IFFT
+blocks and one without any marker, which is the common case in a commit.
+
+Usage:
+    python3 benchmarks/bench_scan_file.py [--lines 100000] [--repeat 5]
+
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ifft_block.ifft_block_class import IFFTBlock
+from ifft_core.ifft_parser import scan_file, validate_associated_file
+from timing import best_time
+
+
+def legacy_scan_file(project_path, filename, modified_lines_set):
+    """The scanner as it was before the byte-level prefilter and combined marker pattern."""
+    results = []
+    in_block = False
+    block_content = ""
+    block_start = 0
+    modified_lines_within_blocks = []
+
+    file_path = os.path.join(project_path, filename)
+    with open(file_path) as f:
+        lines = f.readlines()
+
+    ifft_if_pattern = re.compile(r'#\s*IFFT\.If', re.IGNORECASE)
+    ifft_then_pattern = re.compile(r'#\s*IFFT\.Then\(\s*"([^"]+)"\s*,\s*"([^"]+)"\s*\)', re.IGNORECASE)
+
+    for line_number, line in enumerate(lines, start=1):
+        if ifft_if_pattern.search(line.strip()):
+            in_block = True
+            block_start = line_number
+            block_content += line
+            modified_lines_within_blocks = []
+        elif ifft_then_pattern.search(line):
+            match = ifft_then_pattern.search(line)
+            associated_file_name = match.group(1)
+            associated_file_label = match.group(2)
+            if not validate_associated_file(associated_file_name):
+                associated_file_name = ""
+                associated_file_label = ""
+            results.append(IFFTBlock(file_path, block_content, associated_file_name, associated_file_label,
+                                     block_start, line_number, modified_lines_within_blocks))
+            in_block = False
+            block_content = ""
+        elif in_block:
+            block_content += line
+            if (line_number, line.strip()) in modified_lines_set:
+                modified_lines_within_blocks.append(line.strip())
+
+    return results
+
+
+def write_synthetic_file(path, line_count, with_blocks):
+    """Write a Python-looking file of `line_count` lines, with a block every 10k lines if asked."""
+    with open(path, "w") as f:
+        for i in range(line_count):
+            if with_blocks and i % 10000 == 100:
+                f.write(f"#IFFT.If(block_{i})\n")
+            elif with_blocks and i % 10000 == 600:
+                f.write(f'#IFFT.Then("file1.py", "block_{i - 500}")\n')
+            else:
+                f.write(f"    value_{i} = compute(value_{i - 1}, {i})  # running total\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scan_file on a synthetic file.")
+    parser.add_argument("--lines", type=int, default=100000, help="Number of lines of the synthetic file")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (the best one is kept)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, with_blocks in (("with_blocks.py", True), ("no_markers.py", False)):
+            path = os.path.join(tmp_dir, name)
+            write_synthetic_file(path, args.lines, with_blocks)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            modified_lines = {(150, "value_149 = compute(value_148, 149)  # running total")}
+            hunks = [(150, 1, 150, 1)]
+
+            assert len(scan_file(tmp_dir, name, hunks)) == len(legacy_scan_file(tmp_dir, name, modified_lines))
+
+            legacy, _ = best_time(lambda: legacy_scan_file(tmp_dir, name, modified_lines), args.repeat)
+            current, _ = best_time(lambda: scan_file(tmp_dir, name, hunks), args.repeat)
+
+            print(f"{name} ({args.lines} lines, {size_mb:.1f} MB)")
+            print(f"  legacy scan_file:  {legacy * 1000:8.2f} ms  {size_mb / legacy:8.1f} MB/s")
+            print(f"  current scan_file: {current * 1000:8.2f} ms  {size_mb / current:8.1f} MB/s")
+            print(f"  speedup:           {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
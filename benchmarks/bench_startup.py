@@ -0,0 +1,88 @@
+"""Benchmark: cold start of the pre-commit hook entry point
+
+Runs `ifft_hook.py` under `python3 -X importtime` in a throwaway repository with
+one staged Python file, exactly as the `pre-commit` script does, and sums the
+cumulative import time of the top-level modules. Exits with status 1 when the
+total goes over the budget, so the check can guard against import regressions
+(e.g. a heavy module imported at the top of `ifft_core/ifft_parser.py` again).
+
+Usage:
+    python3 benchmarks/bench_startup.py [--budget-ms 100] [--repeat 5] [--top 10]
+
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+HOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ifft_hook.py")
+DEFAULT_BUDGET_MS = 100.0
+
+
+def make_repository(path):
+    """Create a git repository with one committed IFFT block and a staged change inside it."""
+    def git(*args):
+        subprocess.run(["git", *args], cwd=path, check=True, stdout=subprocess.DEVNULL)
+
+    git("init", "-q", ".")
+    git("config", "user.email", "bench@ifft")
+    git("config", "user.name", "bench")
+    with open(os.path.join(path, "app.py"), "w") as f:
+        f.write('#IFFT.If(app_block)\nx = 1\n#IFFT.Then("app.py", "app_block")\n')
+    git("add", "app.py")
+    git("commit", "-qm", "init")
+    with open(os.path.join(path, "app.py"), "w") as f:
+        f.write('#IFFT.If(app_block)\nx = 2\n#IFFT.Then("app.py", "app_block")\n')
+    git("add", "app.py")
+
+
+def run_hook(repo_path):
+    """
+    Run the hook once under `-X importtime`.
+
+    Returns:
+        dict: The cumulative import time, in microseconds, of each top-level module.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", HOOK_PATH], cwd=repo_path, input="app.py\n",
+                             capture_output=True, text=True)
+
+    # Lines look like "import time:   self [us] |  cumulative | imported package", nested imports are indented
+    imports = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the pre-commit hook.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum total import time in milliseconds")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs (the best one is kept)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repo_path:
+        make_repository(repo_path)
+        runs = [run_hook(repo_path) for _ in range(args.repeat)]
+
+    best = min(runs, key=lambda imports: sum(imports.values()))
+    total_ms = sum(best.values()) / 1000
+
+    print(f"Slowest top-level imports of ifft_hook.py (best of {args.repeat} runs):")
+    for name, cumulative in sorted(best.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.2f} ms  {name}")
+    print(f"Total import time: {total_ms:.2f} ms (budget {args.budget_ms:.2f} ms)")
+
+    if total_ms > args.budget_ms:
+        print("Startup budget exceeded.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
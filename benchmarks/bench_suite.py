@@ -0,0 +1,188 @@
+"""Benchmark suite: scanner and block manager on a synthetic repository
+
+Generates a repository with `synthetic_repo.py`, times the main entry points of
+the scanner and of the BlockManager on it, and writes the results as JSON so
+runs can be compared across commits:
+
+- `scan_files` in manual and auto mode, with and without the scan cache
+- `get_modified_lines_by_file` (one diff for the whole change set) and
+  `get_modified_lines` (one file)
+- `scan_file` over every modified file, from the working tree and from the index
+- `save_results_to_file`
+- `BlockManager.extract_blocks`, `remove_ifft_trace` and `restore_ifft_blocks`
+  over every file
+- `scan_fingerprints`, the git-free check against the extracted blocks
+
+Usage:
+    python3 benchmarks/bench_suite.py [--repeat 5] [--output results.json] [generator options]
+
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from block_manager.block_manager_class import BlockManager
+from ifft_core.fingerprints import scan_fingerprints
+from ifft_core.git_blobs import StagedBlobReader
+from ifft_core.ifft_parser import (get_modified_lines, get_modified_lines_by_file, save_results_to_file, scan_file,
+                                   scan_files)
+from synthetic_repo import add_generator_arguments, file_name, generate_repository, generator_params
+from timing import time_calls
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def measure(function, repeat, setup=None):
+    """
+    Time `repeat` calls of a function, running `setup` untimed before each of them.
+
+    Returns:
+        dict: The best and mean wall time in seconds, and the number of runs.
+    """
+    timings, _ = time_calls(function, repeat, setup)
+    return {"best_s": min(timings), "mean_s": statistics.mean(timings), "runs": repeat}
+
+
+def current_commit():
+    """The IFFT commit being benchmarked, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(workspace, params, repeat):
+    """
+    Generate the synthetic repository in `workspace` and time every benchmark.
+
+    Returns:
+        tuple: The timings of each benchmark by name, and the size of the scanned change set.
+    """
+    repo_path = os.path.join(workspace, "repo")
+    generate_repository(repo_path, **params)
+    file_names = [file_name(index) for index in range(params["files"])]
+    timings = {}
+
+    def no_cache_files():
+        # Cold runs: drop what the previous run stored in .git/ifft-cache
+        for name in ("scan_cache.json", "label_index.json"):
+            path = os.path.join(repo_path, ".git", "ifft-cache", name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    timings["scan_files_manual"] = measure(lambda: scan_files(repo_path, use_cache=False), repeat)
+    timings["scan_files_auto"] = measure(lambda: scan_files(repo_path, auto_mode=True, use_cache=False), repeat)
+    timings["scan_files_auto_cold_cache"] = measure(lambda: scan_files(repo_path, auto_mode=True), repeat,
+                                                    setup=no_cache_files)
+    scan_files(repo_path, auto_mode=True)
+    timings["scan_files_auto_warm_cache"] = measure(lambda: scan_files(repo_path, auto_mode=True), repeat)
+
+    timings["get_modified_lines_by_file"] = measure(lambda: get_modified_lines_by_file(repo_path, True), repeat)
+    timings["get_modified_lines"] = measure(lambda: get_modified_lines(repo_path, file_names[0], True), repeat)
+
+    modified_lines_by_file = get_modified_lines_by_file(repo_path, True)
+    timings["scan_file"] = measure(
+        lambda: [scan_file(repo_path, name, hunks) for name, hunks in modified_lines_by_file.items()], repeat)
+
+    def scan_staged():
+        with StagedBlobReader(repo_path) as blob_reader:
+            return [scan_file(repo_path, name, hunks, blob_reader=blob_reader)
+                    for name, hunks in modified_lines_by_file.items()]
+
+    timings["scan_file_staged"] = measure(scan_staged, repeat)
+
+    results = scan_files(repo_path, auto_mode=True, use_cache=False)
+    counts = {
+        "modified_files": len(modified_lines_by_file),
+        "hunks": sum(len(hunks) for hunks in modified_lines_by_file.values()),
+        "modified_blocks": sum(len(blocks) for blocks in results.values()),
+    }
+    output_file = os.path.join(workspace, "ifft_results.json")
+    timings["save_results_to_file"] = measure(lambda: save_results_to_file(results, output_file), repeat)
+
+    # Keep the metadata store next to the synthetic repository, not inside it
+    os.chdir(workspace)
+    manager = BlockManager(storage_dir="block_metadata", project_root=repo_path)
+
+    all_blocks = {name: scan_file(repo_path, name, []) for name in file_names}
+    timings["block_manager_extract"] = measure(
+        lambda: [manager.extract_blocks(name, blocks) for name, blocks in all_blocks.items()], repeat)
+    timings["fingerprint_check"] = measure(lambda: scan_fingerprints(repo_path, manager.store), repeat)
+
+    originals = {}
+    for name in file_names:
+        with open(os.path.join(repo_path, name)) as f:
+            originals[name] = f.read()
+
+    def reset_files():
+        for name, content in originals.items():
+            with open(os.path.join(repo_path, name), "w") as f:
+                f.write(content)
+
+    def remove_all():
+        for name in file_names:
+            manager.remove_ifft_trace(name)
+
+    def restore_all():
+        for name in file_names:
+            manager.restore_ifft_blocks(name)
+
+    timings["block_manager_remove"] = measure(remove_all, repeat, setup=reset_files)
+    timings["block_manager_restore"] = measure(restore_all, repeat, setup=lambda: (reset_files(), remove_all()))
+    reset_files()
+
+    return timings, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scanner and the block manager on a synthetic repository.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs of each benchmark")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    params = generator_params(args)
+
+    cwd = os.getcwd()
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as workspace:
+        # BlockManager prints a line per file, keep the JSON output clean
+        sys.stdout = open(os.devnull, "w")
+        try:
+            timings, counts = run_suite(workspace, params, args.repeat)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            os.chdir(cwd)
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "repeat": args.repeat,
+        "counts": counts,
+        "timings": timings,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark: project file enumeration on a large tree
+
+Builds a tree of more than 100k files where most of them live in folders a
+project never wants scanned (`node_modules`, a virtualenv, build output), and
+compares the original `list_python_files` walk (kept below as
+`legacy_list_python_files`) with `helpers.iter_project_files`, walking the
+tree and asking `git ls-files`. The build folder is only excluded through the
+configuration, so `git ls-files --others` still has to walk it; the git mode
+pays off when `.gitignore` covers the bulk of the tree.
+
+Usage:
+    python3 benchmarks/bench_walk.py [--ignored-files 120000] [--source-files 2000] [--repeat 3]
+
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from helpers.helpers import iter_project_files
+from timing import best_time
+
+
+def legacy_list_python_files(project_root, excluded_folders):
+    """The walk as it was before pruning: excluded folders are entered, then skipped by substring."""
+    python_files = []
+    for root, dirs, files in os.walk(project_root):
+        if any(excluded in root for excluded in excluded_folders):
+            continue
+        for file in files:
+            if file.endswith(".py"):
+                python_files.append(os.path.join(root, file))
+    return python_files
+
+
+def build_tree(root, ignored_files, source_files):
+    """Create the source files, the ignored folders and a `.gitignore`, 100 files per directory."""
+    def populate(folder, count, extension):
+        for i in range(count):
+            directory = os.path.join(root, folder, f"pkg_{i // 100:04d}")
+            if i % 100 == 0:
+                os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"mod_{i}{extension}"), "w") as f:
+                f.write("x = 1\n")
+
+    populate("src", source_files, ".py")
+    share = ignored_files // 3
+    populate("node_modules", share, ".js")
+    populate(os.path.join(".venv", "lib", "site-packages"), share, ".py")
+    populate("build", ignored_files - 2 * share, ".py")
+
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("node_modules/\n.venv/\n")
+    subprocess.run(["git", "init", "-q", "."], cwd=root, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark project file enumeration on a large tree.")
+    parser.add_argument("--ignored-files", type=int, default=120000,
+                        help="Number of files in node_modules, the virtualenv and the build folder")
+    parser.add_argument("--source-files", type=int, default=2000, help="Number of Python files to find")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs (the best one is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        build_tree(root, args.ignored_files, args.source_files)
+        print(f"Tree of {args.ignored_files + args.source_files} files, {args.source_files} of them to be listed")
+
+        # The build folder is excluded through the configuration, the others through .gitignore
+        candidates = [
+            ("legacy os.walk", lambda: legacy_list_python_files(root, [os.path.join(root, "build"), "node_modules", ".venv"])),
+            ("pruned walk", lambda: list(iter_project_files(root, excluded_folders=["build"]))),
+            ("git ls-files", lambda: list(iter_project_files(root, excluded_folders=["build"], use_git=True))),
+        ]
+        for name, function in candidates:
+            seconds, files = best_time(function, args.repeat)
+            print(f"  {name:<16}{seconds * 1000:10.1f} ms  {len(files):8d} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Synthetic git repositories for the IFFT benchmarks
+
+Generates a throwaway repository of Python files containing IFFT blocks, commits
+it, then edits a share of the lines twice: the first round is staged (what
+`--auto` sees) and the second one is left in the working tree (what a manual
+run sees). Every block points at a block of the next file, so satisfied and
+modified blocks both show up in the results.
+
+Usage:
+    python3 benchmarks/synthetic_repo.py DIR [--files 200] [--blocks-per-file 5] [--block-length 20]
+                                             [--filler-lines 200] [--modified-density 0.05] [--seed 0]
+
+"""
+
+import argparse
+import os
+import random
+import subprocess
+
+DEFAULT_PARAMS = {
+    "files": 200,
+    "blocks_per_file": 5,
+    "block_length": 20,
+    "filler_lines": 200,
+    "modified_density": 0.05,
+    "seed": 0,
+}
+
+
+def file_name(index):
+    """Name of the `index`-th generated file (flat, since BlockManager keys metadata by file prefix)."""
+    return f"module_{index:05d}.py"
+
+
+def block_label(file_index, block_index):
+    return f"block_{file_index}_{block_index}"
+
+
+def render_file(file_index, params):
+    """
+    Render the lines of a generated file.
+
+    Args:
+        file_index (int): The index of the file in the repository.
+        params (dict): The generator parameters (see DEFAULT_PARAMS).
+
+    Returns:
+        list[str]: The lines of the file, newline-terminated.
+    """
+    target_file = file_name((file_index + 1) % params["files"])
+    lines = []
+    for block_index in range(params["blocks_per_file"]):
+        for i in range(params["filler_lines"]):
+            lines.append(f"value_{block_index}_{i} = compute({block_index}, {i})  # filler\n")
+        lines.append(f"#IFFT.If({block_label(file_index, block_index)})\n")
+        for i in range(params["block_length"]):
+            lines.append(f"    guarded_{block_index}_{i} = compute({file_index}, {i})\n")
+        lines.append(f'#IFFT.Then("{target_file}", "{block_label((file_index + 1) % params["files"], block_index)}")\n')
+    return lines
+
+
+def edit_lines(lines, density, rng, tag):
+    """Rewrite a `density` share of the code lines, leaving the IFFT markers untouched."""
+    editable = [i for i, line in enumerate(lines) if "#IFFT." not in line]
+    for i in rng.sample(editable, int(len(editable) * density)):
+        indent = lines[i][:len(lines[i]) - len(lines[i].lstrip())]
+        lines[i] = f"{indent}edited_{tag}_{i} = {i}  # edited\n"
+    return lines
+
+
+def generate_repository(path, **params):
+    """
+    Create a synthetic git repository with staged and unstaged edits.
+
+    Args:
+        path (str): The directory to create the repository in (must not exist or be empty).
+        **params: Overrides of DEFAULT_PARAMS.
+
+    Returns:
+        dict: The parameters the repository was generated with.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    rng = random.Random(params["seed"])
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=path, check=True, stdout=subprocess.DEVNULL)
+
+    def write(index, lines):
+        with open(os.path.join(path, file_name(index)), "w") as f:
+            f.writelines(lines)
+
+    os.makedirs(path, exist_ok=True)
+    git("init", "-q", ".")
+    git("config", "user.email", "bench@ifft")
+    git("config", "user.name", "bench")
+
+    contents = [render_file(index, params) for index in range(params["files"])]
+    for index, lines in enumerate(contents):
+        write(index, lines)
+    git("add", "-A")
+    git("commit", "-qm", "Synthetic repository")
+
+    # Staged edits, seen by `--auto`
+    for index, lines in enumerate(contents):
+        write(index, edit_lines(lines, params["modified_density"], rng, "staged"))
+    git("add", "-A")
+
+    # Unstaged edits, seen by a manual run
+    for index, lines in enumerate(contents):
+        write(index, edit_lines(lines, params["modified_density"], rng, "unstaged"))
+
+    return params
+
+
+def add_generator_arguments(parser):
+    """Add the generator parameters to an argument parser."""
+    parser.add_argument("--files", type=int, default=DEFAULT_PARAMS["files"], help="Number of Python files")
+    parser.add_argument("--blocks-per-file", type=int, default=DEFAULT_PARAMS["blocks_per_file"],
+                        help="Number of IFFT blocks in each file")
+    parser.add_argument("--block-length", type=int, default=DEFAULT_PARAMS["block_length"],
+                        help="Number of lines inside each block")
+    parser.add_argument("--filler-lines", type=int, default=DEFAULT_PARAMS["filler_lines"],
+                        help="Number of lines before each block")
+    parser.add_argument("--modified-density", type=float, default=DEFAULT_PARAMS["modified_density"],
+                        help="Share of the lines edited in each round (staged and unstaged)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_PARAMS["seed"], help="Random seed of the edits")
+
+
+def generator_params(args):
+    """Extract the generator parameters from parsed arguments."""
+    return {name: getattr(args, name) for name in DEFAULT_PARAMS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic git repository with IFFT blocks.")
+    parser.add_argument("path", help="Directory to create the repository in")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    params = generate_repository(args.path, **generator_params(args))
+    print(f"Synthetic repository created in {args.path}: {params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Timing helper shared by the IFFT benchmarks
+
+The benchmarks are run as scripts from any directory; their own folder is on
+`sys.path`, so they import it as `from timing import best_time, time_calls`.
+
+"""
+
+import time
+
+
+def time_calls(function, repeat, setup=None):
+    """
+    Time `repeat` calls of a function, running `setup` untimed before each of them.
+
+    Example:
+        >>>timings, result = time_calls(lambda: scan_files(path, use_cache=False), 3)
+        >>>min(timings)
+        0.412
+
+    Args:
+        function (callable): The code to time.
+        repeat (int): The number of timed calls.
+        setup (callable): Optional untimed preparation of each call.
+
+    Returns:
+        tuple: The wall time of each call in seconds, and the result of the last call.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def best_time(function, repeat):
+    """Return the best wall time of `repeat` calls, in seconds, and the result of the last call."""
+    timings, result = time_calls(function, repeat)
+    return min(timings), result
@@ -4,7 +4,9 @@ import logging
 from colorama import Fore, Style
 import os
 
-from helpers.helpers import resolve_path
+from block_manager.metadata_store import MetadataStore
+from helpers.helpers import write_lines_atomically
+from ifft_core.fingerprints import block_fingerprint, file_snapshot
 
 
 def load_config():
@@ -21,116 +23,199 @@ def get_project_root():
     project_root = config.get("project_root", "mock_project")
     return os.path.abspath(project_root)  # Ensure it's an absolute path
 
-def list_python_files(project_root=None, metadata_dir="block_metadata") -> list[str]:
+def strip_ifft_markers(lines):
     """
-    List all tracked Python files in the user-specified project.
-    First checks the block_metadata directory, and falls back to scanning the project root.
+    Find the IFFT blocks of a file and remove their markers.
 
     Args:
-        project_root (str): Root path of the project (default: None).
-        metadata_dir (str): Directory where metadata is stored.
+        lines (list): The lines of the file.
 
     Returns:
-        List[str]: List of Python file paths.
+        tuple: The metadata of the blocks found and the lines of the file without their markers.
     """
-    if not project_root:
-        project_root = get_project_root()
+    metadata = []
+    # 1-based numbers of the marker lines of the recorded blocks
+    marker_lines = set()
+
+    # Scan the file and extract metadata for IFFT blocks
+    in_block = False
+    block_content = ""
+    block_start = None
+    block_end = None
+    associated_file_name = ""
+    associated_file_label = ""
+
+    for line_number, line in enumerate(lines):
+        if "#IFFT." not in line:
+            # Most lines are plain code, no need to look for a marker
+            if in_block:
+                block_content += line
+
+        elif line.strip().startswith("#IFFT.If"):
+            in_block = True
+            block_start = line_number + 1  # 1-based index
+            block_content += line
+            if_line = line
+            label = re.search(r"#IFFT.If\((.*?)\)", line)
+            label = label.group(1) if label else ""
+
+        elif line.strip().startswith("#IFFT.Then"):
+            if in_block:
+                block_end = line_number + 1  # 1-based index
+                block_content += line
+                # Extract associated file and label
+                parts = re.search(r"#IFFT.Then\(\"(.*?)\", \"(.*?)\"\)", line)
+                if parts:
+                    associated_file_name = parts.group(1)
+                    associated_file_label = parts.group(2)
+
+                # Store metadata
+                metadata.append({
+                    "block_start": block_start,
+                    "block_end": block_end,
+                    "block_content": block_content,
+                    "associated_file_name": associated_file_name,
+                    "associated_file_label": associated_file_label,
+                    "label": label,
+                    "if_line": if_line,
+                    "then_line": line
+                })
+                marker_lines.update((block_start, block_end))
+
+                # Reset block
+                in_block = False
+                block_content = ""
+
+        elif in_block:
+            block_content += line
+
+    # Only the markers of the recorded blocks are removed, so restoring them gives the file back as it was
+    return metadata, [line for line_number, line in enumerate(lines, start=1) if line_number not in marker_lines]
+
+
+def block_markers(metadata):
+    """
+    List the marker lines of stored blocks at their line numbers in the original file.
+
+    Metadata written before the marker lines were stored falls back to the first and
+    last lines of the block content, then to markers rebuilt from the labels.
+
+    Args:
+        metadata (list): The stored block metadata of a file.
+
+    Returns:
+        list: `(line_number, marker_line)` tuples, sorted by line number (1-based).
+    """
+    markers = []
+    for block in metadata:
+        content = (block.get("block_content") or "").splitlines(keepends=True)
+        if_line = block.get("if_line")
+        if not if_line:
+            if content and content[0].strip().startswith("#IFFT.If"):
+                if_line = content[0]
+            else:
+                if_line = f"#IFFT.If({block.get('label') or block['associated_file_label']})\n"
+        then_line = block.get("then_line")
+        if not then_line:
+            if content and content[-1].strip().startswith("#IFFT.Then"):
+                then_line = content[-1]
+            else:
+                then_line = f"#IFFT.Then(\"{block['associated_file_name']}\", \"{block['associated_file_label']}\")\n"
+        markers.append((block["block_start"], if_line))
+        markers.append((block["block_end"], then_line))
+    markers.sort(key=lambda marker: marker[0])
+    return markers
+
+
+def merge_ifft_markers(lines, markers):
+    """
+    Put marker lines back into the lines of a file they were removed from, in one pass.
 
-    python_files = []
+    A marker already present at its line (e.g. a file restored twice) is not inserted again.
 
-    # Option 1: Use metadata directory to find tracked files
-    metadata_path = os.path.join(project_root, metadata_dir)
-    if os.path.exists(metadata_path):
-        for metadata_file in os.listdir(metadata_path):
-            if metadata_file.endswith(".json"):
-                python_files.append(os.path.join(project_root, metadata_file.replace(".json", ".py")))
+    Args:
+        lines (list): The lines of the file without the markers.
+        markers (list): `(line_number, marker_line)` tuples sorted by line number, as returned by `block_markers`.
 
-    # Option 2: Fallback to scanning the project root
-    if not python_files:
-        for root, _, files in os.walk(project_root):
-            for file in files:
-                if file.endswith(".py"):
-                    python_files.append(os.path.join(root, file))
+    Returns:
+        list: The lines of the file with the markers.
+    """
+    restored = []
+    next_line = 0
+    for line_number, marker in markers:
+        # Copy the code lines up to the marker
+        missing = min(line_number - 1 - len(restored), len(lines) - next_line)
+        if missing > 0:
+            restored.extend(lines[next_line:next_line + missing])
+            next_line += missing
+
+        if next_line < len(lines) and lines[next_line].rstrip("\r\n") == marker.rstrip("\r\n"):
+            marker = lines[next_line]
+            next_line += 1
+        if restored and not restored[-1].endswith("\n"):
+            restored[-1] += "\n"
+        restored.append(marker)
+
+    restored.extend(lines[next_line:])
+    return restored
 
-    return python_files
 
 class BlockManager:
-    def __init__(self, storage_dir="block_metadata", show_active_blocks=False):
+    def __init__(self, storage_dir="block_metadata", show_active_blocks=False, project_root=None):
        self.storage_dir = storage_dir
        self.show_active_blocks = show_active_blocks
-       self.block_data = {}
+       self.project_root = os.path.abspath(project_root or get_project_root())
 
-       # Load metadata into block_data
-       self._load_metadata()
+       # Metadata is only read from the store when it is queried
+       self.store = MetadataStore(storage_dir, project_root=self.project_root)
 
        if self.show_active_blocks:
            self._display_active_blocks()
 
-    def _load_metadata(self):
-        """Load all metadata from the block_metadata directory."""
-        if not os.path.exists(self.storage_dir):
-            logging.warning(f"Metadata directory '{self.storage_dir}' does not exist.")
-            return
-
-        for metadata_file in os.listdir(self.storage_dir):
-            if metadata_file.endswith(".json"):
-                file_path = os.path.join(self.storage_dir, metadata_file)
-                try:
-                    with open(file_path, "r") as f:
-                        file_data = json.load(f)
-                        self.block_data[metadata_file] = file_data
-                except json.JSONDecodeError:
-                    logging.error(f"[ERROR] Invalid JSON in {file_path}. Skipping this file.")
-                except Exception as e:
-                    logging.error(f"[ERROR] Could not load metadata from {file_path}: {e}")
+    @property
+    def block_data(self):
+        """All the stored metadata, as a dictionary mapping each file to its blocks."""
+        return {file_name: self.store.file_blocks(file_name) for file_name in self.store.files()}
 
+    def _source_path(self, file_name):
+        """Return the path of a project file given relative to the project root (or already absolute)."""
+        return os.path.join(self.project_root, self.store.relative_path(file_name))
 
     def _display_active_blocks(self):
         """Display active blocks (for visualization purposes)."""
-        if not self.block_data:
+        files = self.store.files()
+        if not files:
             print(f"{Fore.YELLOW}No active blocks found.{Style.RESET_ALL}")
             return
 
         print(f"{Fore.GREEN}Active Blocks:{Style.RESET_ALL}")
-        for file_name, blocks in self.block_data.items():
+        for file_name in files:
             print(f"File: {file_name}")
-            for block in blocks:
+            for block in self.store.file_blocks(file_name):
                 print(f"  Block Label: {block['associated_file_label']}")
                 print(f"  Block Start: {block['block_start']}")
                 print(f"  Block End: {block['block_end']}")
 
 
-    def save_metadata(self):
-        with open(self.storage_file, "w") as f:
-            json.dump(self.block_data, f, indent=4)
-
     def get_block_count(self):
         """Count the total number of active IFFT blocks in the project."""
-        total_blocks = 0
-        for file, blocks in self.block_data.items():
-            # TO-DO: Counting only blocks with associated_file_name and associated_file_label
-            total_blocks += len(blocks)
+        # TO-DO: Counting only blocks with associated_file_name and associated_file_label
+        total_blocks = self.store.count_blocks()
         print(f"{Fore.GREEN}Total active IFFT blocks in the project: {total_blocks}")
         return total_blocks
 
     def extract_blocks(self, file_name, blocks):
         """
-        Extract IFFT blocks from a file and store their metadata in the block_metadata directory.
-        The original file content is not modified.
+        Extract IFFT blocks from a file and store their metadata in the metadata store.
+        The original file content is not modified. The fingerprint of each block and the
+        state of the file and of its associated files are recorded too, as the baseline of
+        the git-free fingerprint check (see `ifft_core.fingerprints`).
         
         Args:
-            file_name (str): The name of the file to extract blocks from.
+            file_name (str): The file to extract blocks from, absolute or relative to the project root.
             blocks (list): A list of block information (start, end, content, etc.) for the file.
         """
         logging.info(f"Extracting IFFT blocks for {file_name}...")
-        file_prefix = file_name.split("/")[-1].split(".")[0]
-
-        # Ensure the block_metadata directory exists
-        metadata_dir = os.path.join(get_project_root(), "..", "block_metadata")
-        os.makedirs(metadata_dir, exist_ok=True)
-
-        # Construct the metadata file path
-        metadata_file_path = os.path.join(metadata_dir, f"{file_prefix}.json")
 
         # Prepare metadata to store
         metadata = []
@@ -140,124 +225,85 @@ class BlockManager:
                 "block_end": block.block_end,
                 "block_content": block.block_content,
                 "associated_file_name": block.associated_file_name,
-                "associated_file_label": block.associated_file_label
+                "associated_file_label": block.associated_file_label,
+                "label": getattr(block, "label", ""),
+                "fingerprint": block_fingerprint(block.block_content or "")
             })
 
-        # Write metadata to the JSON file
-        with open(metadata_file_path, "w") as f:
-            json.dump(metadata, f, indent=4)
-        
-        logging.info(f"Metadata for {file_name} stored in {metadata_file_path}.")
+        snapshots = {}
+        for tracked_file in [file_name] + [block.associated_file_name for block in blocks]:
+            snapshot = file_snapshot(self._source_path(tracked_file)) if tracked_file else None
+            if snapshot is not None:
+                snapshots[tracked_file] = snapshot
+
+        self.store.replace_file_blocks(file_name, metadata)
+        self.store.replace_file_stats(snapshots)
+        logging.info(f"Metadata for {file_name} stored in {self.store.db_path}.")
 
     
 
     def remove_ifft_trace(self, file_name):
         """
-        Remove IFFT annotations from the file and store metadata in the block_metadata directory.
+        Remove IFFT annotations from the file and store metadata in the metadata store.
         """
-        # getting only the filename without the extension
-        # from a pattern like this: /home/thiagosan/Área de Trabalho/IFFT/block_manager/block_manager_class.py
-        file_prefix = file_name.split("/")[-1].split(".")[0]
-
-        script_file_name = file_prefix + ".py"
-        metadata_file_name = file_prefix + ".json"
+        script_file_name = self.store.relative_path(file_name)
 
         logging.info(f"Removing IFFT blocks from {script_file_name}")
-        source_file_path = resolve_path(script_file_name)
+        source_file_path = self._source_path(file_name)
 
         if not os.path.exists(source_file_path):
             logging.error(f"Source file {script_file_name} not found.")
             return
 
-        metadata_path = os.path.join(self.storage_dir, f"{file_prefix}.json")
-        metadata = []
-
         with open(source_file_path, "r") as source_file:
             lines = source_file.readlines()
 
-        # Scan the file and extract metadata for IFFT blocks
-        in_block = False
-        block_content = ""
-        block_start = None
-        block_end = None
-        associated_file_name = ""
-        associated_file_label = ""
-
-        for line_number, line in enumerate(lines):
-            if line.strip().startswith("#IFFT.If"):
-                in_block = True
-                block_start = line_number + 1  # 1-based index
-                block_content += line
+        metadata, lines = strip_ifft_markers(lines)
 
-            elif line.strip().startswith("#IFFT.Then"):
-                if in_block:
-                    block_end = line_number + 1  # 1-based index
-                    block_content += line
-                    # Extract associated file and label
-                    parts = re.search(r"#IFFT.Then\(\"(.*?)\", \"(.*?)\"\)", line)
-                    if parts:
-                        associated_file_name = parts.group(1)
-                        associated_file_label = parts.group(2)
-
-                    # Store metadata
-                    metadata.append({
-                        "block_start": block_start,
-                        "block_end": block_end,
-                        "block_content": block_content,
-                        "associated_file_name": associated_file_name,
-                        "associated_file_label": associated_file_label
-                    })
-
-                    # Reset block
-                    in_block = False
-                    block_content = ""
-
-            elif in_block:
-                block_content += line
+        # Write metadata to the store
+        self.store.replace_file_blocks(file_name, metadata)
 
-        # Write metadata to file
-        os.makedirs(self.storage_dir, exist_ok=True)
-        with open(metadata_path, "w") as metadata_file:
-            json.dump(metadata, metadata_file, indent=4)
+        print(f"{Fore.YELLOW}[INFO] Metadata written to {self.store.db_path}")
 
-        print(f"{Fore.YELLOW}[INFO] Metadata written to {metadata_path}")
+        # Remove the markers of the recorded blocks from the source file
+        write_lines_atomically(source_file_path, lines)
 
-        # Remove IFFT annotations from the source file
-        lines = [
-            line for line in lines
-            if not line.strip().startswith("#IFFT.If") and not line.strip().startswith("#IFFT.Then")
-        ]
+        print(f"{Fore.YELLOW}[INFO] Removed IFFT blocks from {script_file_name}.")
 
-        with open(source_file_path, "w") as source_file:
-            source_file.writelines(lines)
 
-        print(f"{Fore.YELLOW}[INFO] Removed IFFT blocks from {script_file_name}.")
+    def remove_ifft_traces(self, file_names, jobs=1, dry_run=False):
+        """
+        Remove the IFFT annotations of many files at once, see `bulk_operations.disable_files`.
+        """
+        from block_manager.bulk_operations import disable_files
 
+        return disable_files(self, file_names, jobs=jobs, dry_run=dry_run)
 
-    def restore_ifft_blocks(self, file_name_prefix):
+    def restore_all_ifft_blocks(self, file_names, jobs=1, dry_run=False):
         """
-        Restore IFFT annotations and metadata from the JSON file to the original code.
-        Handles edge cases where blocks span the last line of the file.
+        Restore the IFFT annotations of many files at once, see `bulk_operations.restore_files`.
         """
+        from block_manager.bulk_operations import restore_files
 
-        file_prefix = file_name_prefix.split("/")[-1].split(".")[0]
-        print(f"{Fore.YELLOW}[INFO] Restoring IFFT blocks for file: {Style.RESET_ALL}", file_prefix)
+        return restore_files(self, file_names, jobs=jobs, dry_run=dry_run)
 
-        # Construct the path to the metadata file
-        metadata_path = os.path.join("block_metadata", f"{file_prefix}.json")
-        logging.info(f"Metadata path: {metadata_path}")
 
-        if not os.path.exists(metadata_path):
-            print(f"{Fore.RED}[ERROR] Metadata file for {file_prefix} not found.")
-            return
+    def restore_ifft_blocks(self, file_name):
+        """
+        Restore IFFT annotations and metadata from the metadata store to the original code.
+        The file is rebuilt in one pass over its lines and the sorted markers, then replaced atomically.
+        """
 
-        # Load metadata
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
+        filename = self.store.relative_path(file_name)
+        print(f"{Fore.YELLOW}[INFO] Restoring IFFT blocks for file: {Style.RESET_ALL}", filename)
+
+        metadata = self.store.file_blocks(filename)
+        if not metadata:
+            print(f"{Fore.RED}[ERROR] Metadata for {filename} not found.")
+            return
 
-        filename = f"{file_prefix}.py"
         # Read the target file
-        target_file_path = os.path.join(get_project_root(), filename)
+        target_file_path = self._source_path(filename)
         if not os.path.exists(target_file_path):
             print(f"{Fore.RED}[ERROR] Target file {filename} not found.{Style.RESET_ALL}")
             return
@@ -265,24 +311,6 @@ class BlockManager:
         with open(target_file_path, "r") as f:
             lines = f.readlines()
 
-        # Restore each block in reverse order
-        for block in sorted(metadata, key=lambda b: -b["block_start"]):
-            block_start = block["block_start"] - 1
-            block_end = block["block_end"] - 1
-
-            # Insert the opening marker if it does not already exist
-            if block_start < len(lines) and not lines[block_start].strip().startswith("#IFFT.If"):
-                lines.insert(block_start, f"#IFFT.If({block['associated_file_label']})\n")
-
-            # Insert the closing marker if it does not already exist
-            if block_end >= len(lines):  # Handle edge case for last line
-                lines.append(f"#IFFT.Then(\"{block['associated_file_name']}\", \"{block['associated_file_label']}\")\n")
-            elif not any(line.strip().startswith("#IFFT.Then") and block["associated_file_label"] in line for line in lines[block_end:]):
-                lines.insert(block_end + 1, f"#IFFT.Then(\"{block['associated_file_name']}\", \"{block['associated_file_label']}\")\n")
-
-        # Write back to the target file
-        with open(target_file_path, "w") as f:
-            f.writelines(lines)
+        write_lines_atomically(target_file_path, merge_ifft_markers(lines, block_markers(metadata)))
 
         print(f"{Fore.YELLOW}[INFO] Successfully restored IFFT blocks to {filename}")
-
@@ -0,0 +1,227 @@
+# block_manager/bulk_operations.py
+
+"""Bulk disable/restore
+
+Removes or restores the IFFT markers of a whole project at once. The new
+content of every file is computed first, over a process pool when there are
+enough files, and staged next to it in a temporary file. The staged files then
+replace the originals and the metadata of the disabled blocks is written in a
+single transaction; if anything fails along the way, every file already
+replaced is put back, so the project either changes as a whole or not at all.
+
+"""
+
+import logging
+import os
+import shutil
+
+from colorama import Fore, Style
+
+from block_manager.block_manager_class import block_markers, merge_ifft_markers, strip_ifft_markers
+
+PARALLEL_MIN_FILES = 64
+
+
+def _disable_job(path):
+    """Strip the markers of one file; the new lines are None when the file has no block."""
+    with open(path, "r") as f:
+        lines = f.readlines()
+    metadata, stripped = strip_ifft_markers(lines)
+    return path, metadata, stripped if metadata else None
+
+
+def _restore_job(job):
+    """Merge the stored markers back into one file; the new lines are None when nothing changes."""
+    path, metadata = job
+    with open(path, "r") as f:
+        lines = f.readlines()
+    restored = merge_ifft_markers(lines, block_markers(metadata))
+    return path, metadata, restored if restored != lines else None
+
+
+def _map_jobs(function, job_list, jobs):
+    """Yield `function(job)` for each job, in order, over a process pool when there are enough jobs."""
+    jobs = jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(job_list) < PARALLEL_MIN_FILES:
+        for job in job_list:
+            yield function(job)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        yield from executor.map(function, job_list, chunksize=max(1, len(job_list) // (jobs * 4)))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class Progress:
+    def __init__(self, total, description):
+        self.total = total
+        self.description = description
+        self.done = 0
+        self._step = max(1, total // 10)
+
+    def update(self):
+        """Count one more processed file, printing the progress every tenth of the total."""
+        self.done += 1
+        if self.done % self._step == 0 or self.done == self.total:
+            print(f"{Fore.YELLOW}[INFO] {self.description}: {self.done}/{self.total} files{Style.RESET_ALL}")
+
+
+class FileTransaction:
+    def __init__(self):
+        # (path, temporary file holding its new content)
+        self.staged = []
+        # (path, copy of its original content)
+        self._backups = []
+
+    def stage(self, path, lines):
+        """Write the new content of a file next to it, without touching the file yet."""
+        tmp_file = f"{path}.{os.getpid()}.ifft-tmp"
+        self.staged.append((path, tmp_file))
+        with open(tmp_file, "w") as f:
+            f.writelines(lines)
+        shutil.copymode(path, tmp_file)
+
+    def commit(self, on_commit=None):
+        """
+        Replace every staged file, then call `on_commit`; roll everything back if any step fails.
+
+        Args:
+            on_commit (callable): Called once all the files are replaced, e.g. to write the metadata.
+        """
+        try:
+            for path, tmp_file in self.staged:
+                backup = f"{path}.{os.getpid()}.ifft-bak"
+                try:
+                    os.link(path, backup)
+                except OSError:
+                    shutil.copy2(path, backup)
+                self._backups.append((path, backup))
+                os.replace(tmp_file, path)
+            if on_commit is not None:
+                on_commit()
+        except BaseException:
+            self.rollback()
+            raise
+
+        for _, backup in self._backups:
+            os.remove(backup)
+        self._backups = []
+        self.staged = []
+
+    def rollback(self):
+        """Put back the files already replaced and delete the staged ones."""
+        for path, backup in reversed(self._backups):
+            if os.path.exists(path) and os.path.samefile(path, backup):
+                # Not replaced yet, and renaming a hard link onto its twin does nothing
+                os.remove(backup)
+            else:
+                os.replace(backup, path)
+        for _, tmp_file in self.staged:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        self._backups = []
+        self.staged = []
+
+
+def _existing_paths(block_manager, file_names):
+    """Map the source path of each existing file to its key in the metadata store."""
+    paths = {}
+    for file_name in file_names:
+        path = block_manager._source_path(file_name)
+        if os.path.exists(path):
+            paths[path] = block_manager.store.relative_path(file_name)
+        else:
+            logging.error(f"Source file {file_name} not found.")
+    return paths
+
+
+def _apply(function, job_list, jobs, description, dry_run, on_commit=None):
+    """
+    Compute the new content of every file, then stage and commit it (unless `dry_run`).
+
+    Returns:
+        dict: The path and block metadata of each file that changes (or would change).
+    """
+    changes = {}
+    progress = Progress(len(job_list), description)
+    transaction = FileTransaction()
+    try:
+        for path, metadata, lines in _map_jobs(function, job_list, jobs):
+            progress.update()
+            if lines is None:
+                continue
+            changes[path] = metadata
+            if not dry_run:
+                transaction.stage(path, lines)
+        if not dry_run:
+            transaction.commit(on_commit=lambda: on_commit(changes) if on_commit else None)
+    except BaseException:
+        transaction.rollback()
+        raise
+    return changes
+
+
+def _print_summary(changes, paths, verb, dry_run):
+    """Print the number of blocks and files changed, and each file in a dry run."""
+    blocks = sum(len(metadata) for metadata in changes.values())
+    if dry_run:
+        for path, metadata in changes.items():
+            print(f"[DRY RUN] Would {verb} {len(metadata)} block(s) in {paths[path]}")
+        summary = f"Would {verb}"
+    else:
+        summary = f"{verb.capitalize()}d"
+    print(f"{Fore.GREEN}{summary} {blocks} block(s) in {len(changes)} of {len(paths)} file(s).{Style.RESET_ALL}")
+
+
+def disable_files(block_manager, file_names, jobs=1, dry_run=False):
+    """
+    Remove the IFFT markers of many files and store their metadata, all at once.
+
+    Files without blocks are left alone, and so is their stored metadata.
+
+    Example:
+        >>>disable_files(BlockManager(), list_python_files(), jobs=0, dry_run=True)
+
+    Args:
+        block_manager (BlockManager): The block manager owning the metadata store.
+        file_names (list): The files, absolute or relative to the project root.
+        jobs (int): The number of worker processes, `0` meaning one per CPU.
+        dry_run (bool): Only report what would change.
+
+    Returns:
+        dict: The key of each disabled file and the metadata of its blocks.
+    """
+    paths = _existing_paths(block_manager, file_names)
+
+    def store_metadata(changes):
+        block_manager.store.replace_blocks({paths[path]: metadata for path, metadata in changes.items()})
+
+    changes = _apply(_disable_job, list(paths), jobs, "Disabling IFFT blocks", dry_run, on_commit=store_metadata)
+    _print_summary(changes, paths, "remove", dry_run)
+    return {paths[path]: metadata for path, metadata in changes.items()}
+
+
+def restore_files(block_manager, file_names, jobs=1, dry_run=False):
+    """
+    Restore the stored IFFT markers of many files, all at once.
+
+    Args:
+        block_manager (BlockManager): The block manager owning the metadata store.
+        file_names (list): The files, absolute or relative to the project root.
+        jobs (int): The number of worker processes, `0` meaning one per CPU.
+        dry_run (bool): Only report what would change.
+
+    Returns:
+        dict: The key of each restored file and the metadata of its blocks.
+    """
+    paths = _existing_paths(block_manager, file_names)
+    stored_files = set(block_manager.store.files())
+    job_list = [(path, block_manager.store.file_blocks(key)) for path, key in paths.items() if key in stored_files]
+
+    changes = _apply(_restore_job, job_list, jobs, "Restoring IFFT blocks", dry_run)
+    _print_summary(changes, paths, "restore", dry_run)
+    return {paths[path]: metadata for path, metadata in changes.items()}
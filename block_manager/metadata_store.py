@@ -0,0 +1,245 @@
+"""Block metadata store
+
+Keeps the metadata of every extracted IFFT block in a single SQLite database
+(`<storage_dir>/metadata.sqlite3`), keyed by the path of its file relative to
+the project root, so `a/utils.py` and `b/utils.py` no longer share an entry.
+The database is only opened when it is first needed, every write replaces the
+blocks of one or more files in a single transaction, and counts and listings
+are answered by queries instead of loading everything.
+
+For the git-free fingerprint check (`ifft_core.fingerprints`) each block also
+keeps a hash of its content, and the `files` table the size, modification time
+and hash of the files it was taken from (and of their associated files).
+
+The per-file JSON files written by earlier versions (`block_metadata/<name>.json`)
+are imported once, the first time the store is opened.
+
+"""
+
+import json
+import logging
+import os
+import sqlite3
+
+from colorama import Fore, Style
+
+METADATA_DB_NAME = "metadata.sqlite3"
+SCHEMA_VERSION = 3
+
+# `if_line` and `then_line` keep the exact text of the markers (indentation included) so they can be restored as written
+BLOCK_FIELDS = ("block_start", "block_end", "block_content", "associated_file_name", "associated_file_label", "label",
+                "if_line", "then_line", "fingerprint")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    file TEXT NOT NULL,
+    block_start INTEGER NOT NULL,
+    block_end INTEGER NOT NULL,
+    block_content TEXT NOT NULL DEFAULT '',
+    associated_file_name TEXT NOT NULL DEFAULT '',
+    associated_file_label TEXT NOT NULL DEFAULT '',
+    label TEXT NOT NULL DEFAULT '',
+    if_line TEXT NOT NULL DEFAULT '',
+    then_line TEXT NOT NULL DEFAULT '',
+    fingerprint TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (file, block_start)
+);
+CREATE INDEX IF NOT EXISTS blocks_by_label ON blocks (associated_file_label);
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class MetadataStore:
+    def __init__(self, storage_dir="block_metadata", project_root=None):
+        self.storage_dir = storage_dir
+        self.db_path = os.path.join(storage_dir, METADATA_DB_NAME)
+        self.project_root = os.path.abspath(project_root) if project_root else None
+        self._connection = None
+        # The project files by base name, only listed if a legacy import needs them
+        self._files_by_name = None
+
+    @property
+    def connection(self):
+        """The database connection, opened (and the legacy JSON imported) on first use."""
+        if self._connection is None:
+            os.makedirs(self.storage_dir, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path)
+            self._connection.row_factory = sqlite3.Row
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+                self._migrate()
+            self._import_legacy_json()
+        return self._connection
+
+    def _migrate(self):
+        """Bring a database written by an earlier version up to SCHEMA_VERSION."""
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(blocks)")}
+        # Version 1 did not keep the marker lines, version 2 the fingerprints
+        for column in ("if_line", "then_line", "fingerprint"):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE blocks ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                 (str(SCHEMA_VERSION),))
+
+    def relative_path(self, file_name):
+        """Return the key of a file: its path relative to the project root."""
+        if self.project_root and os.path.isabs(file_name):
+            file_name = os.path.relpath(file_name, self.project_root)
+        return os.path.normpath(file_name).replace(os.sep, "/")
+
+    def replace_blocks(self, blocks_by_file):
+        """
+        Replace the blocks of several files in one transaction.
+
+        Args:
+            blocks_by_file (dict): A dictionary mapping each file (absolute or relative to the
+                project root) to its list of block metadata dictionaries (see BLOCK_FIELDS).
+        """
+        rows = []
+        files = []
+        for file_name, blocks in blocks_by_file.items():
+            file_key = self.relative_path(file_name)
+            files.append((file_key,))
+            for block in blocks:
+                rows.append((file_key, block["block_start"], block["block_end"])
+                            + tuple(block.get(field) or "" for field in BLOCK_FIELDS[2:]))
+
+        with self.connection:
+            self.connection.executemany("DELETE FROM blocks WHERE file = ?", files)
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO blocks (file, {', '.join(BLOCK_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(BLOCK_FIELDS) + 1))})", rows)
+
+    def replace_file_blocks(self, file_name, blocks):
+        """Replace the blocks of one file (see `replace_blocks`)."""
+        self.replace_blocks({file_name: blocks})
+
+    def file_blocks(self, file_name):
+        """
+        Return the blocks stored for a file.
+
+        Args:
+            file_name (str): The file, absolute or relative to the project root.
+
+        Returns:
+            list[dict]: The block metadata, ordered by line.
+        """
+        rows = self.connection.execute(
+            f"SELECT {', '.join(BLOCK_FIELDS)} FROM blocks WHERE file = ? ORDER BY block_start",
+            (self.relative_path(file_name),))
+        return [dict(row) for row in rows]
+
+    def has_file(self, file_name):
+        """Whether blocks are stored for a file."""
+        row = self.connection.execute("SELECT 1 FROM blocks WHERE file = ? LIMIT 1", (self.relative_path(file_name),))
+        return row.fetchone() is not None
+
+    def files(self):
+        """Return the files with stored blocks, relative to the project root."""
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT file FROM blocks ORDER BY file")]
+
+    def count_blocks(self):
+        """Return the total number of stored blocks."""
+        return self.connection.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+
+    def count_blocks_by_file(self):
+        """Return a dictionary mapping each file to its number of stored blocks."""
+        rows = self.connection.execute("SELECT file, COUNT(*) FROM blocks GROUP BY file ORDER BY file")
+        return {file_name: count for file_name, count in rows}
+
+    def replace_file_stats(self, stats_by_file):
+        """
+        Record the state of several files in one transaction.
+
+        Args:
+            stats_by_file (dict): A dictionary mapping each file (absolute or relative to the
+                project root) to its `(mtime_ns, size, digest)`.
+        """
+        rows = [(self.relative_path(file_name),) + tuple(stats) for file_name, stats in stats_by_file.items()]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO files (file, mtime_ns, size, digest) "
+                                        "VALUES (?, ?, ?, ?)", rows)
+
+    def file_stats(self):
+        """Return a dictionary mapping each recorded file to its `(mtime_ns, size, digest)`."""
+        rows = self.connection.execute("SELECT file, mtime_ns, size, digest FROM files")
+        return {file_name: (mtime_ns, size, digest) for file_name, mtime_ns, size, digest in rows}
+
+    def remove_file(self, file_name):
+        """Forget the blocks of a file, and its recorded state."""
+        file_key = self.relative_path(file_name)
+        with self.connection:
+            self.connection.execute("DELETE FROM blocks WHERE file = ?", (file_key,))
+            self.connection.execute("DELETE FROM files WHERE file = ?", (file_key,))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _project_files_by_name(self):
+        """Map the base name of every project file to its paths, walking the project once per store."""
+        if self._files_by_name is None:
+            from helpers.helpers import iter_project_files
+
+            self._files_by_name = {}
+            for path in iter_project_files(self.project_root):
+                self._files_by_name.setdefault(os.path.basename(path), []).append(path)
+        return self._files_by_name
+
+    def _legacy_file_key(self, prefix):
+        """
+        Guess the file a legacy `<prefix>.json` belonged to. Legacy files were keyed by base name
+        only, so the file is looked up in the project and taken at the root when it is ambiguous.
+        """
+        file_name = f"{prefix}.py"
+        if not self.project_root or os.path.isfile(os.path.join(self.project_root, file_name)):
+            return file_name
+
+        matches = self._project_files_by_name().get(file_name, [])
+        if len(matches) == 1:
+            return self.relative_path(matches[0])
+        if matches:
+            logging.warning(f"{Fore.YELLOW}Legacy metadata {prefix}.json matches {len(matches)} files, "
+                            f"importing it as {file_name}.{Style.RESET_ALL}")
+        return file_name
+
+    def _import_legacy_json(self):
+        """Import the `<storage_dir>/*.json` files of earlier versions, once."""
+        connection = self._connection
+        if connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone():
+            return
+
+        blocks_by_file = {}
+        json_files = sorted(f for f in os.listdir(self.storage_dir) if f.endswith(".json"))
+        for json_file in json_files:
+            path = os.path.join(self.storage_dir, json_file)
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"{Fore.RED}[ERROR] Could not import legacy metadata {path}: {e}{Style.RESET_ALL}")
+                continue
+
+            if isinstance(data, dict):
+                # {"<file path>": [blocks]} exports
+                for file_name, blocks in data.items():
+                    blocks_by_file.setdefault(self.relative_path(file_name), []).extend(blocks)
+            else:
+                blocks_by_file.setdefault(self._legacy_file_key(json_file[:-len(".json")]), []).extend(data)
+
+        if blocks_by_file:
+            self.replace_blocks(blocks_by_file)
+            logging.info(f"{Fore.YELLOW}Imported the metadata of {len(blocks_by_file)} file(s) from "
+                         f"{len(json_files)} legacy JSON file(s).{Style.RESET_ALL}")
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_imported', '1')")
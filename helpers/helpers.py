@@ -12,3 +12,187 @@ def resolve_path(relative_path):
     """Resolve a relative path to the project root."""
     project_root = get_project_root()
     return os.path.join(project_root, relative_path)
+
+def write_lines_atomically(path, lines):
+    """
+    Write the lines of a file through a temporary file renamed over it, so the file is never left half written.
+
+    Args:
+        path (str): The file to write; its permissions are kept.
+        lines (Iterable[str]): The lines, with their line endings.
+    """
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "w") as f:
+            f.writelines(lines)
+        if os.path.exists(path):
+            import shutil
+
+            shutil.copymode(path, tmp_file)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+def _exclusion_patterns(project_root, excluded_folders):
+    """Turn the `excluded_folders` of the configuration into gitignore-style patterns."""
+    patterns = []
+    for folder in excluded_folders or []:
+        if os.path.isabs(folder):
+            # Absolute folders are anchored to the project root
+            relative = os.path.relpath(os.path.normpath(folder), os.path.normpath(project_root))
+            if relative.startswith(".."):
+                continue
+            patterns.append("/" + relative.replace(os.sep, "/").rstrip("/") + "/")
+        else:
+            patterns.append(folder)
+    return patterns
+
+def _read_ignore_lines(path):
+    """Read the patterns of a gitignore-style file, none if it does not exist."""
+    try:
+        with open(path, "r", errors="replace") as ignore_file:
+            return ignore_file.read().splitlines()
+    except OSError:
+        return []
+
+def load_exclusion_spec(project_root, excluded_folders=None):
+    """
+    Build the exclusion rules of a project root: its `.gitignore`, `.git/info/exclude` and the excluded folders.
+
+    The `.gitignore` files of subdirectories are loaded by `iter_project_files` as it walks into them.
+
+    Args:
+        project_root (str): Root path of the project.
+        excluded_folders (list): Folder names, paths or gitignore-style patterns to exclude.
+
+    Returns:
+        pathspec.GitIgnoreSpec: The rules, matched against paths relative to the project root.
+    """
+    import pathspec
+
+    lines = [".git/"]
+    lines.extend(_read_ignore_lines(os.path.join(project_root, ".git", "info", "exclude")))
+    lines.extend(_read_ignore_lines(os.path.join(project_root, ".gitignore")))
+    lines.extend(_exclusion_patterns(project_root, excluded_folders))
+    return pathspec.GitIgnoreSpec.from_lines(lines)
+
+def _is_ignored(relative_path, spec, nested_specs):
+    """
+    Match a path against the root rules, then against the `.gitignore` of each directory above it.
+
+    Like git, the deepest `.gitignore` with a matching pattern decides, so it can re-include (`!name`)
+    what an upper one ignores.
+    """
+    if not nested_specs:
+        return spec.match_file(relative_path)
+    ignored = spec.check_file(relative_path).include
+    for base_dir, nested_spec in nested_specs:
+        include = nested_spec.check_file(relative_path[len(base_dir):]).include
+        if include is not None:
+            ignored = include
+    return bool(ignored)
+
+def _git_project_files(project_root):
+    """List the tracked and untracked, non-ignored files of a repository, or None outside git."""
+    import subprocess
+
+    try:
+        output = subprocess.run(["git", "-c", "core.quotepath=off", "ls-files", "-z", "--cached", "--others",
+                                 "--exclude-standard"], cwd=project_root, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [path for path in output.decode("utf-8", "replace").split("\0") if path]
+
+def iter_project_files(project_root, excluded_folders=None, suffix=".py", use_git=False):
+    """
+    Enumerate the files of a project, skipping ignored and excluded directories without entering them.
+
+    Example:
+        >>>list(iter_project_files("mock_project", excluded_folders=["tests"]))
+        ['mock_project/app.py', 'mock_project/file1.py']
+
+    Args:
+        project_root (str): Root path of the project.
+        excluded_folders (list): Folder names, paths or gitignore-style patterns to exclude,
+            on top of the `.gitignore` files of the project and its `.git/info/exclude`.
+        suffix (str): Only yield the files ending with it (all files when empty).
+        use_git (bool): Ask `git ls-files` for the file list when the project is a repository,
+            falling back to a walk otherwise.
+
+    Yields:
+        str: The path of each file, joined to `project_root`.
+    """
+    spec = load_exclusion_spec(project_root, excluded_folders)
+
+    relative_paths = _git_project_files(project_root) if use_git else None
+    if relative_paths is not None:
+        for relative_path in relative_paths:
+            if relative_path.endswith(suffix) and not spec.match_file(relative_path):
+                yield os.path.join(project_root, relative_path)
+        return
+
+    import pathspec
+
+    # Each directory to walk, with the `.gitignore` files of the directories above it
+    stack = [("", ())]
+    while stack:
+        relative_dir, nested_specs = stack.pop()
+        try:
+            with os.scandir(os.path.join(project_root, relative_dir)) as scanned:
+                entries = list(scanned)
+        except OSError:
+            continue
+        if relative_dir and any(entry.name == ".gitignore" for entry in entries):
+            lines = _read_ignore_lines(os.path.join(project_root, relative_dir, ".gitignore"))
+            if lines:
+                nested_specs += ((relative_dir, pathspec.GitIgnoreSpec.from_lines(lines)),)
+
+        for entry in entries:
+            relative_path = f"{relative_dir}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                # Directory patterns only match with the trailing slash
+                if not _is_ignored(relative_path + "/", spec, nested_specs):
+                    stack.append((relative_path + "/", nested_specs))
+            elif entry.name.endswith(suffix) and not _is_ignored(relative_path, spec, nested_specs):
+                yield os.path.join(project_root, relative_path)
+
+def list_python_files(project_root=None, metadata_dir="block_metadata", excluded_folders=None, use_git=False):
+    """
+    List the Python files of the project, taking the files with block metadata when there are some.
+
+    Args:
+        project_root (str): The root directory of the project (default: the configured one).
+        metadata_dir (str): The directory where metadata files are stored.
+        excluded_folders (list): Folder names, paths or gitignore-style patterns to exclude.
+        use_git (bool): Use `git ls-files` instead of walking the project when it is a repository.
+
+    Returns:
+        list: A list of Python file paths.
+    """
+    if not project_root:
+        project_root = get_project_root()
+
+    # Option 1: Use metadata directory to find tracked files
+    python_files = []
+    metadata_path = os.path.join(project_root, metadata_dir)
+    if os.path.isfile(os.path.join(metadata_path, "metadata.sqlite3")):
+        from block_manager.metadata_store import MetadataStore
+
+        store = MetadataStore(metadata_path, project_root=project_root)
+        python_files = [os.path.join(project_root, file_name) for file_name in store.files()
+                        if os.path.isfile(os.path.join(project_root, file_name))]
+        store.close()
+    elif os.path.exists(metadata_path):
+        for metadata_file in os.listdir(metadata_path):
+            if metadata_file.endswith(".json"):
+                python_file = os.path.join(project_root, metadata_file.replace(".json", ".py"))
+                if os.path.isfile(python_file):
+                    python_files.append(python_file)
+
+    # Option 2: Enumerate the project, pruning ignored and excluded folders
+    if not python_files:
+        python_files = sorted(iter_project_files(project_root, excluded_folders=excluded_folders, use_git=use_git))
+
+    return python_files
@@ -3,11 +3,16 @@ import json
 import logging
 import os
 import time
-from colorama import Fore, Style
 from block_manager.block_manager_class import BlockManager
+from helpers.helpers import list_python_files
+from ifft_core.daemon_client import query_daemon
 from ifft_core.ifft_parser import scan_files
+from ifft_core.ifft_parser import iter_scan_files
+from ifft_core.ifft_parser import iter_scan_roots
 from ifft_core.ifft_parser import scan_file
 from ifft_core.ifft_parser import save_results_to_file 
+from ifft_core.ifft_parser import report_block_changes
+from ifft_core.ifft_parser import read_daemon_answer
 
 def load_config():
     """Load the IFFT configuration file."""
@@ -23,53 +28,18 @@ def get_project_root():
     project_root = config.get("project_root", "mock_project")
     return os.path.abspath(project_root)  # Ensure it's an absolute path
 
-def list_python_files(project_root=None, metadata_dir="block_metadata", excluded_folders=None):
-    """
-    List all Python files in the project root, using metadata as a fallback.
-
-    Args:
-        project_root (str): The root directory of the project.
-        metadata_dir (str): The directory where metadata files are stored.
-        excluded_folders (list): List of folder names or paths to exclude.
-
-    Returns:
-        list: A list of Python file paths.
-    """
-    # Fallback to dynamically retrieve project root if not provided
-    if not project_root:
-        project_root = get_project_root()
-
-    python_files = []
-    excluded_folders = excluded_folders or []
-
-    print(f"Project root: {project_root}")
-    print(f"Metadata_Dir: {metadata_dir}")
-    # Option 1: Use metadata directory to find tracked files
-    metadata_path = os.path.join(project_root, metadata_dir)
-    if os.path.exists(metadata_path):
-        for metadata_file in os.listdir(metadata_path):
-            if metadata_file.endswith(".json"):
-                python_file = os.path.join(project_root, metadata_file.replace(".json", ".py"))
-                if os.path.isfile(python_file):
-                    python_files.append(python_file)
-
-    # Option 2: Fallback to scanning the project root if no metadata files are found
-    if not python_files:
-        for root, dirs, files in os.walk(project_root):
-            # Exclude specified folders
-            if any(excluded in root for excluded in excluded_folders):
-                continue
-
-            for file in files:
-                if file.endswith(".py"):
-                    python_files.append(os.path.join(root, file))
-
-    return python_files
-
+def get_project_roots(config=None):
+    """Retrieve the project roots from the configuration: `project_roots` if set, else `project_root` alone."""
+    config = load_config() if config is None else config
+    project_roots = config.get("project_roots")
+    if project_roots:
+        return [os.path.abspath(project_root) for project_root in project_roots]
+    return [get_project_root()]
 
 def validate_excluded_folders(project_root, excluded_folders):
     """
-    Validate that excluded folders exist within the project root.
+    Validate that excluded folders exist within the project root (gitignore-style
+    patterns such as `build*/` are kept as they are).
 
     Args:
         project_root (str): The root directory of the project.
@@ -81,7 +51,7 @@ def validate_excluded_folders(project_root, excluded_folders):
     valid_folders = []
     for folder in excluded_folders:
         folder_path = os.path.join(project_root, folder)
-        if os.path.isdir(folder_path):
+        if any(char in folder for char in "*?[") or os.path.isdir(folder_path):
             valid_folders.append(folder)
         else:
             logging.warning(f"Excluded folder '{folder}' does not exist.")
@@ -89,20 +59,82 @@ def validate_excluded_folders(project_root, excluded_folders):
 
 
 
-def main(auto_mode=False):
+def collect_results(scan, results):
+    """Pass the `(file, blocks)` pairs of a scan through, recording them in `results`."""
+    for file, blocks in scan:
+        results[file] = blocks
+        yield file, blocks
+
+
+def save_web_results(project_root, results):
+    """Save the scan results to be consumed by the UI API's, in the `IFFT_WEB` folder next to the project root."""
+    if not results:
+        logging.debug("No results found from scan_files.")
+        return
+    logging.debug(f"Results found: {results}")
+    path = os.path.join(project_root, "..", "IFFT_WEB/data/", "ifft_results.json")
+    save_results_to_file(results, output_file=path)
+
+
+def namespace_results(scan, project_roots):
+    """
+    Prefix the file names of a multi-root scan with their root, relative to the folder holding all the roots.
+
+    Args:
+        scan (Iterable[tuple]): The `(project_root, file, blocks)` triples of `iter_scan_roots`.
+        project_roots (list): The scanned project roots.
+
+    Yields:
+        tuple: The namespaced file name (e.g. `billing/api.py`) and its blocks.
+    """
+    parent = os.path.commonpath(project_roots)
+    for project_root, file, blocks in scan:
+        namespace = os.path.relpath(project_root, parent) if project_root != parent else os.path.basename(project_root)
+        yield os.path.join(namespace, file), blocks
+
+
+def check_roots(project_roots, auto_mode=False, jobs=1, commit_range=None, per_commit=False):
+    """
+    Check several project roots in one run and report them together.
+
+    Returns:
+        int: The exit code of the check, the worst one of all the roots with `--range`.
+    """
+    logging.debug(f"Project roots: {project_roots}")
+    if commit_range:
+        from ifft_core.commit_range import check_range
+        return max(check_range(project_root, commit_range, per_commit=per_commit) for project_root in project_roots)
+
+    # One diff per root, then one shared worker pool for the files of every root; the web
+    # interface gets the results of every root, saved next to the first one
+    results = {}
+    scan = iter_scan_roots(project_roots, auto_mode=auto_mode, jobs=jobs)
+    try:
+        exit_code = report_block_changes(collect_results(namespace_results(scan, project_roots), results),
+                                         auto_mode=auto_mode)
+    finally:
+        scan.close()
+    save_web_results(project_roots[0], results)
+    return exit_code
+
+
+def main(auto_mode=False, jobs=1, use_daemon=True, dry_run=False, commit_range=None, per_commit=False,
+         project_roots=None, fingerprint_mode=False):
     # Parsing the configuration file
     config = load_config()
     logging.debug(f"Configurations loaded: {config}")
 
     # Tool opt-in configs
     debug_mode = config.get('debug_mode', False)
-    auto_mode = config.get('auto_mode', False)
+    auto_mode = auto_mode or config.get('auto_mode', False)
     show_active_blocks = config.get('show_active_blocks', False)
     extract_ifft_content = config.get('extract_ifft_blocks_content', False)
     ifft_disabled = config.get('disable_ifft', False)
     restore_ifft = config.get('re_enable_ifft', False)
     excluded_folders = config.get('excluded_folders', [])
     excluded_folders = validate_excluded_folders(config.get('project_root'), excluded_folders)
+    list_files_with_git = config.get('list_files_with_git', False)
+    fingerprint_mode = fingerprint_mode or config.get('fingerprint_mode', False)
 
 
 
@@ -110,25 +142,53 @@ def main(auto_mode=False):
         logging.getLogger().setLevel(logging.DEBUG)
         logging.debug("Debug mode enabled.")
     
-    project_root = get_project_root()
+    project_roots = project_roots or get_project_roots(config)
+    if len(project_roots) > 1:
+        if show_active_blocks or extract_ifft_content or ifft_disabled or restore_ifft:
+            logging.warning("Block metadata options work on one project root at a time, they are ignored "
+                            "when several roots are checked.")
+        return check_roots(project_roots, auto_mode=auto_mode, jobs=jobs, commit_range=commit_range,
+                           per_commit=per_commit)
+
+    project_root = project_roots[0]
     logging.debug(f"Project root: {project_root}")
 
-
-    results = scan_files(auto_mode=auto_mode, project_path=project_root)
-    if not results:
-        logging.debug("No results found from scan_files.")
+    # CI: check every commit a push brings instead of the local changes
+    if commit_range:
+        from ifft_core.commit_range import check_range
+        return check_range(project_root, commit_range, per_commit=per_commit)
+
+    # Without git: compare the blocks with the fingerprints recorded when they were extracted
+    if fingerprint_mode and not extract_ifft_content:
+        from ifft_core.fingerprints import scan_fingerprints
+        results = scan_fingerprints(project_root, BlockManager(project_root=project_root).store)
+        save_web_results(project_root, results)
+        return report_block_changes(results, auto_mode=auto_mode)
+
+    # A running `ifft.py serve` daemon already has every block parsed in memory
+    answer = query_daemon(project_root, {"command": "check", "auto_mode": auto_mode}) if use_daemon else None
+    if answer is not None:
+        logging.debug("Results served by the IFFT daemon.")
+        results = read_daemon_answer(project_root, answer)
+    elif auto_mode:
+        # Fail fast: the files after the first violation are not scanned at all
+        results = {}
+        scan = iter_scan_files(auto_mode=True, project_path=project_root, jobs=jobs)
+        try:
+            exit_code = report_block_changes(collect_results(scan, results), auto_mode=True)
+        finally:
+            scan.close()
+        save_web_results(project_root, results)
+        return exit_code
     else:
-        logging.debug(f"Results found: {results}")
-        # Save results to be consumed by UI API's
-        path = os.path.join(project_root, "..", "IFFT_WEB/data/", "ifft_results.json")
-        save_results_to_file(results, output_file=path)
-        
+        results = scan_files(auto_mode=auto_mode, project_path=project_root, jobs=jobs)
+    save_web_results(project_root, results)
 
 
     # All options besides debug_mode will be disabled in auto_mode version
     if not auto_mode:
         # Create a block manager object to manage the blocks
-        block_manager = BlockManager(show_active_blocks=show_active_blocks)
+        block_manager = BlockManager(show_active_blocks=show_active_blocks, project_root=project_root)
 
 
         # ---------------------------------------------------
@@ -146,9 +206,9 @@ def main(auto_mode=False):
             print("Extracting IFFT block content...")
             time.sleep(1)
             logging.debug("Extracting IFFT block content...")
-            python_files = list_python_files(project_root, excluded_folders=excluded_folders)
+            python_files = list_python_files(project_root, excluded_folders=excluded_folders, use_git=list_files_with_git)
             for file_name in python_files:
-                blocks = scan_file(project_root, file_name, set())
+                blocks = scan_file(project_root, file_name, [])
                 print(f"[INFO] blocks: {blocks}")
                 if blocks:
                     block_manager.extract_blocks(file_name, blocks)
@@ -159,11 +219,9 @@ def main(auto_mode=False):
         if ifft_disabled:
             print("[ Disable IFFT Mode ]")
             print("Cleaning up IFFT blocks trace...")
-            time.sleep(1)
+            python_files = list_python_files(project_root, excluded_folders=excluded_folders, use_git=list_files_with_git)
+            block_manager.remove_ifft_traces(python_files, jobs=jobs, dry_run=dry_run)
             logging.debug("All blocks removed with success.")
-            python_files = list_python_files(project_root, excluded_folders=excluded_folders)
-            for file_name in python_files:
-                block_manager.remove_ifft_trace(file_name)
             return 0
 
         # ---------------------------------------------------
@@ -171,41 +229,73 @@ def main(auto_mode=False):
         if restore_ifft:
             print("[ Restore IFFT Mode ]")
             print("Restoring IFFT blocks...")
-            time.sleep(1)
             logging.debug("Restoring IFFT blocks...")
-            python_files = list_python_files(project_root, excluded_folders=excluded_folders)
-            for file_name in python_files:
-                print(f"[INFO] Restoring blocks for {file_name}")
-                block_manager.restore_ifft_blocks(file_name)
+            python_files = list_python_files(project_root, excluded_folders=excluded_folders, use_git=list_files_with_git)
+            block_manager.restore_all_ifft_blocks(python_files, jobs=jobs, dry_run=dry_run)
             logging.debug("All blocks restored successfully.")
             return 0
 
 
 
     
-    changes_detected = False
-    for file, blocks in results.items():
-        for block in blocks:
-            if block.modified_lines != []:
-                print(f"{Fore.BLUE}Change identified inside an IFFT block in {file}:\n {Style.RESET_ALL}")
-                print("\n")
-                print(f"Modified lines within the block: {block.modified_lines}")
-                print(f"Should also modify: {block.associated_file_name}\nBlock label: {block.associated_file_label} \n")
-                changes_detected = True
-                if auto_mode:
-                    return 1
-
-    if changes_detected:
-        return 1
-
-    print("No changes detected in IFFT blocks")
-    return 0
+    return report_block_changes(results, auto_mode=auto_mode)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run IFFT tool.")
+    parser.add_argument("command", nargs="?", choices=["check", "serve", "audit"], default="check",
+                        help="'check' the current changes (default), 'serve' them from a resident daemon or "
+                             "'audit' every block of the project")
     parser.add_argument("--auto", action="store_true", help="Run in automatic mode")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Number of worker processes used to scan, disable or restore files (0 = one per CPU)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="With disable_ifft or re_enable_ifft, only report the files that would change")
+    parser.add_argument("--no-daemon", action="store_true", help="Do not query a running IFFT daemon")
+    parser.add_argument("--root", dest="project_roots", action="append", metavar="PATH",
+                        help="Project root to check instead of the configured ones; repeat it to check several "
+                             "projects in one run")
+    parser.add_argument("--range", dest="commit_range", metavar="BASE..HEAD",
+                        help="Check the blocks changed by a range of commits instead of the local changes (for CI)")
+    parser.add_argument("--per-commit", action="store_true",
+                        help="With --range, require each commit to change the associated files of its own blocks")
+    parser.add_argument("--fingerprints", action="store_true",
+                        help="Check the blocks against the fingerprints stored when they were extracted, without git")
+    parser.add_argument("--output", metavar="FILE",
+                        help="With audit, also write the report (a list of reports for several roots) as JSON")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the time, calls and bytes of each phase of the run")
+    parser.add_argument("--profile-output", metavar="FILE", help="Also write the profile metrics as JSON (implies --profile)")
     args = parser.parse_args()
+
+    if args.command == "serve":
+        from ifft_core.daemon import serve
+        serve(get_project_root())
+        exit(0)
+
+    if args.command == "audit":
+        from ifft_core.audit import run_audit
+        config = load_config()
+        # Like `check`, every root given with --root (or configured) is audited
+        project_roots = [os.path.abspath(root) for root in args.project_roots or []] or get_project_roots(config)
+        excluded_folders = sorted({folder for project_root in project_roots
+                                   for folder in validate_excluded_folders(project_root, config.get('excluded_folders', []))})
+        exit(run_audit(project_roots, jobs=args.jobs, output_file=args.output, excluded_folders=excluded_folders))
     
-    exit(main(auto_mode=args.auto))
+    profiler = None
+    if args.profile or args.profile_output:
+        from ifft_core import profiling
+        profiler = profiling.enable([globals()])
+
+    exit_code = main(auto_mode=args.auto, jobs=args.jobs, use_daemon=not args.no_daemon, dry_run=args.dry_run,
+                     commit_range=args.commit_range, per_commit=args.per_commit,
+                     project_roots=[os.path.abspath(root) for root in args.project_roots or []],
+                     fingerprint_mode=args.fingerprints)
+
+    if profiler is not None:
+        profiler.print_table()
+        if args.profile_output:
+            profiler.save(args.profile_output)
+
+    exit(exit_code)
 
@@ -5,17 +5,87 @@
 
 '''
 
+# Block status values
+#  - unchanged: no line inside the block was modified
+#  - modified: the block was modified but its IFFT.Then target was not
+#  - satisfied: the block was modified and so was its IFFT.Then target
+STATUS_UNCHANGED = "unchanged"
+STATUS_MODIFIED = "modified"
+STATUS_SATISFIED = "satisfied"
+
 class IFFTBlock:
-    def __init__(self, file_path, block_content, associated_file_name, associated_file_label, block_start, block_end, modified_lines):
+    # Blocks are created for every annotated region of every scanned file, so they
+    # only keep offsets into the file and read their content when it is requested.
+    __slots__ = ("file_path", "associated_file_name", "associated_file_label", "block_start", "block_end",
+                 "modified_lines", "status", "label", "start_offset", "end_offset", "_block_content", "_source")
+
+    def __init__(self, file_path, block_content, associated_file_name, associated_file_label, block_start, block_end,
+                 modified_lines, status=None, label="", start_offset=None, end_offset=None, source=None):
         self.file_path = file_path
-        self.block_content = block_content
+        self._block_content = block_content
         self.associated_file_name = associated_file_name
         self.associated_file_label = associated_file_label
         self.block_start = block_start
         self.block_end = block_end
+        # Lines added ("+ text"), changed ("~ text") and removed ("- N line(s) removed") inside the block
         self.modified_lines = modified_lines
+        self.status = status or (STATUS_MODIFIED if modified_lines else STATUS_UNCHANGED)
+        self.label = label
+        # Byte range of the block (from its #IFFT.If line up to its #IFFT.Then line)
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        # Optional in-memory copy of the file content the offsets refer to
+        self._source = source
 
-    def __repr__(self):
-        return (f"IFFTBlock(file_path={self.file_path}, block_start={self.block_start}, block_end={self.block_end}, "
-                f"associated_file_name={self.associated_file_name}, associated_file_label={self.associated_file_label})")
+    @property
+    def block_content(self):
+        """The text of the block, read from the file the first time it is requested."""
+        if self._block_content is None and self.start_offset is not None:
+            if self._source is not None:
+                data = self._source[self.start_offset:self.end_offset]
+            else:
+                with open(self.file_path, "rb") as f:
+                    f.seek(self.start_offset)
+                    data = f.read(self.end_offset - self.start_offset)
+            self._block_content = data.decode("utf-8", "replace").replace("\r\n", "\n")
+            self._source = None
+        return self._block_content
+
+    @block_content.setter
+    def block_content(self, block_content):
+        self._block_content = block_content
+
+    def to_dict(self, include_content=True):
+        """Return the block as a JSON serializable dictionary."""
+        return {
+            "file_path": self.file_path,
+            "block_content": self.block_content if include_content else None,
+            "associated_file_name": self.associated_file_name,
+            "associated_file_label": self.associated_file_label,
+            "block_start": self.block_start,
+            "block_end": self.block_end,
+            "modified_lines": self.modified_lines,
+            "status": self.status,
+            "label": self.label,
+            "start_offset": self.start_offset,
+            "end_offset": self.end_offset
+        }
 
+    @classmethod
+    def from_dict(cls, data):
+        """Build a block back from the output of `to_dict`."""
+        return cls(**data)
+
+    def __getstate__(self):
+        # The source buffer may be a memory map, which cannot be pickled
+        if self._source is not None:
+            self.block_content
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return (f"IFFTBlock(file_path={self.file_path}, label={self.label}, block_start={self.block_start}, block_end={self.block_end}, "
+                f"associated_file_name={self.associated_file_name}, associated_file_label={self.associated_file_label}, status={self.status})")
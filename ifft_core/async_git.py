@@ -0,0 +1,262 @@
+# ifft_core/async_git.py
+
+"""Asynchronous git access
+
+An asyncio counterpart of the git calls of the scanner, for callers running an
+event loop (a daemon, a web app) that must not block while git works. Every
+git command is an asyncio subprocess and at most `max_concurrency` of them run
+at once. Independent queries run side by side: the diff, the list of files
+with unstaged edits and the opening of the repository overlap instead of
+waiting for one another.
+
+Staged blobs are read through `git cat-file --batch` with the requests
+pipelined: every name is written while the responses are being read, instead
+of one request and one response at a time. Large sets of blobs are split over
+several batch processes so git inflates them in parallel.
+
+Parsing the blocks is CPU work and runs in a worker thread, over the content
+prefetched here.
+
+"""
+
+import asyncio
+
+from ifft_core.ifft_parser import _open_repo, _RootScan, get_project_root, parse_diff_lines, scan_file
+from ifft_core.tracked_paths import forget_tracked_paths
+
+MAX_CONCURRENCY = 8
+
+# Below this many blobs per batch process, starting one more costs more than it saves
+MIN_BLOBS_PER_BATCH = 64
+
+# The only diff lines `parse_diff_lines` needs
+DIFF_HEADER_PREFIXES = (b'diff --git ', b'+++ ', b'@@')
+
+
+class AsyncGit:
+    def __init__(self, project_path, max_concurrency=MAX_CONCURRENCY):
+        self.project_path = project_path
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _start(self, args, stdin=None):
+        """Start a git command, its output piped."""
+        return await asyncio.create_subprocess_exec('git', '-c', 'core.quotepath=off', *args, cwd=self.project_path,
+                                                    stdin=stdin, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.DEVNULL)
+
+    async def iter_lines(self, args):
+        """
+            Yield the lines of a git command's output while it runs.
+
+            Args:
+                args (list): The git arguments, e.g. `['diff', '--cached']`.
+
+            Yields:
+                bytes: Each line, without its line break.
+
+            Raises:
+                RuntimeError: If git exits with an error.
+        """
+        async with self._semaphore:
+            process = await self._start(args)
+            completed = False
+            try:
+                pending = b""
+                while True:
+                    chunk = await process.stdout.read(1 << 16)
+                    if not chunk:
+                        break
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    for line in lines:
+                        yield line
+                if pending:
+                    yield pending
+                completed = True
+            finally:
+                if not completed and process.returncode is None:
+                    # The consumer stopped early
+                    process.terminate()
+                await process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"git {' '.join(args)} failed with exit code {process.returncode}")
+
+    async def modified_lines_by_file(self, auto_mode, paths=None):
+        """
+            The asynchronous version of `get_modified_lines_by_file`: the hunks of every changed file.
+
+            Example:
+                >>>await AsyncGit(project_path).modified_lines_by_file(auto_mode=True)\n
+                {'app.py': [(6, 0, 7, 1)], 'file1.py': [(2, 1, 2, 1)]}
+
+            Args:
+                auto_mode (bool): Whether to diff the index (auto mode) or the working tree.
+                paths (list): Optional list of paths to restrict the diff to.
+
+            Returns:
+                dict: A dictionary mapping each changed file to its hunks (see `parse_diff_lines`).
+        """
+        args = ['diff', '--no-color', '--no-ext-diff', '--no-prefix', '--no-renames', '-U0', '--diff-filter=ACM']
+        if auto_mode:
+            args.append('--cached')
+        if paths:
+            args.append('--')
+            args.extend(paths)
+
+        # Only the header lines are decoded, the content of the change is dropped as it streams by
+        header_lines = [line.decode('utf-8', 'replace') async for line in self.iter_lines(args)
+                        if line.startswith(DIFF_HEADER_PREFIXES)]
+        return parse_diff_lines(header_lines)
+
+    async def staged_names(self):
+        """The files added, copied or modified in the index, like `get_modified_files`."""
+        return [line.decode('utf-8', 'replace') async for line in self.iter_lines(['diff', '--cached', '--name-only',
+                                                                                  '--diff-filter=ACM']) if line]
+
+    async def unstaged_files(self):
+        """
+            List the files whose working-tree content differs from the index.
+
+            Returns:
+                set: The files, relative to the root of the repository, or None if git could not tell.
+        """
+        try:
+            output = b"\n".join([line async for line in self.iter_lines(['diff-files', '-z', '--name-only'])])
+        except (OSError, RuntimeError):
+            return None
+        return {path for path in output.decode('utf-8', 'replace').split('\0') if path}
+
+    async def _read_batch(self, names):
+        """Read objects through one `git cat-file --batch` process, writing every request up front."""
+        blobs = {}
+        async with self._semaphore:
+            process = await self._start(['cat-file', '--batch'], stdin=asyncio.subprocess.PIPE)
+
+            async def write_requests():
+                try:
+                    for name in names:
+                        process.stdin.write(name.encode("utf-8") + b"\n")
+                        await process.stdin.drain()
+                finally:
+                    process.stdin.close()
+
+            writer = asyncio.ensure_future(write_requests())
+            completed = False
+            try:
+                for name in names:
+                    line = await process.stdout.readline()
+                    if not line:
+                        # git is gone, the files left are read from the working tree
+                        break
+                    header = line.split()
+                    if len(header) != 3 or not header[2].isdigit():
+                        # `<name> missing` (the name may contain spaces)
+                        continue
+                    data = await process.stdout.readexactly(int(header[2]) + 1)
+                    blobs[name] = (header[0].decode("ascii"), data[:-1])
+                await writer
+                completed = True
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.cancel()
+                if not completed and process.returncode is None:
+                    process.terminate()
+                await process.wait()
+        return blobs
+
+    async def read_objects(self, names):
+        """
+            Read many objects at once, over up to `max_concurrency` batch processes.
+
+            Example:
+                >>>await AsyncGit(project_path).read_objects([":app.py", "HEAD:file1.py"])
+                {':app.py': ('5f1c...', b'import os\\n...'), 'HEAD:file1.py': ('9a0b...', b'...')}
+
+            Args:
+                names (list): Object names git understands, e.g. `:<path>` for a staged file.
+
+            Returns:
+                dict: The hash and content of each object that exists.
+        """
+        names = [name for name in names if "\n" not in name]
+        batches = max(1, min(self.max_concurrency, len(names) // MIN_BLOBS_PER_BATCH))
+        blobs = {}
+        for batch in await asyncio.gather(*(self._read_batch(names[index::batches]) for index in range(batches))):
+            blobs.update(batch)
+        return blobs
+
+
+class PrefetchedBlobs:
+    """The staged content of files read ahead of the scan, with the interface `scan_file` expects of a blob reader."""
+
+    def __init__(self, blobs):
+        self.blobs = blobs
+
+    def read_staged(self, filename):
+        return self.blobs.get(filename)
+
+    def close(self):
+        self.blobs = {}
+
+
+def _scan_root(project_path, repo, auto_mode, use_cache, hunks_by_file, blob_reader):
+    """Scan the modified files of a project from the prefetched git data (runs in a worker thread)."""
+    root = _RootScan(project_path, repo, auto_mode, use_cache, hunks_by_file=hunks_by_file, blob_reader=blob_reader)
+    completed = False
+    try:
+        for _, filename, hunks in root.scan_jobs:
+            root.record(filename, scan_file(project_path, filename, hunks, cache=root.cache,
+                                            blob_reader=root.blob_reader))
+        completed = True
+    finally:
+        root.finish(completed)
+    return root.results
+
+
+async def async_scan_files(project_path: str = None, auto_mode: bool = False, use_cache: bool = True,
+                           max_concurrency: int = MAX_CONCURRENCY) -> dict:
+    """
+        The asynchronous version of `scan_files`, which does not block the event loop.
+
+        Example:
+            >>>results = await async_scan_files(project_path, auto_mode=True)
+
+        Args:
+            project_path (str): A string corresponding to the project path, the configured
+                project root by default.
+            auto_mode (bool): Whether to scan the staged (auto mode) or the unstaged changes.
+            use_cache (bool): Whether to reuse the parsed blocks and the label index stored
+                in `.git/ifft-cache`.
+            max_concurrency (int): The maximum number of git processes running at once.
+
+        Returns:
+            dict: A dictionary of results, as returned by `scan_files`.
+    """
+    project_path = project_path or get_project_root()
+    forget_tracked_paths()
+    git = AsyncGit(project_path, max_concurrency)
+
+    # GitPython only reads files to open the repository, off the event loop it overlaps with the git calls
+    repo_opened = asyncio.ensure_future(asyncio.to_thread(_open_repo, project_path))
+    try:
+        if auto_mode:
+            hunks_by_file, unstaged_files = await asyncio.gather(git.modified_lines_by_file(True), git.unstaged_files())
+            # Like StagedBlobReader, only the files with unstaged edits are read from the index
+            names = [filename for filename in hunks_by_file if filename.endswith(".py")
+                     and (unstaged_files is None or filename in unstaged_files)]
+            blobs = await git.read_objects([f":{filename}" for filename in names])
+            blob_reader = PrefetchedBlobs({name[1:]: blob for name, blob in blobs.items()})
+        else:
+            hunks_by_file = await git.modified_lines_by_file(False)
+            blob_reader = None
+    except (OSError, RuntimeError):
+        # Not a repository (opening it logs why), like `scan_files` there is nothing to scan
+        if await repo_opened is None:
+            return {}
+        raise
+    repo = await repo_opened
+
+    if repo is None:
+        return {}
+    return await asyncio.to_thread(_scan_root, project_path, repo, auto_mode, use_cache, hunks_by_file, blob_reader)
@@ -0,0 +1,325 @@
+# ifft_core/audit.py
+
+"""Whole-project audit
+
+Scans every tracked Python file of a project, not only the modified ones, to
+take an inventory of its IFFT blocks: totals, blocks per file, the largest
+blocks, duplicated labels and the `#IFFT.Then(file, label)` targets that point
+at a missing file or at a label the file does not define.
+
+The file list and the blob hash of every file come from one `git ls-files -s`.
+Files without unstaged edits are looked up in the scan cache by that hash
+without being read. The others are read and hashed over a process pool, and
+parsed there unless the cache knows their hash too; what they parse to is
+added to the cache for the next run.
+
+"""
+
+import json
+import logging
+import mmap
+import os
+import subprocess
+import time
+
+from colorama import Fore, Style
+
+from ifft_core.daemon_client import find_git_dir
+from ifft_core.ifft_parser import PARALLEL_SCAN_MIN_FILES, _map_file, parse_blocks
+from ifft_core.scan_cache import DEFAULT_MAX_ENTRIES, ScanCache, blob_sha
+from ifft_core.tracked_paths import forget_tracked_paths, tracked_paths_for
+
+# Number of largest blocks listed in the report
+TOP_BLOCKS = 10
+
+
+def _git_output(project_path: str, args: list):
+    """The output of a git command, or None if git failed."""
+    try:
+        return subprocess.run(['git', '-c', 'core.quotepath=off'] + args, cwd=project_path, capture_output=True,
+                              check=True).stdout.decode('utf-8', 'replace')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def audited_files(project_path: str, excluded_folders: list = None) -> dict:
+    """
+        List the Python files to audit with the blob hash of their content, when git knows it.
+
+        Outside a repository the project is walked instead and no hash is known.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            excluded_folders (list): Folder names, paths or gitignore-style patterns to skip.
+
+        Returns:
+            dict: A dictionary mapping each file, relative to the project path, to its blob hash
+                (None for the files whose working-tree content differs from the index).
+    """
+    from helpers.helpers import iter_project_files, load_exclusion_spec
+
+    output = _git_output(project_path, ['ls-files', '-s', '-z', '--', '*.py'])
+    if output is None:
+        logging.info(f"{Fore.YELLOW}{project_path} is not a git repository, walking it instead{Style.RESET_ALL}")
+        return {os.path.relpath(path, project_path): None
+                for path in iter_project_files(project_path, excluded_folders=excluded_folders)}
+
+    spec = load_exclusion_spec(project_path, excluded_folders)
+    files = {}
+    for entry in output.split('\0'):
+        # `<mode> <sha> <stage>\t<path>`
+        info, _, path = entry.partition('\t')
+        if not path or spec.match_file(path):
+            continue
+        mode, sha, stage = info.split()
+        if stage == '0' and mode != '160000':
+            files[path] = sha
+
+    unstaged = _git_output(project_path, ['diff-files', '-z', '--name-only', '--relative']) or ''
+    for path in unstaged.split('\0'):
+        if path in files:
+            files[path] = None
+    return files
+
+
+# The blob hashes the scan cache knows, in each worker process
+_worker_known_digests = frozenset()
+
+
+def _init_parse_worker(known_digests: frozenset):
+    global _worker_known_digests
+    _worker_known_digests = known_digests
+
+
+def _parse_file_job(job: tuple, known_digests: frozenset = None):
+    """
+        Read, hash and parse one file in a worker process.
+
+        Returns:
+            tuple: The blob hash of the file and its parsed blocks, None instead of the blocks when
+                the cache knows the hash already; None if the file cannot be read.
+    """
+    path, digest = job
+    known_digests = _worker_known_digests if known_digests is None else known_digests
+    try:
+        buffer = _map_file(path)
+    except OSError:
+        return None
+    try:
+        digest = digest or blob_sha(buffer)
+        return digest, None if digest in known_digests else parse_blocks(buffer)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+def _parse_file_jobs(parse_jobs: list, jobs: int, known_digests: frozenset):
+    """Yield the result of `_parse_file_job` for each job, in order, over a process pool when there are enough."""
+    jobs = jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(parse_jobs) < PARALLEL_SCAN_MIN_FILES:
+        for job in parse_jobs:
+            yield _parse_file_job(job, known_digests)
+        return
+
+    logging.info(f"{Fore.YELLOW}Parsing {len(parse_jobs)} files with {jobs} workers{Style.RESET_ALL}")
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_parse_worker, initargs=(known_digests,))
+    try:
+        yield from executor.map(_parse_file_job, parse_jobs, chunksize=max(1, len(parse_jobs) // (jobs * 4)))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_project(project_path: str, files: dict, jobs: int = 1, cache: ScanCache = None) -> dict:
+    """
+        Parse the blocks of many files, going through the cache.
+
+        The files whose hash is known are looked up without being read. The others are
+        read and hashed, and only parsed when the cache does not know their hash either.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            files (dict): The files and their blob hash (see `audited_files`).
+            jobs (int): The number of worker processes, `0` meaning one per CPU.
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+
+        Returns:
+            dict: A dictionary mapping each readable file to its parsed blocks (see `parse_blocks`).
+    """
+    parsed_by_file = {}
+    parse_jobs = []
+    for file_name, digest in files.items():
+        parsed_blocks = cache.get(digest) if cache is not None and digest else None
+        if parsed_blocks is None:
+            parse_jobs.append((file_name, digest))
+        else:
+            parsed_by_file[file_name] = parsed_blocks
+
+    known_digests = frozenset(cache.entries) if cache is not None else frozenset()
+    jobs_paths = [(os.path.join(project_path, file_name), digest) for file_name, digest in parse_jobs]
+    for (file_name, listed_digest), result in zip(parse_jobs, _parse_file_jobs(jobs_paths, jobs, known_digests)):
+        if result is None:
+            continue
+        digest, parsed_blocks = result
+        if parsed_blocks is None:
+            parsed_blocks = cache.get(digest)
+        elif cache is not None:
+            # A file hashed by the worker was not looked up above, its miss is counted here
+            cache.merge({digest: parsed_blocks}, misses=0 if listed_digest else 1)
+        parsed_by_file[file_name] = parsed_blocks
+    return parsed_by_file
+
+
+def build_report(project_path: str, parsed_by_file: dict, top: int = TOP_BLOCKS) -> dict:
+    """
+        Take the inventory of the parsed blocks of a project.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            parsed_by_file (dict): The parsed blocks of each file (see `parse_project`).
+            top (int): The number of largest blocks to list.
+
+        Returns:
+            dict: The totals, the block count of each file, the largest blocks, the duplicated
+                labels and the dangling targets, JSON serializable.
+    """
+    tracked_paths = tracked_paths_for(project_path)
+    defined_labels = {}
+    blocks = []
+    for file_name, parsed_blocks in parsed_by_file.items():
+        for parsed in parsed_blocks:
+            block = {"file": file_name, "block_start": parsed["block_start"], "block_end": parsed["block_end"],
+                     "lines": parsed["block_end"] - parsed["block_start"] + 1, "label": parsed["label"],
+                     "associated_file_name": parsed["associated_file_name"],
+                     "associated_file_label": parsed["associated_file_label"]}
+            blocks.append(block)
+            if block["label"]:
+                defined_labels.setdefault(block["label"], []).append(block)
+
+    labels_by_file = {}
+    for label, definitions in defined_labels.items():
+        for definition in definitions:
+            labels_by_file.setdefault(os.path.normpath(definition["file"]), set()).add(label)
+
+    dangling = []
+    for block in blocks:
+        target = os.path.normpath(block["associated_file_name"])
+        if not tracked_paths.exists(block["associated_file_name"], record_missing=False):
+            reason = "missing file"
+        elif target in labels_by_file or target in parsed_by_file:
+            # Only the audited (Python) files can define labels
+            if block["associated_file_label"] in labels_by_file.get(target, ()):
+                continue
+            reason = "missing label"
+        else:
+            continue
+        dangling.append({**block, "reason": reason})
+
+    blocks_per_file = {file_name: len(parsed_blocks) for file_name, parsed_blocks in sorted(parsed_by_file.items())
+                       if parsed_blocks}
+    duplicated_labels = {label: [f"{d['file']}:{d['block_start']}" for d in definitions]
+                         for label, definitions in sorted(defined_labels.items()) if len(definitions) > 1}
+    return {
+        "project_path": project_path,
+        "totals": {
+            "files": len(parsed_by_file),
+            "files_with_blocks": len(blocks_per_file),
+            "blocks": len(blocks),
+            "labels": len(defined_labels),
+            "dangling_targets": len(dangling),
+            "duplicated_labels": len(duplicated_labels),
+        },
+        "blocks_per_file": blocks_per_file,
+        "largest_blocks": sorted(blocks, key=lambda block: block["lines"], reverse=True)[:top],
+        "duplicated_labels": duplicated_labels,
+        "dangling_targets": dangling,
+    }
+
+
+def audit_project(project_path: str, jobs: int = 1, use_cache: bool = True, excluded_folders: list = None,
+                  top: int = TOP_BLOCKS) -> dict:
+    """
+        Scan every tracked Python file of a project and take the inventory of its blocks.
+
+        Example:
+            >>>audit_project(project_path, jobs=0)["totals"]
+            {'files': 20000, 'files_with_blocks': 20000, 'blocks': 100000, 'labels': 100000,
+             'dangling_targets': 0, 'duplicated_labels': 0}
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            jobs (int): The number of worker processes, `0` meaning one per CPU.
+            use_cache (bool): Whether to reuse (and fill) the scan cache stored in `.git/ifft-cache`.
+            excluded_folders (list): Folder names, paths or gitignore-style patterns to skip.
+            top (int): The number of largest blocks to list.
+
+        Returns:
+            dict: The report (see `build_report`), with the cache activity and the time taken.
+    """
+    start = time.perf_counter()
+    forget_tracked_paths()
+    files = audited_files(project_path, excluded_folders)
+
+    git_dir = find_git_dir(project_path) if use_cache else None
+    # Large enough for the whole project, or the audit would evict its own entries
+    cache = ScanCache.for_git_dir(git_dir, max_entries=max(DEFAULT_MAX_ENTRIES, len(files))) if git_dir else None
+    parsed_by_file = parse_project(project_path, files, jobs=jobs, cache=cache)
+    if cache is not None:
+        cache.save()
+
+    report = build_report(project_path, parsed_by_file, top=top)
+    report["cache"] = {"hits": cache.hits, "misses": cache.misses} if cache is not None else None
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def print_report(report: dict) -> None:
+    """Print the summary of an audit report."""
+    totals = report["totals"]
+    print(f"{Fore.GREEN}IFFT audit of {report['project_path']}{Style.RESET_ALL}")
+    print(f"{totals['blocks']} block(s) in {totals['files_with_blocks']} of {totals['files']} file(s), "
+          f"{totals['labels']} label(s), in {report['seconds']}s")
+
+    if report["largest_blocks"]:
+        print(f"{Fore.YELLOW}Largest blocks:{Style.RESET_ALL}")
+        for block in report["largest_blocks"]:
+            print(f"  {block['lines']:>6} lines  {block['file']}:{block['block_start']}-{block['block_end']}"
+                  f"  {block['label']}")
+
+    for label, places in report["duplicated_labels"].items():
+        print(f"{Fore.RED}Label '{label}' is defined more than once: {', '.join(places)}{Style.RESET_ALL}")
+    for block in report["dangling_targets"]:
+        print(f"{Fore.RED}Dangling target in {block['file']}:{block['block_start']}: "
+              f"{block['associated_file_name']} '{block['associated_file_label']}' ({block['reason']}){Style.RESET_ALL}")
+
+    if not report["dangling_targets"]:
+        print(f"{Fore.GREEN}No dangling targets.{Style.RESET_ALL}")
+
+
+def run_audit(project_paths: list, jobs: int = 1, output_file: str = None, excluded_folders: list = None) -> int:
+    """
+        Audit one or several projects, print their summary and optionally save the reports as JSON.
+
+        Args:
+            project_paths (list): The project roots, audited one after the other.
+            jobs (int): The number of worker processes, `0` meaning one per CPU.
+            output_file (str): Where to save the report, or the list of reports when there are
+                several roots.
+            excluded_folders (list): Folder names, paths or gitignore-style patterns to skip.
+
+        Returns:
+            int: 1 if some targets are dangling in any of the projects, 0 otherwise.
+    """
+    reports = []
+    for project_path in project_paths:
+        report = audit_project(project_path, jobs=jobs, excluded_folders=excluded_folders)
+        print_report(report)
+        reports.append(report)
+    if output_file:
+        tmp_file = f"{output_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(reports[0] if len(reports) == 1 else reports, f, indent=4)
+        os.replace(tmp_file, output_file)
+        logging.info(f"{Fore.YELLOW}Audit report saved to {output_file}{Style.RESET_ALL}")
+    return 1 if any(report["dangling_targets"] for report in reports) else 0
@@ -0,0 +1,200 @@
+# ifft_core/commit_range.py
+
+"""Commit-range analysis
+
+Checks the IFFT blocks changed by a range of commits (e.g. everything a push
+brings, `origin/main..HEAD`), for CI. Two modes:
+
+- aggregate (default): one `git diff BASE HEAD` for the whole range. A block
+  is satisfied if its associated file changed anywhere in the range.
+- per commit: one `git log -p` for the whole range, checked commit by commit.
+  A block must be satisfied within the commit that changed it.
+
+Either way git's output is streamed through the diff parser and only hunk
+headers are kept. Per commit, only one commit's hunks are in memory at a time,
+so ranges of thousands of commits do not grow the memory use. The blocks are
+parsed from the blobs of the commit being checked, read through one
+`git cat-file --batch` process. The scan cache is keyed by blob hash, so it
+is shared across commits.
+
+"""
+
+import itertools
+import logging
+import os
+import subprocess
+
+from colorama import Fore, Style
+
+from ifft_core.git_blobs import StagedBlobReader
+from ifft_core.ifft_parser import mark_satisfied_blocks, parse_diff_lines, report_block_changes, scan_buffer
+from ifft_core.scan_cache import ScanCache
+from ifft_core.tracked_paths import forget_tracked_paths, tracked_paths_for
+
+# Starts the header line of each commit in the `git log` output
+COMMIT_MARKER = "\x1eIFFT-COMMIT "
+
+DIFF_OPTIONS = ['--no-color', '--no-ext-diff', '--no-prefix', '--no-renames', '-U0', '--diff-filter=ACM']
+
+
+def split_range(commit_range: str) -> tuple:
+    """
+        Split `BASE..HEAD` (or `BASE...HEAD`, or a lone `BASE` meaning `BASE..HEAD`) into its ends.
+
+        Example:
+            >>>split_range("origin/main..")
+            ('origin/main', 'HEAD')
+
+        Returns:
+            tuple: The base and the head revisions.
+    """
+    for separator in ("...", ".."):
+        if separator in commit_range:
+            base, head = commit_range.split(separator, 1)
+            return base or "HEAD", head or "HEAD"
+    return commit_range, "HEAD"
+
+
+def _stream_git(project_path: str, args: list):
+    """Yield the lines of a git command's output while it runs."""
+    command = ['git', '-c', 'core.quotepath=off'] + args
+    completed = False
+    with subprocess.Popen(command, cwd=project_path, stdout=subprocess.PIPE,
+                          text=True, encoding='utf-8', errors='replace') as process:
+        try:
+            yield from process.stdout
+            completed = True
+        finally:
+            if not completed:
+                # The consumer stopped early
+                process.terminate()
+    if completed and process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed with exit code {process.returncode}")
+
+
+def iter_range_commits(project_path: str, commit_range: str):
+    """
+        Stream the commits of a range, oldest first, with the hunks of each.
+
+        Merge commits carry no diff of their own and are skipped.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            commit_range (str): The range, e.g. `origin/main..HEAD`.
+
+        Yields:
+            tuple: The commit hash, its subject and its hunks by file (see `parse_diff_lines`).
+    """
+    lines = _stream_git(project_path, ['log', '-p', '--reverse', '--no-merges', f'--format={COMMIT_MARKER}%H %s']
+                        + DIFF_OPTIONS + [commit_range, '--'])
+    current = None
+
+    def commit_of(line):
+        nonlocal current
+        if line.startswith(COMMIT_MARKER):
+            current = line[len(COMMIT_MARKER):].rstrip('\n')
+        return current
+
+    # Each group is one commit: its header line, then its diff, parsed as it streams by
+    for header, commit_lines in itertools.groupby(lines, key=commit_of):
+        if header is None:
+            continue
+        next(commit_lines)
+        sha, _, subject = header.partition(' ')
+        yield sha, subject, parse_diff_lines(commit_lines)
+
+
+def scan_revision(project_path: str, revision: str, hunks_by_file: dict, blob_reader: StagedBlobReader,
+                  cache: ScanCache = None, label: str = None):
+    """
+        Scan the Python files changed in a revision, reading them as they are in that revision.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            revision (str): The revision the hunks lead to.
+            hunks_by_file (dict): The hunks of each changed file.
+            blob_reader (StagedBlobReader): The reader of the blobs.
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+            label (str): Added to the file names in the results, e.g. the commit.
+
+        Yields:
+            tuple: The file name and its list of IFFTBlock, for each changed file with blocks.
+    """
+    modified_files = list(hunks_by_file)
+    for filename, hunks in hunks_by_file.items():
+        if not filename.endswith(".py"):
+            continue
+        blob = blob_reader.read_object(f"{revision}:{filename}")
+        if blob is None:
+            continue
+        digest, buffer = blob
+        file_results = scan_buffer(project_path, os.path.join(project_path, filename), buffer, hunks,
+                                   cache=cache, digest=digest, in_memory=True)
+        if file_results:
+            mark_satisfied_blocks({filename: file_results}, modified_files)
+            yield (f"{filename} ({label})" if label else filename), file_results
+
+
+def iter_range_results(project_path: str, commit_range: str, per_commit: bool = False, cache: ScanCache = None):
+    """
+        Scan the blocks changed by a range of commits.
+
+        Example:
+            >>>report_block_changes(iter_range_results(project_path, "origin/main..HEAD"))
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            commit_range (str): The range, e.g. `origin/main..HEAD`.
+            per_commit (bool): Check each commit on its own instead of the range as a whole.
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+
+        Yields:
+            tuple: The file name (followed by the commit in per-commit mode) and its list of IFFTBlock.
+    """
+    if ".." not in commit_range:
+        commit_range = f"{commit_range}..HEAD"
+
+    with StagedBlobReader(project_path, skip_clean_files=False) as blob_reader:
+        if per_commit:
+            commits = 0
+            for sha, subject, hunks_by_file in iter_range_commits(project_path, commit_range):
+                commits += 1
+                logging.info(f"{Fore.YELLOW}Checking commit {sha[:12]} {subject}{Style.RESET_ALL}")
+                yield from scan_revision(project_path, sha, hunks_by_file, blob_reader, cache, label=sha[:12])
+            logging.info(f"{Fore.YELLOW}Checked {commits} commit(s) in {commit_range}{Style.RESET_ALL}")
+            return
+
+        base, head = split_range(commit_range)
+        # `git diff A...B` diffs B against the merge base, like `git log A..B` lists commits
+        revisions = [f"{base}...{head}"] if "..." in commit_range else [base, head]
+        hunks_by_file = parse_diff_lines(_stream_git(project_path, ['diff'] + DIFF_OPTIONS + revisions + ['--']))
+        yield from scan_revision(project_path, head, hunks_by_file, blob_reader, cache)
+
+
+def check_range(project_path: str, commit_range: str, per_commit: bool = False, use_cache: bool = True) -> int:
+    """
+        Report the blocks changed by a range of commits without their associated file.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            commit_range (str): The range, e.g. `origin/main..HEAD`.
+            per_commit (bool): Check each commit on its own instead of the range as a whole.
+            use_cache (bool): Whether to reuse the parsed blocks stored in `.git/ifft-cache`.
+
+        Returns:
+            int: The exit code of the check (1 if a block changed without its associated file).
+    """
+    from ifft_core.daemon_client import find_git_dir
+
+    forget_tracked_paths()
+    git_dir = find_git_dir(project_path)
+    cache = ScanCache.for_git_dir(git_dir) if use_cache and git_dir else None
+    try:
+        return report_block_changes(iter_range_results(project_path, commit_range, per_commit, cache))
+    except RuntimeError as e:
+        logging.error(f"{Fore.RED}{e}{Style.RESET_ALL}")
+        return 2
+    finally:
+        tracked_paths_for(project_path).report_missing()
+        if cache is not None:
+            cache.save()
@@ -0,0 +1,248 @@
+# ifft_core/daemon.py
+
+"""IFFT daemon
+
+`python3 ifft.py serve` starts a resident process that watches the project root,
+keeps the parsed blocks of every Python file and the label index in memory, and
+answers checks over a Unix socket. The pre-commit hook then only pays for a
+socket round-trip and one `git diff`, instead of a cold start and a full scan.
+
+The client side (`query_daemon`) lives in `ifft_core.daemon_client`, so the
+hook can ask the daemon without importing this module.
+
+"""
+
+import json
+import logging
+import os
+import threading
+
+from ifft_core.daemon_client import daemon_socket_path, runtime_dir
+
+
+class IFFTDaemon:
+    def __init__(self, project_path):
+        # The heavy imports are only paid by the daemon process, not by its clients
+        from git import Repo
+        from ifft_core.label_index import LabelIndex
+        from ifft_core.scan_cache import ScanCache
+
+        self.project_path = os.path.abspath(project_path)
+        self.repo = Repo(self.project_path)
+        self.cache = ScanCache.for_git_dir(self.repo.git_dir)
+        self.label_index = LabelIndex.for_git_dir(self.repo.git_dir)
+        self.socket_path = daemon_socket_path(self.repo.git_dir)
+        self.lock = threading.Lock()
+        # filename -> ((mtime_ns, size), parsed blocks)
+        self.files = {}
+
+    def _relative_path(self, path):
+        """Return a watched path relative to the project root, or None if it is not tracked by IFFT."""
+        path = os.path.relpath(os.path.abspath(path), self.project_path)
+        if not path.endswith(".py") or path.startswith("..") or path.split(os.sep)[0] == ".git":
+            return None
+        return path
+
+    def _stat_key(self, file_path):
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh_file(self, filename):
+        """
+        Re-parse a file and update the warm blocks and the label index.
+
+        Args:
+            filename (str): The file path, relative to the project root.
+
+        Returns:
+            list: The parsed blocks of the file, or None if it no longer exists.
+        """
+        from ifft_core.ifft_parser import _index_parsed_blocks, _read_parsed_blocks
+
+        file_path = os.path.join(self.project_path, filename)
+        with self.lock:
+            try:
+                stat_key = self._stat_key(file_path)
+                parsed_blocks = _read_parsed_blocks(file_path, self.cache)
+            except OSError:
+                self.files.pop(filename, None)
+                self.label_index.remove_file(filename)
+                return None
+
+            self.files[filename] = (stat_key, parsed_blocks)
+            _index_parsed_blocks(self.label_index, self.project_path, filename, parsed_blocks)
+        return parsed_blocks
+
+    def parsed_blocks(self, filename):
+        """Return the warm parsed blocks of a file, re-parsing it if it changed since."""
+        file_path = os.path.join(self.project_path, filename)
+        with self.lock:
+            entry = self.files.get(filename)
+        try:
+            if entry is not None and entry[0] == self._stat_key(file_path):
+                return entry[1]
+        except OSError:
+            pass
+        return self.refresh_file(filename)
+
+    def warm_up(self):
+        """Parse every tracked Python file and bring the label index up to date."""
+        from ifft_core.ifft_parser import sync_label_index
+
+        logging.info(f"Warming up IFFT daemon for {self.project_path}")
+        sync_label_index(self.repo, self.label_index, self.project_path, self.cache)
+        tracked_files = [f for f in self.repo.git.ls_files('-z', '--', '*.py').split('\0') if f]
+        for filename in tracked_files:
+            self.parsed_blocks(filename)
+        self.cache.save()
+        self.label_index.save()
+        logging.info(f"IFFT daemon ready: {len(self.files)} files, {self.label_index}")
+
+    def check(self, auto_mode):
+        """
+        Run the same check as `scan_files`, using the warm blocks.
+
+        The warm blocks are those of the working tree. In auto mode the hunks come from
+        `git diff --cached`, so the files with unstaged edits are scanned as staged
+        instead, read through a `StagedBlobReader` and looked up in the cache by the
+        blob hash git reports.
+
+        Args:
+            auto_mode (bool): Whether to check the staged (auto mode) or the unstaged changes.
+
+        Returns:
+            dict: The serialized results, the list of modified files and the label issues
+                (see `ifft_core.ifft_parser.read_daemon_answer`).
+        """
+        from ifft_core.git_blobs import StagedBlobReader
+        from ifft_core.ifft_parser import (get_modified_lines_by_file, mark_satisfied_blocks,
+                                           report_label_issues, scan_file, _index_blocks)
+        from ifft_core.tracked_paths import tracked_paths_for
+
+        modified_lines_by_file = get_modified_lines_by_file(self.repo, auto_mode)
+        results = {}
+        with StagedBlobReader(self.repo.working_tree_dir) as blob_reader:
+            # None when git could not tell: then every file is read as staged
+            unstaged_files = blob_reader.unstaged_files() if auto_mode else set()
+            for filename, hunks in modified_lines_by_file.items():
+                if not filename.endswith(".py"):
+                    continue
+                if unstaged_files is None or filename in unstaged_files:
+                    with self.lock:
+                        file_results = scan_file(self.project_path, filename, hunks, cache=self.cache,
+                                                 blob_reader=blob_reader)
+                else:
+                    parsed_blocks = self.parsed_blocks(filename)
+                    if parsed_blocks is None:
+                        continue
+                    file_results = scan_file(self.project_path, filename, hunks, parsed_blocks=parsed_blocks)
+                if file_results:
+                    results[filename] = file_results
+
+        mark_satisfied_blocks(results, modified_lines_by_file)
+        missing_targets = tracked_paths_for(self.project_path).report_missing()
+        with self.lock:
+            for filename, blocks in results.items():
+                _index_blocks(self.label_index, filename, blocks)
+            dangling, duplicates = report_label_issues(results, self.label_index)
+
+        return {
+            "results": {filename: [block.to_dict(include_content=False) for block in blocks]
+                        for filename, blocks in results.items()},
+            "modified_files": list(modified_lines_by_file),
+            # Reported by the client too, so a check says the same with or without the daemon
+            "label_issues": {"missing_targets": missing_targets, "dangling_targets": dangling,
+                             "duplicated_labels": duplicates}
+        }
+
+    def handle_request(self, request):
+        """Dispatch a decoded JSON request."""
+        command = request.get("command")
+        if command == "ping":
+            return {"pong": True, "files": len(self.files)}
+        if command == "check":
+            return self.check(bool(request.get("auto_mode")))
+        return {"error": f"Unknown command: {command}"}
+
+    def _start_watching(self):
+        """Refresh files as soon as the file system reports a change."""
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+        from ifft_core.tracked_paths import tracked_paths_for
+
+        daemon = self
+
+        class _ChangeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ("created", "deleted", "moved"):
+                    # IFFT.Then targets are checked against the file list of the project
+                    tracked_paths_for(daemon.project_path).invalidate()
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", None)):
+                    filename = daemon._relative_path(path) if path else None
+                    if filename:
+                        daemon.refresh_file(filename)
+
+        observer = Observer()
+        observer.schedule(_ChangeHandler(), self.project_path, recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def serve_forever(self):
+        """Warm up, watch the project and answer requests until interrupted."""
+        import signal
+        import socketserver
+
+        daemon = self
+
+        class _RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    answer = daemon.handle_request(json.loads(self.rfile.readline()))
+                except Exception as e:
+                    logging.exception("IFFT daemon request failed")
+                    answer = {"error": str(e)}
+                self.wfile.write(json.dumps(answer).encode())
+
+        self.warm_up()
+        observer = self._start_watching()
+
+        socket_dir = os.path.dirname(self.socket_path)
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        if socket_dir == runtime_dir():
+            # Outside the repository, the directory must be private or another user could swap the socket
+            socket_dir_stat = os.stat(socket_dir)
+            if socket_dir_stat.st_uid != os.getuid() or socket_dir_stat.st_mode & 0o077:
+                raise RuntimeError(f"{socket_dir} must be owned by the current user and not accessible to others")
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        def _stop(signum, frame):
+            raise KeyboardInterrupt
+
+        # Shut down cleanly (removing the socket) on `kill` as well as on Ctrl+C
+        signal.signal(signal.SIGTERM, _stop)
+
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, _RequestHandler)
+        server.daemon_threads = True
+        print(f"IFFT daemon listening on {self.socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            observer.stop()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            with self.lock:
+                self.cache.save()
+                self.label_index.save()
+            print("IFFT daemon stopped")
+
+
+def serve(project_path):
+    """Run the IFFT daemon for a project (blocking)."""
+    IFFTDaemon(project_path).serve_forever()
@@ -0,0 +1,149 @@
+# ifft_core/daemon_client.py
+
+"""IFFT daemon client
+
+The client side of the daemon (`ifft_core.daemon`): where its socket is and how
+to ask it for a check. The pre-commit hook imports this module before anything
+else, so it only imports `os` (and `stat`, which `os` loads) up front; the socket and JSON modules are loaded
+once a daemon socket is found, and a commit without a running daemon does not
+pay for them.
+
+A socket whose path would be too long under `.git` lives in a directory only
+its user can write to (`$XDG_RUNTIME_DIR`, or a 0700 `/tmp/ifft-<uid>`), and
+the client only talks to a socket owned by the current user, so another local
+user cannot answer the hook in place of the daemon.
+
+"""
+
+import os
+import stat
+
+DAEMON_SOCKET_NAME = "daemon.sock"
+DAEMON_TIMEOUT = 10.0
+
+# Unix socket paths are limited to ~108 bytes on Linux
+_MAX_SOCKET_PATH = 100
+
+
+def find_git_dir(project_path: str) -> str:
+    """
+        Locate the git directory of a project without spawning git.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+
+        Returns:
+            str: The path of the `.git` directory, or None outside a repository.
+    """
+    path = os.path.abspath(project_path)
+    while True:
+        git_path = os.path.join(path, ".git")
+        if os.path.isdir(git_path):
+            return git_path
+        if os.path.isfile(git_path):
+            # Worktrees and submodules use a `gitdir: <path>` file
+            with open(git_path) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(path, content[len("gitdir:"):].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def runtime_dir() -> str:
+    """Return the per-user directory of the sockets too long for `.git`; the daemon creates it 0700."""
+    xdg_runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if xdg_runtime_dir and os.path.isdir(xdg_runtime_dir):
+        return xdg_runtime_dir
+    return os.path.join("/tmp", f"ifft-{os.getuid()}")
+
+
+def daemon_socket_path(git_dir: str) -> str:
+    """
+        Return the Unix socket path of the daemon serving a repository.
+
+        Args:
+            git_dir (str): The git directory of the repository.
+
+        Returns:
+            str: The socket path, under `.git/ifft-cache` when it is short enough, in the
+                `runtime_dir` otherwise.
+    """
+    # Same folder as the scan cache (see ifft_core.scan_cache.CACHE_DIR_NAME)
+    socket_path = os.path.join(git_dir, "ifft-cache", DAEMON_SOCKET_NAME)
+    if len(socket_path) > _MAX_SOCKET_PATH:
+        import hashlib
+
+        digest = hashlib.sha1(os.path.abspath(git_dir).encode()).hexdigest()[:16]
+        socket_path = os.path.join(runtime_dir(), f"ifft-{digest}.sock")
+    return socket_path
+
+
+def is_own_socket(socket_path: str) -> bool:
+    """Whether a path is a socket created by the current user, i.e. by a daemon it started."""
+    try:
+        socket_stat = os.lstat(socket_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(socket_stat.st_mode) and socket_stat.st_uid == os.getuid()
+
+
+def query_daemon(project_path: str, request: dict, timeout: float = DAEMON_TIMEOUT) -> dict:
+    """
+        Send a request to the daemon serving a project.
+
+        Example:
+            >>>query_daemon(project_root, {"command": "check", "auto_mode": True})
+            {'results': {'app.py': [{...}]}, 'modified_files': ['app.py'], 'label_issues': {...}}
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            request (dict): The JSON request to send.
+            timeout (float): Seconds to wait for the answer.
+
+        Returns:
+            dict: The JSON answer, or None when no daemon is running.
+    """
+    git_dir = find_git_dir(project_path)
+    if git_dir is None:
+        return None
+
+    socket_path = daemon_socket_path(git_dir)
+    if not os.path.exists(socket_path):
+        return None
+
+    import json
+    import logging
+    import socket
+
+    if not is_own_socket(socket_path):
+        logging.warning(f"Ignoring {socket_path}: it is not a socket owned by the current user")
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode() + b"\n")
+            client.shutdown(socket.SHUT_WR)
+
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError as e:
+        logging.debug(f"IFFT daemon unavailable at {socket_path}: {e}")
+        return None
+
+    try:
+        answer = json.loads(b"".join(chunks))
+    except ValueError:
+        return None
+    if "error" in answer:
+        logging.warning(f"IFFT daemon error: {answer['error']}")
+        return None
+    return answer
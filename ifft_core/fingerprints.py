@@ -0,0 +1,225 @@
+# ifft_core/fingerprints.py
+
+"""Git-free fingerprint check
+
+Detects the modified IFFT blocks without git, e.g. in an exported source tree or
+a build sandbox. `BlockManager.extract_blocks` records a baseline: a hash of the
+content of every block, and the size, modification time and hash of every file
+holding blocks and of every associated file.
+
+A check then stats the recorded files. Only the files whose size or
+modification time changed are read and hashed, and only those whose hash
+differs are parsed and their blocks compared, so the cost of reading grows
+with the number of changed files, not with the size of the project. Files that were only
+touched get their new size and time recorded so the next check skips them again.
+
+The baseline stays the one of the last extraction: extract again to accept the
+current state of the blocks.
+
+"""
+
+import difflib
+import hashlib
+import logging
+import os
+
+from colorama import Fore, Style
+
+from ifft_block.ifft_block_class import IFFTBlock
+from ifft_core.ifft_parser import mark_satisfied_blocks, parse_blocks
+from ifft_core.tracked_paths import forget_tracked_paths, tracked_paths_for
+
+
+def block_fingerprint(block_content: str) -> str:
+    """
+        Hash the content of a block.
+
+        Example:
+            >>>block_fingerprint('#IFFT.If(foo)\\nx = 1\\n')
+            '3c5e...'
+
+        Args:
+            block_content (str): The text of the block, from its #IFFT.If line up to its #IFFT.Then line.
+
+        Returns:
+            str: The fingerprint of the block.
+    """
+    return hashlib.blake2b(block_content.encode('utf-8', 'replace'), digest_size=16).hexdigest()
+
+
+def file_snapshot(path: str) -> tuple:
+    """
+        Record the state of a file for a later check.
+
+        Returns:
+            tuple: Its `(mtime_ns, size, digest)`, or None if the file does not exist.
+    """
+    try:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, digest
+
+
+def changed_files(project_root: str, store, file_stats: dict = None) -> list:
+    """
+        List the recorded files whose content differs from the baseline.
+
+        A file is only read when its size or modification time changed; the new
+        state of the files that were touched without being changed is recorded.
+
+        Args:
+            project_root (str): The root directory of the project.
+            store (MetadataStore): The store holding the baseline.
+            file_stats (dict): The recorded files, if already read from the store (see `MetadataStore.file_stats`).
+
+        Returns:
+            list: The changed (or deleted) files, relative to the project root.
+    """
+    changed = []
+    touched = {}
+    file_stats = store.file_stats() if file_stats is None else file_stats
+    for file_name, (mtime_ns, size, digest) in file_stats.items():
+        path = os.path.join(project_root, file_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            changed.append(file_name)
+            continue
+        if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+            continue
+
+        snapshot = file_snapshot(path)
+        if snapshot is None or snapshot[2] != digest:
+            changed.append(file_name)
+        else:
+            touched[file_name] = snapshot
+
+    if touched:
+        store.replace_file_stats(touched)
+    return changed
+
+
+def _modified_lines(old_content: str, new_content: str) -> list:
+    """Describe the changes between two versions of a block like the diff hunks do (`+`, `~` and `-` lines)."""
+    old_lines, new_lines = old_content.splitlines(), new_content.splitlines()
+    modified_lines = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        # The first lines of a replacement were changed, any further ones added
+        changed = old_end - old_start
+        for offset, line in enumerate(new_lines[new_start:new_end]):
+            modified_lines.append(f"{'~' if offset < changed else '+'} {line.strip()}")
+        if old_end - old_start > new_end - new_start:
+            modified_lines.append(f"- {(old_end - old_start) - (new_end - new_start)} line(s) removed")
+    return modified_lines
+
+
+def _stored_block_key(blocks: list):
+    """Key blocks by their #IFFT.If label, or by their position among the unlabeled ones."""
+    unlabeled = 0
+    for block in blocks:
+        if block["label"]:
+            yield block["label"]
+        else:
+            unlabeled += 1
+            yield ("#", unlabeled)
+
+
+def compare_blocks(project_root: str, file_name: str, buffer: bytes, stored_blocks: list) -> list[IFFTBlock]:
+    """
+        Build the IFFT blocks of a file and compare them with their stored fingerprints.
+
+        Args:
+            project_root (str): The root directory of the project.
+            file_name (str): The file, relative to the project root.
+            buffer (bytes): The current content of the file.
+            stored_blocks (list): The metadata of its blocks at the last extraction.
+
+        Returns:
+            list[IFFTBlock]: The blocks of the file, those whose content changed (or that are new)
+                with their modified lines.
+    """
+    file_path = os.path.join(project_root, file_name)
+    tracked_paths = tracked_paths_for(project_root)
+    parsed_blocks = parse_blocks(buffer)
+    stored_by_key = dict(zip(_stored_block_key(stored_blocks), stored_blocks))
+
+    results = []
+    for key, parsed in zip(_stored_block_key(parsed_blocks), parsed_blocks):
+        block_content = buffer[parsed["start_offset"]:parsed["end_offset"]].decode("utf-8", "replace")
+        block_content = block_content.replace("\r\n", "\n")
+        stored = stored_by_key.get(key)
+        modified_lines = []
+        if stored is None:
+            # A new block: all its lines were added
+            modified_lines = _modified_lines("", block_content)
+        elif block_fingerprint(block_content) != (stored["fingerprint"] or block_fingerprint(stored["block_content"])):
+            modified_lines = _modified_lines(stored["block_content"], block_content)
+
+        associated_file_name = parsed["associated_file_name"]
+        associated_file_label = parsed["associated_file_label"]
+        # Missing targets are reported together at the end of the scan (see `scan_fingerprints`)
+        if not tracked_paths.exists(associated_file_name):
+            associated_file_name = ""
+            associated_file_label = ""
+
+        results.append(IFFTBlock(
+            file_path=file_path,
+            block_content=block_content,
+            associated_file_name=associated_file_name,
+            associated_file_label=associated_file_label,
+            block_start=parsed["block_start"],
+            block_end=parsed["block_end"],
+            modified_lines=modified_lines,
+            label=parsed["label"],
+            start_offset=parsed["start_offset"],
+            end_offset=parsed["end_offset"]
+        ))
+
+    return results
+
+
+def scan_fingerprints(project_root: str, store) -> dict:
+    """
+        Scan the blocks changed since their extraction, without git.
+
+        Example:
+            >>>report_block_changes(scan_fingerprints(project_root, BlockManager(project_root=project_root).store))
+
+        Args:
+            project_root (str): The root directory of the project.
+            store (MetadataStore): The store holding the baseline recorded by `BlockManager.extract_blocks`.
+
+        Returns:
+            dict: A dictionary of results, as returned by `scan_files`, for the changed files.
+    """
+    file_stats = store.file_stats()
+    if not file_stats:
+        logging.warning(f"{Fore.YELLOW}No block fingerprints stored in {store.db_path}, extract the IFFT blocks "
+                        f"first (extract_ifft_blocks_content).{Style.RESET_ALL}")
+        return {}
+
+    forget_tracked_paths()
+    modified_files = changed_files(project_root, store, file_stats)
+    logging.info(f"{Fore.YELLOW}Modified files found: {modified_files}{Style.RESET_ALL}")
+
+    results = {}
+    for file_name in modified_files:
+        stored_blocks = store.file_blocks(file_name)
+        path = os.path.join(project_root, file_name)
+        if not stored_blocks or not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            buffer = f.read()
+        file_results = compare_blocks(project_root, file_name, buffer, stored_blocks)
+        if file_results:
+            results[file_name] = file_results
+
+    mark_satisfied_blocks(results, modified_files)
+    tracked_paths_for(project_root).report_missing()
+    return results
@@ -0,0 +1,140 @@
+# ifft_core/git_blobs.py
+
+"""Staged blob reader
+
+In auto mode the hunks come from `git diff --cached`, so their line numbers
+refer to the content staged in the index, not to the working-tree file (which
+may hold further unstaged edits). `StagedBlobReader` reads that staged content
+through a single `git cat-file --batch` process started on the first read and
+shared by every file of the run: one request and one response per file over a
+pipe, instead of one git process per file.
+
+Inflating blobs costs git more than reading a file costs us, so by default only
+the files with unstaged edits (listed once by `git diff-files`) go through the
+batch process; for the others the working tree holds the staged content already.
+
+"""
+
+import logging
+import subprocess
+
+from colorama import Fore, Style
+
+
+class StagedBlobReader:
+    def __init__(self, project_path, skip_clean_files=True):
+        self.project_path = project_path
+        self.skip_clean_files = skip_clean_files
+        self._process = None
+        self._broken = False
+        self._unstaged_files = None
+
+    def _start(self):
+        """Start the `git cat-file --batch` process, once."""
+        if self._process is None and not self._broken:
+            try:
+                self._process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.project_path,
+                                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.DEVNULL)
+            except OSError as e:
+                logging.warning(f"{Fore.YELLOW}Could not start git cat-file: {e}{Style.RESET_ALL}")
+                self._broken = True
+        return self._process
+
+    def read_object(self, name):
+        """
+            Read one object through the batch process.
+
+            Example:
+                >>>reader.read_object(":app.py")
+                ('5f1c...', b'import os\\n...')
+
+            Args:
+                name (str): Any object name git understands, e.g. `:<path>` for a staged file.
+
+            Returns:
+                tuple: The object hash and its content, or None if the object does not exist
+                    (or git could not be run).
+        """
+        if "\n" in name:
+            # The batch protocol is line based
+            return None
+        process = self._start()
+        if process is None:
+            return None
+
+        try:
+            process.stdin.write(name.encode("utf-8") + b"\n")
+            process.stdin.flush()
+            line = process.stdout.readline()
+            if not line:
+                # git is gone
+                self._fail()
+                return None
+            header = line.split()
+            if len(header) != 3 or header[1] not in (b"blob", b"tree", b"commit", b"tag") or not header[2].isdigit():
+                # `<name> missing` (the name may contain spaces)
+                return None
+            sha, size = header[0].decode("ascii"), int(header[2])
+            data = process.stdout.read(size)
+            process.stdout.read(1)  # trailing newline
+        except (OSError, ValueError) as e:
+            logging.warning(f"{Fore.YELLOW}git cat-file failed: {e}{Style.RESET_ALL}")
+            self._fail()
+            return None
+        return sha, data
+
+    def unstaged_files(self):
+        """
+            List the files whose working-tree content differs from the index, once per reader.
+
+            Returns:
+                set: The files, relative to the root of the repository, or None if git could not tell.
+        """
+        if self._unstaged_files is None:
+            try:
+                output = subprocess.run(['git', '-c', 'core.quotepath=off', 'diff-files', '-z', '--name-only'],
+                                        cwd=self.project_path, capture_output=True, check=True).stdout
+            except (OSError, subprocess.CalledProcessError):
+                return None
+            self._unstaged_files = {path for path in output.decode('utf-8', 'replace').split('\0') if path}
+        return self._unstaged_files
+
+    def read_staged(self, filename):
+        """
+            Read the content of a file as staged in the index.
+
+            Args:
+                filename (str): The file, relative to the root of the repository.
+
+            Returns:
+                tuple: The blob hash and the staged content, or None if the file is not in the index or,
+                    with `skip_clean_files`, if its working-tree content is the staged one.
+        """
+        if self.skip_clean_files:
+            unstaged_files = self.unstaged_files()
+            if unstaged_files is not None and filename not in unstaged_files:
+                return None
+        return self.read_object(f":{filename}")
+
+    def _fail(self):
+        """Stop using the batch process after an error; reads then fall back to the working tree."""
+        self.close()
+        self._broken = True
+
+    def close(self):
+        """Stop the batch process."""
+        if self._process is not None:
+            process, self._process = self._process, None
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.wait()
+            process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,22 +1,28 @@
 # ifft_core/iftt_parser.py
 
-from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+# GitPython and the process pool are imported where they are used: the pre-commit
+# hook (ifft_hook.py) goes through this module and must start fast.
 import os
 import logging
 import re
 import subprocess
-import argparse
 import json
+import mmap
 from colorama import Fore, Style
-from dotenv import load_dotenv
 
 import sys
 sys.path.append('../')
-from ifft_block.ifft_block_class import IFFTBlock
-
-file_dir = os.path.dirname(__file__)
-dir_path_mock_project = os.path.join(file_dir, '..', 'mock_project')
+from ifft_block.ifft_block_class import IFFTBlock, STATUS_MODIFIED, STATUS_SATISFIED
+from ifft_core.git_blobs import StagedBlobReader
+from ifft_core.label_index import LabelIndex
+from ifft_core.scan_cache import ScanCache, blob_sha
+from ifft_core.tracked_paths import forget_tracked_paths, tracked_paths_for
+from helpers.helpers import get_project_root
 
+# `typing.TYPE_CHECKING` without importing typing, which the pre-commit hook would pay for
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from git import Repo
 
 def save_results_to_file(results, output_file="ifft_results.json"):
     """
@@ -30,7 +36,9 @@ def save_results_to_file(results, output_file="ifft_results.json"):
         """Convert IFFTBlock objects to dictionaries."""
         serialized = []
         for block in blocks:
-            if hasattr(block, '__dict__'):
+            if hasattr(block, 'to_dict'):
+                serialized.append(block.to_dict())  # Materializes the block content
+            elif hasattr(block, '__dict__'):
                 serialized.append(block.__dict__)  # Use __dict__ for custom objects
             else:
                 serialized.append(block)  # Assume it's already a serializable type
@@ -39,18 +47,25 @@ def save_results_to_file(results, output_file="ifft_results.json"):
     serializable_results = {file: serialize_blocks(blocks) for file, blocks in results.items()}
 
     try:
-        with open(output_file, "w") as f:
+        # Replaced atomically: the web UI reloads the file as soon as it changes
+        tmp_file = f"{output_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
             json.dump(serializable_results, f, indent=4)
+        os.replace(tmp_file, output_file)
         logging.info(f"{Fore.YELLOW} Results successfully saved to {output_file}{Style.RESET_ALL}") 
     except Exception as e:
         logging.error(f"{Fore.RED} Failed to save results: {e}") 
 
 # TO-DO(): Move load_config function to helper file and read the debug flag from the configuration file.
 
-def validate_associated_file(associated_file_name: str) -> bool:
+def validate_associated_file(associated_file_name: str, project_path: str = None) -> bool:
     """
         Validate if the associated file specified in IFFT block exists.
 
+        The lookup goes through the set of project files built once per run (see
+        `ifft_core.tracked_paths`), and the files not found are reported all together
+        by `TrackedPaths.report_missing` at the end of the scan.
+
         Example:
             >>>validate_associated_file("foo_file.py")
             True
@@ -60,25 +75,142 @@ def validate_associated_file(associated_file_name: str) -> bool:
 
         Args:
             associated_file_name (String): A string corresponding to the file beeing
-                verified.
+                verified, relative to the project root.
+            project_path (str): The project root, the configured one by default.
 
         Returns:
             bool: A boolean that indicate whether the specified file is valid or not.
     """
 
-    project_path = os.path.join(dir_path_mock_project)
     associated_file_name = associated_file_name.replace('"', '')
-    file_path = os.path.join(project_path, associated_file_name)
-    if not os.path.isfile(file_path):
-        logging.error(f"{Fore.RED} Associated file: {associated_file_name} not found {Style.RESET_ALL}")
-        logging.error(f"{Fore.RED} Associated file path: {file_path} {Style.RESET_ALL}")
-        return False
-    logging.info(f"{Fore.YELLOW} Associated file: {associated_file_name} found {Style.RESET_ALL}")
-    return True
+    return tracked_paths_for(project_path or get_project_root()).exists(associated_file_name)
+
+
+# The escapes of git's C-style path quoting, besides the `\ooo` octal bytes
+_C_ESCAPES = {b'a': b'\a', b'b': b'\b', b't': b'\t', b'n': b'\n', b'v': b'\v', b'f': b'\f', b'r': b'\r',
+              b'"': b'"', b'\\': b'\\'}
+_C_ESCAPE_PATTERN = re.compile(rb'\\([0-7]{3}|.)', re.DOTALL)
+
 
-def get_modified_lines(repo: str, filename: str, auto_mode: argparse.Namespace) -> set:
+def _unescape_c(match) -> bytes:
+    """Turn one escape of a C-quoted path back into its byte."""
+    escape = match.group(1)
+    if len(escape) == 3:
+        return bytes([int(escape, 8)])
+    return _C_ESCAPES.get(escape, match.group(0))
+
+
+def _unquote_diff_path(path: str) -> str:
     """
-        Get a set of modified lines for the given filename.
+        Undo the C-style quoting git applies to unusual paths in diff headers.
+
+        With `core.quotepath=off` a quoted path mixes raw UTF-8 characters and
+        escapes (e.g. `"tab\\t中.py"`, or `"caf\\303\\251.py"` without it), so the
+        escapes are undone on the bytes of the path and decoded once at the end.
+
+        Args:
+            path (str): The path as printed after `+++ ` in a diff header.
+
+        Returns:
+            str: The unquoted path.
+    """
+    path = path.rstrip('\n').rstrip('\t')
+    if len(path) >= 2 and path.startswith('"') and path.endswith('"'):
+        escaped = path[1:-1].encode('utf-8', 'surrogateescape')
+        path = _C_ESCAPE_PATTERN.sub(_unescape_c, escaped).decode('utf-8', 'replace')
+    return path
+
+
+def _parse_hunk_header(line: str) -> tuple:
+    """Parse `@@ -old_start[,old_count] +new_start[,new_count] @@` into a hunk tuple."""
+    old_range, new_range = line.split()[1:3]
+    old_start, _, old_count = old_range[1:].partition(',')
+    new_start, _, new_count = new_range[1:].partition(',')
+    return (int(old_start), int(old_count or 1), int(new_start), int(new_count or 1))
+
+
+def parse_diff_lines(diff_lines) -> dict:
+    """
+        Split a unified diff stream into the list of hunks of each file.
+
+        The stream is consumed line by line and only the hunk headers are kept, so
+        memory grows with the number of hunks, not with the size of the change.
+        A hunk is an `(old_start, old_count, new_start, new_count)` tuple; with
+        `new_count == 0` (a pure deletion) the lines were removed right after
+        line `new_start` of the new version.
+
+        Example:
+            >>>parse_diff_lines(["diff --git app.py app.py", "--- app.py", "+++ app.py",
+                                 "@@ -3,0 +4 @@", "+line1", "@@ -9,2 +9,0 @@", "-line2", "-line3"])\n
+            {'app.py': [(3, 0, 4, 1), (9, 2, 9, 0)]}
+
+        Args:
+            diff_lines (Iterable[str]): Lines of a `git diff --no-prefix -U0` output.
+
+        Returns:
+            dict: A dictionary mapping each file to its hunks, in line order.
+    """
+    hunks_by_file = {}
+    hunks = None
+    in_header = False
+
+    for line in diff_lines:
+        if line.startswith('diff --git '):
+            in_header = True
+            hunks = None
+        elif in_header and line.startswith('+++ '):
+            filename = _unquote_diff_path(line[4:])
+            if filename != '/dev/null':
+                hunks = hunks_by_file.setdefault(filename, [])
+        elif line.startswith('@@'):
+            in_header = False
+            if hunks is not None:
+                hunks.append(_parse_hunk_header(line))
+
+    return hunks_by_file
+
+
+def get_modified_lines_by_file(repo: "Repo | str", auto_mode: bool, paths: list = None) -> dict:
+    """
+        Get the modified hunks of every changed file with a single `git diff` call.
+
+        The diff is taken from the index (`--cached`) in auto mode and from the
+        working tree otherwise. Its output is parsed while git streams it, so the
+        number of git processes does not depend on how many files were changed.
+
+        Example:
+            >>>get_modified_lines_by_file(repo, auto_mode=True)\n
+            {'app.py': [(6, 0, 7, 1)], 'file1.py': [(2, 1, 2, 1)]}
+
+        Args:
+            repo (Repo | str): The repository being scanned, or the path of its working tree.
+            auto_mode (bool): Whether to diff the index (auto mode) or the working tree.
+            paths (list): Optional list of paths to restrict the diff to.
+
+        Returns:
+            dict: A dictionary mapping each changed file to its hunks (see `parse_diff_lines`).
+    """
+    command = ['git', '-c', 'core.quotepath=off', 'diff', '--no-color', '--no-ext-diff',
+               '--no-prefix', '--no-renames', '-U0', '--diff-filter=ACM']
+    if auto_mode:
+        command.append('--cached')
+    if paths:
+        command.append('--')
+        command.extend(paths)
+
+    working_tree_dir = repo if isinstance(repo, str) else repo.working_tree_dir
+    with subprocess.Popen(command, cwd=working_tree_dir, stdout=subprocess.PIPE,
+                          text=True, encoding='utf-8', errors='replace') as process:
+        hunks_by_file = parse_diff_lines(process.stdout)
+
+    logging.debug(f"{Fore.BLUE} REPO: {repo} {Style.RESET_ALL}")
+    logging.debug(f"{Fore.BLUE} MODIFIED FILES: {list(hunks_by_file)} {Style.RESET_ALL}")
+    return hunks_by_file
+
+
+def get_modified_lines(repo: "Repo | str", filename: str, auto_mode: bool) -> list:
+    """
+        Get the modified hunks of the given filename.
 
         Example:
             >>>file1.py:\n
@@ -87,103 +219,322 @@ def get_modified_lines(repo: str, filename: str, auto_mode: argparse.Namespace)
                 + line3
 
             >>>get_modified_lines(repo, file1.py)\n
-            {'line1', 'line2', 'line3'}
+            [(4, 0, 5, 3)]
 
         Args:
-            repo (str): A string corresponding to the repository.
+            repo (Repo | str): The repository being scanned, or the path of its working tree.
             filename (str): A string corresponding to the filename.
+            auto_mode (bool): Whether to diff the index (auto mode) or the working tree.
 
         Returns:
-            set: A set of modified lines.
+            list: The `(old_start, old_count, new_start, new_count)` hunks of the file.
 
     """
-    modified_lines = set()
-    diff_text = ""
+    hunks = get_modified_lines_by_file(repo, auto_mode, paths=[filename]).get(filename, [])
 
-    if not auto_mode:
-        diff_text = repo.git.diff(None, filename)
+    logging.debug(f"{Fore.BLUE} FILENAME: {filename} {Style.RESET_ALL}")
+    logging.info(f"{Fore.YELLOW} Modified hunks: {hunks} {Style.RESET_ALL}")
+    return hunks
 
-    else:
-        diff_text = repo.git.diff('HEAD', filename)
 
-    logging.debug(f"{Fore.BLUE} DIFF TEXT: {diff_text} {Style.RESET_ALL}")
-    logging.debug(f"{Fore.BLUE} REPO: {repo} {Style.RESET_ALL}")
-    logging.debug(f"{Fore.BLUE} FILENAME: {filename} {Style.RESET_ALL}")
+# One pattern for both markers, matched against the whole buffer instead of line by line
+ifft_marker_pattern = re.compile(
+    rb'#[^\S\n]*IFFT\.(?:(If)(.*)|Then\([^\S\n]*"([^"\n]+)"[^\S\n]*,[^\S\n]*"([^"\n]+)"[^\S\n]*\))',
+    re.IGNORECASE
+)
 
-    diff_lines = diff_text.split('\n')
-    line_number = 0
 
-    for line in diff_lines:
-        if line.startswith('@@'):
-            line_number = int(line.split()[2].split(',')[0].replace('+', ''))
-        elif line.startswith('+') and not line.startswith('+++'):
-            modified_lines.add((line_number, line[1:].strip()))
-            line_number += 1
-        elif line.startswith(' '):
-            line_number += 1
-
-    logging.info(f"{Fore.YELLOW} Modified lines: {modified_lines} {Style.RESET_ALL}")
-    return modified_lines
+def _parse_if_label(label: bytes) -> str:
+    """Normalize the text following `#IFFT.If`, e.g. `(foo block)` -> `foo block`."""
+    label = label.decode('utf-8', 'replace').strip()
+    if label.startswith('(') and label.endswith(')'):
+        label = label[1:-1].strip()
+    return label.strip('"\'')
 
 
-def scan_file(project_path: str, filename: str, modified_lines_set: set) -> list[IFFTBlock]:
-    results = []
+# Files are lower-cased in chunks for the marker check, so a large mmap is never copied at once
+MARKER_CHECK_CHUNK = 1 << 20
+
+
+def has_ifft_markers(buffer) -> bool:
+    """
+        Cheap byte-level check telling whether a file may contain IFFT markers.
+
+        Most files of a change set have no annotation at all, and a plain substring
+        search rejects them much faster than any regex. Markers are matched in any
+        case (`#IFFT.If`, `#ifft.if`, `#Ifft.If`...), so the content is lower-cased
+        (ASCII only, like the marker pattern) before looking for `ifft.`.
+
+        Args:
+            buffer (bytes | mmap.mmap): The raw content of the file.
+
+        Returns:
+            bool: False when the file certainly has no IFFT marker.
+    """
+    for start in range(0, len(buffer), MARKER_CHECK_CHUNK):
+        # The chunks overlap by the length of `ifft.` minus one, for a marker split between two of them
+        if buffer[start:start + MARKER_CHECK_CHUNK + 4].lower().find(b'ifft.') != -1:
+            return True
+    return False
+
+
+def parse_blocks(buffer) -> list[dict]:
+    """
+        Find the IFFT blocks of a file without looking at its modified lines.
+
+        The result only depends on the file content, which makes it safe to cache
+        by blob hash. Blocks are described by line numbers and byte offsets, so no
+        text is copied out of the buffer.
+
+        Example:
+            >>>parse_blocks(b'#IFFT.If(foo)\nx = 1\n#IFFT.Then("b.py", "bar")\n')
+            [{'block_start': 1, 'block_end': 3, 'start_offset': 0, 'end_offset': 20, 'label': 'foo',
+              'associated_file_name': 'b.py', 'associated_file_label': 'bar'}]
+
+        Args:
+            buffer (bytes | mmap.mmap): The raw content of the file.
+
+        Returns:
+            list[dict]: The boundaries, label and target of each block.
+    """
+    parsed_blocks = []
+    if not has_ifft_markers(buffer):
+        return parsed_blocks
+
     in_block = False
-    block_content = ""
-    associated_file_name = ""
-    associated_file_label = ""
     block_start = 0
-    block_end = 0
-    modified_lines_within_blocks = []
+    start_offset = 0
+    label = ""
 
+    line_number = 1
+    counted_up_to = 0
+    last_marker_line = 0
+    for match in ifft_marker_pattern.finditer(buffer):
+        position = match.start()
+        line_number += buffer[counted_up_to:position].count(b'\n')
+        counted_up_to = position
+
+        # Only the first marker of a line counts
+        if line_number == last_marker_line:
+            continue
+        last_marker_line = line_number
+        line_offset = buffer.rfind(b'\n', 0, position) + 1
+
+        if match.group(1) is not None:
+            in_block = True
+            block_start = line_number
+            start_offset = line_offset
+            label = _parse_if_label(match.group(2))
+        elif in_block:
+            parsed_blocks.append({
+                "block_start": block_start,
+                "block_end": line_number,
+                "start_offset": start_offset,
+                "end_offset": line_offset,
+                "label": label,
+                "associated_file_name": match.group(3).decode('utf-8', 'replace'),
+                "associated_file_label": match.group(4).decode('utf-8', 'replace')
+            })
+            in_block = False
+
+    return parsed_blocks
+
+
+def _map_file(file_path: str):
+    """Memory-map a file for reading (empty files cannot be mapped and give `b''`)."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _parse_buffer(buffer, cache: ScanCache = None, digest: str = None) -> list[dict]:
+    """Parse the blocks of a file content, going through the cache when one is given (keyed by `digest` if known)."""
+    parsed_blocks = None
+    if cache is not None:
+        digest = digest or blob_sha(buffer)
+        parsed_blocks = cache.get(digest)
+    if parsed_blocks is None:
+        parsed_blocks = parse_blocks(buffer)
+        if cache is not None:
+            cache.put(digest, parsed_blocks)
+
+    return parsed_blocks
+
+
+def _read_parsed_blocks(file_path: str, cache: ScanCache = None) -> list[dict]:
+    """Parse the blocks of a file, going through the cache when one is given."""
+    buffer = _map_file(file_path)
+    try:
+        return _parse_buffer(buffer, cache)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+def _hunk_span(hunk: tuple) -> tuple:
+    """
+        Position of a hunk on the new side, in half-line units: line `n` is at `2n`
+        and the gap right after it (where lines were removed) at `2n + 1`.
+
+        The first old lines of a hunk are paired with its new lines (changed), the
+        remaining ones were removed: they sit in the gap after its last new line,
+        which is then the end of the span.
+    """
+    _, old_count, new_start, new_count = hunk
+    if not new_count:
+        return 2 * new_start + 1, 2 * new_start + 1
+    end = 2 * (new_start + new_count - 1)
+    return 2 * new_start, end + 1 if old_count > new_count else end
+
+
+def _modified_lines_by_block(buffer, parsed_blocks: list, hunks: list) -> list[list[str]]:
+    """
+        Intersect the hunks of a file with its blocks, both sorted by line, in one pass.
+
+        Each block gets the lines added (`+ text`), changed (`~ text`) and removed
+        (`- N line(s) removed`) strictly between its markers, deletions right after
+        `#IFFT.If` or right before `#IFFT.Then` included.
+
+        Args:
+            buffer (bytes | mmap): The file content.
+            parsed_blocks (list): The parsed blocks of the file (see `parse_blocks`).
+            hunks (list): The hunks of the file (see `parse_diff_lines`).
+
+        Returns:
+            list[list[str]]: The modified lines of each block, in the order of `parsed_blocks`.
+    """
+    modified_lines = [[] for _ in parsed_blocks]
+    if not hunks:
+        return modified_lines
+
+    # git emits hunks in line order, so this is linear; it only matters for hand-built lists
+    hunks = sorted(hunks, key=lambda hunk: hunk[2])
+    first_hunk = 0
+
+    for index, parsed in enumerate(parsed_blocks):
+        block_start, block_end = parsed["block_start"], parsed["block_end"]
+        low, high = 2 * block_start + 1, 2 * block_end - 1
+
+        # Blocks do not overlap, so the hunks ending before this block can be dropped for good
+        while first_hunk < len(hunks) and _hunk_span(hunks[first_hunk])[1] < low:
+            first_hunk += 1
+
+        block_lines = None
+        for hunk in hunks[first_hunk:]:
+            span_start, span_end = _hunk_span(hunk)
+            if span_start > high:
+                break
+            old_start, old_count, new_start, new_count = hunk
+            changed = min(old_count, new_count)
+
+            first_line = max(new_start, block_start + 1)
+            last_line = min(new_start + new_count - 1, block_end - 1)
+            if first_line <= last_line and block_lines is None:
+                # Only the blocks that were actually touched are decoded
+                block_lines = buffer[parsed["start_offset"]:parsed["end_offset"]].decode('utf-8', 'replace').split('\n')
+            for line_number in range(first_line, last_line + 1):
+                kind = '~' if line_number - new_start < changed else '+'
+                modified_lines[index].append(f"{kind} {block_lines[line_number - block_start].strip()}")
+
+            # The removed lines belong to the block only if their gap is between its markers
+            if old_count > new_count and low <= span_end <= high:
+                modified_lines[index].append(f"- {old_count - new_count} line(s) removed")
+
+    return modified_lines
+
+
+def scan_file(project_path: str, filename: str, hunks: list, cache: ScanCache = None,
+              parsed_blocks: list = None, blob_reader: StagedBlobReader = None) -> list[IFFTBlock]:
+    """
+        Scan a file for IFFT blocks and collect the modified lines within each block.
+
+        The file is memory-mapped and the blocks only keep byte offsets into it; their
+        content is read lazily, when a consumer asks for `IFFTBlock.block_content`.
+        When a cache is given, the blocks of a file whose content was already parsed
+        are taken from it and only the intersection with the hunks is recomputed.
+        With a blob reader (auto mode), the content staged in the index is scanned
+        instead of the working-tree file, so the blocks match the hunks of
+        `git diff --cached` even when the file has unstaged edits.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            filename (str): The file to scan, relative to the project path.
+            hunks (list): The hunks of the file, sorted by line (see `parse_diff_lines`).
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+            parsed_blocks (list): Already parsed blocks of the file (see `parse_blocks`),
+                e.g. kept warm by the IFFT daemon. The file is not parsed again when given.
+            blob_reader (StagedBlobReader): Optional reader of the staged content; files it
+                does not return (e.g. without unstaged edits) are read from the working tree.
+
+        Returns:
+            list[IFFTBlock]: The blocks found in the file.
+    """
     logging.debug(f"{Fore.BLUE}Scanning file: {filename}{Style.RESET_ALL}")
     file_path = os.path.join(project_path, filename)
+    staged = blob_reader.read_staged(filename) if blob_reader is not None else None
+    if staged is not None:
+        digest, buffer = staged
+        # Staged content is not on disk: the blocks read their text from memory
+        return scan_buffer(project_path, file_path, buffer, hunks, cache=cache, parsed_blocks=parsed_blocks,
+                           digest=digest, in_memory=True)
 
-    with open(file_path) as f:
-        lines = f.readlines()
+    buffer = _map_file(file_path)
+    try:
+        return scan_buffer(project_path, file_path, buffer, hunks, cache=cache, parsed_blocks=parsed_blocks)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
 
-    ifft_if_pattern = re.compile(r'#\s*IFFT\.If', re.IGNORECASE)
-    ifft_then_pattern = re.compile(r'#\s*IFFT\.Then\(\s*"([^"]+)"\s*,\s*"([^"]+)"\s*\)', re.IGNORECASE)
 
-    for line_number, line in enumerate(lines, start=1):
-        if ifft_if_pattern.search(line.strip()):
-            in_block = True
-            block_start = line_number
-            block_content += line
-            modified_lines_within_blocks = []
-
-        elif ifft_then_pattern.search(line):
-            match = ifft_then_pattern.search(line)
-            associated_file_name = match.group(1)
-            associated_file_label = match.group(2)
-            valid_associated_file = validate_associated_file(associated_file_name)
-
-            if not valid_associated_file:
-                associated_file_name = ""
-                associated_file_label = ""
-
-            block_end = line_number
-
-            block = IFFTBlock(
-                file_path=file_path,
-                block_content=block_content,
-                associated_file_name=associated_file_name,
-                associated_file_label=associated_file_label,
-                block_start=block_start,
-                block_end=block_end,
-                modified_lines=modified_lines_within_blocks
-            )
-            results.append(block)
-
-            logging.debug(f"{Fore.BLUE}Found IFFTBlock: {block}{Style.RESET_ALL}")
+def scan_buffer(project_path: str, file_path: str, buffer, hunks: list, cache: ScanCache = None,
+                parsed_blocks: list = None, digest: str = None, in_memory: bool = False) -> list[IFFTBlock]:
+    """
+        Build the IFFT blocks of a file content and collect the modified lines within each block.
 
-            in_block = False
-            block_content = ""
+        Args:
+            project_path (str): A string corresponding to the project path, used to validate the targets.
+            file_path (str): The path reported for the blocks.
+            buffer (bytes | mmap): The file content.
+            hunks (list): The hunks of the file, sorted by line (see `parse_diff_lines`).
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+            parsed_blocks (list): Already parsed blocks of the content (see `parse_blocks`).
+            digest (str): The blob hash of the content, when git already gave it.
+            in_memory (bool): Whether the blocks should read their text from `buffer` instead of
+                from `file_path` (e.g. for content that is not on disk).
 
-        elif in_block:
-            block_content += line
-            if (line_number, line.strip()) in modified_lines_set:
-                modified_lines_within_blocks.append(line.strip())
+        Returns:
+            list[IFFTBlock]: The blocks found in the content.
+    """
+    results = []
+    if parsed_blocks is None:
+        parsed_blocks = _parse_buffer(buffer, cache, digest)
+
+    modified_lines_by_block = _modified_lines_by_block(buffer, parsed_blocks, hunks)
+    for parsed, modified_lines in zip(parsed_blocks, modified_lines_by_block):
+        associated_file_name = parsed["associated_file_name"]
+        associated_file_label = parsed["associated_file_label"]
+
+        if not validate_associated_file(associated_file_name, project_path):
+            associated_file_name = ""
+            associated_file_label = ""
+
+        block = IFFTBlock(
+            file_path=file_path,
+            block_content=None,
+            associated_file_name=associated_file_name,
+            associated_file_label=associated_file_label,
+            block_start=parsed["block_start"],
+            block_end=parsed["block_end"],
+            modified_lines=modified_lines,
+            label=parsed["label"],
+            start_offset=parsed["start_offset"],
+            end_offset=parsed["end_offset"],
+            source=buffer if in_memory else None
+        )
+        results.append(block)
+
+        logging.debug(f"{Fore.BLUE}Found IFFTBlock: {block}{Style.RESET_ALL}")
 
     return results
 
@@ -193,9 +544,502 @@ def get_modified_files():
 
 
 
-def scan_files(project_path: str = dir_path_mock_project, auto_mode: argparse.Namespace = None) -> dict:
+def build_reverse_index(results: dict) -> dict:
+    """
+        Index the scanned blocks by the file named in their `#IFFT.Then(...)`.
+
+        Example:
+            >>>build_reverse_index({'app.py': [block1], 'util.py': [block2]})
+            {'file1.py': [block1, block2]}
+
+        Args:
+            results (dict): The dictionary of scan results.
+
+        Returns:
+            dict: A dictionary mapping each target file to the blocks pointing at it.
+    """
+    reverse_index = {}
+    for blocks in results.values():
+        for block in blocks:
+            if block.associated_file_name:
+                target = os.path.normpath(block.associated_file_name)
+                reverse_index.setdefault(target, []).append(block)
+    return reverse_index
+
+
+def mark_satisfied_blocks(results: dict, modified_files) -> dict:
+    """
+        Mark the modified blocks whose target file is part of the same change set as satisfied.
+
+        Args:
+            results (dict): The dictionary of scan results.
+            modified_files (Iterable[str]): The files modified in the change set.
+
+        Returns:
+            dict: The reverse index built from the results (see `build_reverse_index`).
+    """
+    reverse_index = build_reverse_index(results)
+    modified_files = {os.path.normpath(filename) for filename in modified_files}
+
+    for target, blocks in reverse_index.items():
+        if target not in modified_files:
+            continue
+        for block in blocks:
+            if block.status == STATUS_MODIFIED:
+                block.status = STATUS_SATISFIED
+                logging.info(f"{Fore.YELLOW}Block {block.block_start}-{block.block_end} of {block.file_path} "
+                             f"is satisfied: {target} was also modified{Style.RESET_ALL}")
+
+    return reverse_index
+
+
+def _index_blocks(label_index: LabelIndex, filename: str, blocks: list) -> None:
+    """Record the labels and the validated targets of a file's blocks in the label index."""
+    labels = [(block.label, block.block_start, block.block_end) for block in blocks if block.label]
+    targets = [(block.associated_file_name, block.associated_file_label, block.block_start, block.block_end)
+               for block in blocks if block.associated_file_name]
+    label_index.update_file(filename, labels, targets)
+
+
+def _index_parsed_blocks(label_index: LabelIndex, project_path: str, filename: str, parsed_blocks: list) -> None:
+    """Record the labels and the existing targets of a file's parsed blocks in the label index."""
+    tracked_paths = tracked_paths_for(project_path)
+    labels = [(parsed["label"], parsed["block_start"], parsed["block_end"])
+              for parsed in parsed_blocks if parsed["label"]]
+    targets = [(parsed["associated_file_name"], parsed["associated_file_label"], parsed["block_start"], parsed["block_end"])
+               for parsed in parsed_blocks
+               if tracked_paths.exists(parsed["associated_file_name"], record_missing=False)]
+    label_index.update_file(filename, labels, targets)
+
+
+def sync_label_index(repo: "Repo", label_index: LabelIndex, project_path: str, cache: ScanCache = None) -> None:
+    """
+        Bring the label index up to date with the commit checked out in the repository.
+
+        The first time, every tracked Python file is indexed. Afterwards only the files
+        changed between the commit the index was built from and `HEAD` are re-indexed,
+        so keeping the index current never requires a full-repo scan. The files that
+        differ from `HEAD` now, and those a previous run indexed while they did (the
+        overlay), are read again too, so a discarded edit does not stay in the index.
+
+        Args:
+            repo (Repo): The repository being scanned.
+            label_index (LabelIndex): The label index to update.
+            project_path (str): A string corresponding to the project path.
+            cache (ScanCache): Optional cache of parsed blocks keyed by blob hash.
+    """
+    from git import GitCommandError
+
+    try:
+        head = repo.head.commit.hexsha
+    except ValueError:
+        head = None
+
+    # Working tree and index against HEAD: the files whose content is not the committed one
+    dirty_files = set(repo.git.diff('--name-only', '--no-renames', '-z', 'HEAD').split('\0')) - {''} if head else set()
+
+    changed_files = None
+    if not label_index.is_empty() and label_index.head == head:
+        changed_files = []
+    elif not label_index.is_empty() and label_index.head and head:
+        try:
+            changed_files = repo.git.diff('--name-only', '--no-renames', '-z', label_index.head, head).split('\0')
+        except GitCommandError:
+            logging.info(f"{Fore.YELLOW}Label index commit {label_index.head} is gone, rebuilding the index.{Style.RESET_ALL}")
+
+    if changed_files is None:
+        for filename in list(label_index.files):
+            label_index.remove_file(filename)
+        changed_files = repo.git.ls_files('-z', '--', '*.py').split('\0') if head else []
+
+    for filename in set(changed_files) | label_index.overlay | dirty_files:
+        if not filename.endswith(".py"):
+            continue
+        file_path = os.path.join(project_path, filename)
+        if not os.path.isfile(file_path):
+            label_index.remove_file(filename)
+            continue
+
+        _index_parsed_blocks(label_index, project_path, filename, _read_parsed_blocks(file_path, cache))
+
+    label_index.set_overlay(dirty_files)
+    label_index.set_head(head)
+
+
+def _resolve_target(label_index: LabelIndex, target_file: str, label: str, other_roots: dict = None):
+    """Resolve a target in the label index of its own root, or in the one of the other root it lands in."""
+    definition = label_index.resolve(target_file, label)
+    if definition is None and other_roots:
+        target_file = os.path.normpath(target_file)
+        for root_path, other_index in other_roots.items():
+            if target_file.startswith(root_path + os.sep):
+                return other_index.resolve(os.path.relpath(target_file, root_path), label)
+    return definition
+
+
+def report_label_issues(results: dict, label_index: LabelIndex, other_roots: dict = None) -> tuple:
+    """
+        Check the `#IFFT.Then(file, label)` targets and the labels of the scanned blocks.
+
+        Args:
+            results (dict): The dictionary of scan results.
+            label_index (LabelIndex): An up to date label index.
+            other_roots (dict): The label indexes of the other roots scanned in the same run, by
+                path relative to this root (e.g. `../billing`), to resolve cross-root targets.
+
+        Returns:
+            tuple: The list of dangling targets (see `LabelIndex.dangling_targets`) and the
+                dictionary of duplicated labels defined by the scanned blocks, JSON serializable.
+    """
+    dangling = []
+    duplicates = {}
+    for filename, blocks in results.items():
+        for block in blocks:
+            if block.associated_file_name and _resolve_target(label_index, block.associated_file_name,
+                                                              block.associated_file_label, other_roots) is None:
+                dangling.append({
+                    "file": filename,
+                    "block_start": block.block_start,
+                    "block_end": block.block_end,
+                    "associated_file_name": block.associated_file_name,
+                    "associated_file_label": block.associated_file_label
+                })
+
+            definitions = label_index.definitions(block.label) if block.label else []
+            if len(definitions) > 1 and block.label not in duplicates:
+                duplicates[block.label] = definitions
+
+    log_label_issues(dangling, duplicates)
+    return dangling, duplicates
+
+
+def log_label_issues(dangling: list, duplicates: dict) -> None:
+    """Log the label issues found by `report_label_issues`, e.g. those the daemon sends back with its results."""
+    for target in dangling:
+        logging.warning(f"{Fore.RED}Block {target['block_start']}-{target['block_end']} of {target['file']} points at "
+                        f"label '{target['associated_file_label']}', which is not defined in "
+                        f"{target['associated_file_name']}{Style.RESET_ALL}")
+    for label, definitions in duplicates.items():
+        places = ", ".join(f"{d['file']}:{d['block_start']}" for d in definitions)
+        logging.warning(f"{Fore.RED}Label '{label}' is defined more than once: {places}{Style.RESET_ALL}")
+
+
+def read_daemon_answer(project_path: str, answer: dict) -> dict:
+    """
+        Rebuild the results of a check answered by the daemon and report its label issues, as a local scan would.
+
+        Args:
+            project_path (str): A string corresponding to the project path.
+            answer (dict): The answer of the daemon, with the serialized `results` and the
+                `label_issues` (missing targets, dangling targets and duplicated labels).
+
+        Returns:
+            dict: The dictionary of results, as returned by `scan_files`.
+    """
+    label_issues = answer.get("label_issues") or {}
+    tracked_paths = tracked_paths_for(project_path)
+    tracked_paths.merge_missing(label_issues.get("missing_targets") or {})
+    tracked_paths.report_missing()
+    log_label_issues(label_issues.get("dangling_targets") or [], label_issues.get("duplicated_labels") or {})
+    return {filename: [IFFTBlock.from_dict(block) for block in blocks] for filename, blocks in answer["results"].items()}
+
+
+def report_block_changes(results: dict, auto_mode: bool = False) -> int:
+    """
+        Print the IFFT blocks changed by a scan and compute the exit code of the check.
+
+        Blocks whose associated file was modified too are reported as satisfied and
+        do not fail the check. In auto mode the report stops at the first violation,
+        so when the results come from `iter_scan_files` the remaining files are not
+        even scanned.
+
+        Args:
+            results (dict | Iterable[tuple]): The dictionary of scan results, or an iterable
+                of `(file, blocks)` pairs such as `iter_scan_files(...)`.
+            auto_mode (bool): Whether to stop at the first modified block.
+
+        Returns:
+            int: 1 if a block was modified without its associated file, 0 otherwise.
+    """
+    changes_detected = False
+    satisfied_blocks = 0
+    for file, blocks in (results.items() if isinstance(results, dict) else results):
+        for block in blocks:
+            if block.status == STATUS_SATISFIED:
+                print(f"{Fore.GREEN}Change identified inside an IFFT block in {file}, "
+                      f"its associated file {block.associated_file_name} was also modified.{Style.RESET_ALL}")
+                satisfied_blocks += 1
+            elif block.status == STATUS_MODIFIED:
+                print(f"{Fore.BLUE}Change identified inside an IFFT block in {file}:\n {Style.RESET_ALL}")
+                print("\n")
+                print(f"Modified lines within the block: {block.modified_lines}")
+                print(f"Should also modify: {block.associated_file_name}\nBlock label: {block.associated_file_label} \n")
+                changes_detected = True
+                if auto_mode:
+                    return 1
+
+    if changes_detected:
+        return 1
+
+    if satisfied_blocks:
+        print(f"No pending changes in IFFT blocks ({satisfied_blocks} satisfied block(s))")
+        return 0
+
+    print("No changes detected in IFFT blocks")
+    return 0
+
+
+# Below this many Python files the process pool startup costs more than it saves.
+PARALLEL_SCAN_MIN_FILES = 64
+
+# Per project root, in each worker process
+_worker_caches = {}
+_worker_blob_readers = {}
+
+
+def _init_scan_worker(cache_entries: dict, blob_reader_paths: dict):
+    """
+        Give each worker process a private copy of the scan cache of every project root and,
+        for the roots whose staged content is scanned, its own blob readers.
+    """
+    for project_path, entries in cache_entries.items():
+        cache = _worker_caches[project_path] = ScanCache()
+        cache.entries.update(entries)
+    for project_path, working_tree_dir in blob_reader_paths.items():
+        _worker_blob_readers[project_path] = StagedBlobReader(working_tree_dir)
+
+
+def _scan_file_job(job: tuple) -> tuple:
+    """Scan one file in a worker process and return the blocks, the cache activity and the missing targets."""
+    project_path, filename, hunks = job
+    tracked_paths = tracked_paths_for(project_path)
+    blob_reader = _worker_blob_readers.get(project_path)
+    cache = _worker_caches.get(project_path)
+    if cache is None:
+        file_results = scan_file(project_path, filename, hunks, blob_reader=blob_reader)
+        missing, tracked_paths.missing = tracked_paths.missing, {}
+        return file_results, {}, 0, 0, missing
+
+    cache.new_entries, cache.hits, cache.misses = {}, 0, 0
+    file_results = scan_file(project_path, filename, hunks, cache=cache, blob_reader=blob_reader)
+    missing, tracked_paths.missing = tracked_paths.missing, {}
+    return file_results, cache.new_entries, cache.hits, cache.misses, missing
+
+
+def _scan_file_jobs(scan_jobs: list, jobs: int, caches: dict = None, blob_readers: dict = None):
+    """
+        Scan a list of `(project_path, filename, hunks)` jobs, possibly from several project roots.
+
+        The jobs are spread over a process pool when there are enough of them,
+        otherwise they are scanned serially. The results are yielded in the
+        order of `scan_jobs` either way, as soon as they are available; closing
+        the generator early cancels the files not scanned yet.
+
+        Args:
+            scan_jobs (list): The files to scan.
+            jobs (int): The number of worker processes, `0` meaning one per CPU.
+            caches (dict): Optional cache of parsed blocks keyed by blob hash, for each project root.
+            blob_readers (dict): Optional reader of the staged content, for each project root;
+                each worker process starts its own.
+
+        Yields:
+            list: The list of blocks found in each file.
+    """
+    caches = caches or {}
+    blob_readers = blob_readers or {}
+    jobs = jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(scan_jobs) < PARALLEL_SCAN_MIN_FILES:
+        for project_path, filename, hunks in scan_jobs:
+            yield scan_file(project_path, filename, hunks, cache=caches.get(project_path),
+                            blob_reader=blob_readers.get(project_path))
+        return
+
+    logging.info(f"{Fore.YELLOW}Scanning {len(scan_jobs)} files with {jobs} workers{Style.RESET_ALL}")
+    cache_entries = {project_path: cache.entries for project_path, cache in caches.items() if cache is not None}
+    blob_reader_paths = {project_path: blob_reader.project_path for project_path, blob_reader in blob_readers.items()
+                         if blob_reader is not None}
+    chunksize = max(1, len(scan_jobs) // (jobs * 4))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_scan_worker,
+                                   initargs=(cache_entries, blob_reader_paths))
+    try:
+        results = executor.map(_scan_file_job, scan_jobs, chunksize=chunksize)
+        for (project_path, _, _), (file_results, new_entries, hits, misses, missing) in zip(scan_jobs, results):
+            cache = caches.get(project_path)
+            if cache is not None:
+                cache.merge(new_entries, hits=hits, misses=misses)
+            if missing:
+                tracked_paths_for(project_path).merge_missing(missing)
+            yield file_results
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _RootScan:
+    """The state of the scan of one project root: its diff, cache, label index and blob reader."""
+
+    def __init__(self, project_path, repo, auto_mode, use_cache, hunks_by_file=None, blob_reader=None):
+        self.project_path = project_path
+        self.cache = ScanCache.for_git_dir(repo.git_dir) if use_cache else None
+        self.hunks_by_file = hunks_by_file if hunks_by_file is not None else get_modified_lines_by_file(repo, auto_mode)
+        self.modified_files = list(self.hunks_by_file)
+        logging.info(f"{Fore.YELLOW}Modified files found: {self.modified_files}{Style.RESET_ALL}")
+
+        self.scan_jobs = [(project_path, filename, self.hunks_by_file[filename])
+                          for filename in self.modified_files if filename.endswith(".py")]
+        self.label_index = LabelIndex.for_git_dir(repo.git_dir) if use_cache else None
+        if self.label_index is not None:
+            sync_label_index(repo, self.label_index, project_path, self.cache)
+        if blob_reader is None and auto_mode:
+            blob_reader = StagedBlobReader(repo.working_tree_dir)
+        self.blob_reader = blob_reader
+        self.results = {}
+
+    def add_modified_files_of(self, other):
+        """Count the files changed in another root, as paths relative to this one, for cross-root targets."""
+        self.modified_files.extend(os.path.relpath(os.path.join(other.project_path, filename), self.project_path)
+                                   for filename in other.hunks_by_file)
+
+    def record(self, filename, file_results):
+        """Index the blocks of a scanned file and mark the satisfied ones."""
+        if self.label_index is not None:
+            _index_blocks(self.label_index, filename, file_results)
+        if file_results:
+            mark_satisfied_blocks({filename: file_results}, self.modified_files)
+            self.results[filename] = file_results
+
+    def other_label_indexes(self, roots):
+        """Map the label indexes of the other roots to their path relative to this one."""
+        return {os.path.normpath(os.path.relpath(other.project_path, self.project_path)): other.label_index
+                for other in roots if other is not self and other.label_index is not None}
+
+    def finish(self, completed, other_roots=None):
+        """Report what only a complete scan can tell and save the cache and the label index."""
+        if self.blob_reader is not None:
+            self.blob_reader.close()
+        tracked_paths_for(self.project_path).report_missing()
+        if self.label_index is not None:
+            if completed:
+                report_label_issues(self.results, self.label_index, other_roots)
+            self.label_index.save()
+
+        if self.cache is not None:
+            logging.info(f"{Fore.YELLOW}Scan cache: {self.cache.hits} hits, {self.cache.misses} misses{Style.RESET_ALL}")
+            self.cache.save()
+
+
+def _open_repo(project_path: str):
+    """Open the repository of a project root, logging why it cannot be scanned otherwise."""
+    from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+
+    try:
+        repo = Repo(project_path)
+        logging.info(f"{Fore.YELLOW}Scanning Git repository: {project_path}{Style.RESET_ALL}")
+        return repo
+    except NoSuchPathError:
+        logging.error(f"{Fore.RED}The path '{project_path}' does not exist.{Style.RESET_ALL}")
+    except InvalidGitRepositoryError:
+        logging.warning(f"{Fore.YELLOW}The path '{project_path}' is not a valid Git repository. Skipping Git-specific checks.{Style.RESET_ALL}")
+    except Exception as e:
+        logging.error(f"{Fore.RED}An unexpected error occurred: {e}{Style.RESET_ALL}")
+    return None
+
+
+def iter_scan_roots(project_paths: list, auto_mode: bool = False, use_cache: bool = True, jobs: int = 1):
+    """
+        Scan several project roots (e.g. service repositories checked out side by side) in one pass.
+
+        The diffs of every root are taken first, then the modified Python files of all
+        roots share one list of jobs, and so one worker pool. A block whose
+        `#IFFT.Then` target lives in another root (e.g. `../billing/api.py`) is
+        satisfied when that file is modified in the same run.
+
+        Args:
+            project_paths (list): The project roots.
+            auto_mode (bool): Whether to scan the staged (auto mode) or the unstaged changes.
+            use_cache (bool): Whether to reuse the parsed blocks and the label index stored
+                in `.git/ifft-cache` of each root.
+            jobs (int): Number of worker processes used to scan the files, `0` meaning one per CPU.
+
+        Yields:
+            tuple: The project root, the file name and its list of IFFTBlock, for each scanned
+                file containing blocks.
+    """
+    forget_tracked_paths()
+    roots = {}
+    for project_path in project_paths:
+        repo = _open_repo(project_path)
+        if repo is not None and project_path not in roots:
+            roots[project_path] = _RootScan(project_path, repo, auto_mode, use_cache)
+
+    for root in roots.values():
+        for other in roots.values():
+            if other is not root:
+                root.add_modified_files_of(other)
+
+    scan_jobs = [job for root in roots.values() for job in root.scan_jobs]
+    scan = _scan_file_jobs(scan_jobs, jobs, caches={path: root.cache for path, root in roots.items()},
+                           blob_readers={path: root.blob_reader for path, root in roots.items()})
+    completed = False
+    try:
+        for (project_path, filename, _), file_results in zip(scan_jobs, scan):
+            roots[project_path].record(filename, file_results)
+            if file_results:
+                yield project_path, filename, file_results
+        completed = True
+    finally:
+        scan.close()
+        # Every root is indexed by now, so a target in another root resolves against its index
+        for root in roots.values():
+            root.finish(completed, root.other_label_indexes(roots.values()))
+
+
+def iter_scan_files(project_path: str = None, auto_mode: bool = False, use_cache: bool = True,
+                    jobs: int = 1):
+    """
+        Scan the repository for modified Python files and yield the blocks of each file as soon as it is scanned.
+
+        The statuses of the yielded blocks are final: the modified files are known from
+        the diff before the first file is scanned. The cache and the label index are
+        saved when the generator finishes or is closed, so a caller can stop at the first
+        block it cares about (e.g. the first violation in auto mode) without losing them.
+        Dangling targets and duplicated labels are only reported after a complete scan.
+        In auto mode the files with unstaged edits are read from the index, through one
+        `git cat-file --batch` process, so what is scanned is exactly what is being committed.
+
+        Example:
+            >>>for filename, blocks in iter_scan_files(project_path, auto_mode=True):
+            ...    if any(block.status == STATUS_MODIFIED for block in blocks):
+            ...        break
+
+        Args:
+            project_path (str): A string corresponding to the project path, the configured
+                project root by default.
+            auto_mode (bool): Whether to scan the staged (auto mode) or the unstaged changes.
+            use_cache (bool): Whether to reuse the parsed blocks and the label index stored
+                in `.git/ifft-cache`.
+            jobs (int): Number of worker processes used to scan the files, `0` meaning one per CPU.
+
+        Yields:
+            tuple: The file name and its list of IFFTBlock, for each scanned file containing blocks.
+    """
+    scan = iter_scan_roots([project_path or get_project_root()], auto_mode=auto_mode, use_cache=use_cache, jobs=jobs)
+    try:
+        for _, filename, file_results in scan:
+            yield filename, file_results
+    finally:
+        scan.close()
+
+
+def scan_files(project_path: str = None, auto_mode: bool = False, use_cache: bool = True,
+               jobs: int = 1) -> dict:
     """
         Scan the repository for modified Python files and return the results in a dictionary.
+
+        This collects everything `iter_scan_files` yields, for the consumers that need the
+        complete results (e.g. the web UI results file).
         
         Example:
             >>>file1.py:\n
@@ -222,44 +1066,16 @@ def scan_files(project_path: str = dir_path_mock_project, auto_mode: argparse.Na
                                'modified_lines_within_block': {'line4', 'line5', 'line6'}}]}
         
         Args:
-            project_path (str): A string corresponding to the project path.
+            project_path (str): A string corresponding to the project path, the configured
+                project root by default.
+            auto_mode (bool): Whether to scan the staged (auto mode) or the unstaged changes.
+            use_cache (bool): Whether to reuse the parsed blocks and the label index stored
+                in `.git/ifft-cache`.
+            jobs (int): Number of worker processes used to scan the files, `0` meaning one per CPU.
 
         Returns:
             dict: A dictionary of results.
 
     """
 
-    results_dict = {}
-    try:
-        repo = Repo(project_path)
-        logging.info(f"{Fore.YELLOW}Scanning Git repository: {project_path}{Style.RESET_ALL}")
-    except NoSuchPathError:
-        logging.error(f"{Fore.RED}The path '{project_path}' does not exist.{Style.RESET_ALL}")
-        return results_dict
-    except InvalidGitRepositoryError:
-        logging.warning(f"{Fore.ORANGE}The path '{project_path}' is not a valid Git repository. Skipping Git-specific checks.{Style.RESET_ALL}")
-        # Optionally return or skip additional scanning logic for non-Git directories
-        return results_dict
-    except Exception as e:
-        logging.error(f"{Fore.RED}An unexpected error occurred: {e}{Style.RESET_ALL}")
-        return results_dict
-
-    modified_files = []
-    if not auto_mode:
-        modified_files = [item.a_path for item in repo.index.diff(None)]
-    else:
-        result = subprocess.run(['git', 'diff', '--cached', '--name-only', '--diff-filter=ACM'], capture_output=True, text=True)
-        modified_files = result.stdout.splitlines()
-
-    logging.info(f"{Fore.YELLOW}Modified files found: {modified_files}{Style.RESET_ALL}")
-
-    for filename in modified_files:
-        if filename.endswith(".py"):
-            logging.info(f"{Fore.YELLOW}Scanning file: {filename}{Style.RESET_ALL}")
-            modified_lines_set = get_modified_lines(repo, filename, auto_mode)
-            file_results = scan_file(project_path, filename, modified_lines_set)
-            if file_results:
-                results_dict[filename] = file_results
-
-    return results_dict
-
+    return dict(iter_scan_files(project_path=project_path, auto_mode=auto_mode, use_cache=use_cache, jobs=jobs))
@@ -0,0 +1,203 @@
+# ifft_core/label_index.py
+
+"""Label index
+
+Keeps track of every `#IFFT.If(label)` defined in the project and of every
+`#IFFT.Then(file, label)` pointing at one, so a target can be resolved to its
+counterpart block with a dictionary lookup. The index is stored next to the
+scan cache (`.git/ifft-cache/label_index.json`) and is updated file by file.
+
+The index follows `HEAD`, but scans also record the working-tree or staged
+content of the files they scan. Those files are kept in an overlay set, so the
+next synchronization reads them again even if `HEAD` did not move (e.g. after
+the edit was discarded with `git checkout -- <file>`).
+
+"""
+
+import json
+import logging
+import os
+
+from colorama import Fore, Style
+
+from ifft_core.scan_cache import CACHE_DIR_NAME
+
+LABEL_INDEX_VERSION = 2
+LABEL_INDEX_FILE_NAME = "label_index.json"
+
+
+class LabelIndex:
+    def __init__(self, index_dir=None):
+        self.index_file = os.path.join(index_dir, LABEL_INDEX_FILE_NAME) if index_dir else None
+        self.head = None
+        self.files = {}
+        # Files whose indexed content may differ from `HEAD`
+        self.overlay = set()
+        self._definitions = {}
+        self._labels = {}
+        self._dirty = False
+
+        self._load()
+
+    @classmethod
+    def for_git_dir(cls, git_dir):
+        """Open the label index stored in the `ifft-cache` folder of a git directory."""
+        return cls(os.path.join(git_dir, CACHE_DIR_NAME))
+
+    def _load(self):
+        """Load the index file, discarding it if it was written by another index version."""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return
+
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"{Fore.YELLOW}Ignoring unreadable label index {self.index_file}: {e}{Style.RESET_ALL}")
+            return
+
+        if data.get("version") != LABEL_INDEX_VERSION:
+            logging.info(f"{Fore.YELLOW}Label index version changed, rebuilding it.{Style.RESET_ALL}")
+            return
+
+        self.head = data.get("head")
+        self.overlay = set(data.get("overlay", []))
+        for filename, record in data.get("files", {}).items():
+            self._add_file(filename, record)
+
+    def _add_file(self, filename, record):
+        """Register the labels defined in a file in the lookup tables."""
+        self.files[filename] = record
+        for label, block_start, block_end in record["labels"]:
+            definition = {"file": filename, "label": label, "block_start": block_start, "block_end": block_end}
+            self._definitions[(filename, label)] = definition
+            self._labels.setdefault(label, []).append(definition)
+
+    def set_head(self, head):
+        """Record the commit the indexed files were last synchronized with."""
+        if head != self.head:
+            self.head = head
+            self._dirty = True
+
+    def set_overlay(self, filenames):
+        """Replace the set of files whose indexed content may differ from `HEAD`."""
+        filenames = {os.path.normpath(filename) for filename in filenames}
+        if filenames != self.overlay:
+            self.overlay = filenames
+            self._dirty = True
+
+    def is_empty(self):
+        """Whether the index was never built."""
+        return self.head is None and not self.files
+
+    def remove_file(self, filename):
+        """
+        Forget the labels and targets of a file.
+
+        Args:
+            filename (str): The file path, relative to the project root.
+        """
+        filename = os.path.normpath(filename)
+        record = self.files.pop(filename, None)
+        if record is None:
+            return
+
+        for label, _, _ in record["labels"]:
+            self._definitions.pop((filename, label), None)
+            remaining = [d for d in self._labels.get(label, []) if d["file"] != filename]
+            if remaining:
+                self._labels[label] = remaining
+            else:
+                self._labels.pop(label, None)
+        self._dirty = True
+
+    def update_file(self, filename, labels, targets):
+        """
+        Replace what the index knows about a file.
+
+        The file joins the overlay until the next synchronization with `HEAD` finds it clean.
+
+        Args:
+            filename (str): The file path, relative to the project root.
+            labels (list): `(label, block_start, block_end)` of each block defined in the file.
+            targets (list): `(associated_file_name, associated_file_label, block_start, block_end)`
+                of each block of the file.
+        """
+        filename = os.path.normpath(filename)
+        self.remove_file(filename)
+        self.overlay.add(filename)
+        if labels or targets:
+            self._add_file(filename, {
+                "labels": [list(label) for label in labels],
+                "targets": [list(target) for target in targets]
+            })
+        self._dirty = True
+
+    def resolve(self, target_file, label):
+        """
+        Find the block a `#IFFT.Then(target_file, label)` points at.
+
+        Example:
+            >>>index.resolve("file1.py", "foo1_related_block")
+            {'file': 'file1.py', 'label': 'foo1_related_block', 'block_start': 1, 'block_end': 5}
+
+        Args:
+            target_file (str): The associated file name, relative to the project root.
+            label (str): The associated file label.
+
+        Returns:
+            dict: The definition of the target block, or None if it does not exist.
+        """
+        return self._definitions.get((os.path.normpath(target_file), label))
+
+    def definitions(self, label):
+        """Return every place where a label is defined."""
+        return self._labels.get(label, [])
+
+    def duplicate_labels(self):
+        """
+        Find the labels defined by more than one block.
+
+        Returns:
+            dict: A dictionary mapping each duplicated label to its definitions.
+        """
+        return {label: definitions for label, definitions in self._labels.items() if len(definitions) > 1}
+
+    def dangling_targets(self):
+        """
+        Find the `#IFFT.Then(file, label)` targets that do not resolve to any block.
+
+        Returns:
+            list[dict]: The file and line range of each dangling target.
+        """
+        dangling = []
+        for filename, record in self.files.items():
+            for target_file, target_label, block_start, block_end in record["targets"]:
+                if self.resolve(target_file, target_label) is None:
+                    dangling.append({
+                        "file": filename,
+                        "block_start": block_start,
+                        "block_end": block_end,
+                        "associated_file_name": target_file,
+                        "associated_file_label": target_label
+                    })
+        return dangling
+
+    def save(self):
+        """Write the index back to disk if it changed, replacing the old file atomically."""
+        if not self.index_file or not self._dirty:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                f.write(json.dumps({"version": LABEL_INDEX_VERSION, "head": self.head,
+                                    "overlay": sorted(self.overlay), "files": self.files}))
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"{Fore.YELLOW}Could not save label index {self.index_file}: {e}{Style.RESET_ALL}")
+
+    def __repr__(self):
+        return f"LabelIndex(files={len(self.files)}, labels={len(self._labels)}, head={self.head})"
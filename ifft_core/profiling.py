@@ -0,0 +1,207 @@
+# ifft_core/profiling.py
+
+"""Per-phase profiling
+
+`ifft.py --profile` wraps the main phases of a run (git diff, file scanning,
+block parsing, associated-file validation, JSON serialization) to record their
+wall time, call count and the number of bytes they processed, then prints a
+breakdown table and optionally writes the metrics as JSON.
+
+Nothing is wrapped unless `enable()` is called, so a regular run does not pay
+for the instrumentation at all. Times are inclusive: `scan_files` contains the
+time of the phases it calls, and `iter_scan_files` only counts the time spent
+inside the generator. With `--jobs`, files scanned in worker processes
+only show up in the time of `scan_files`.
+
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+
+from colorama import Fore, Style
+
+
+def _scanned_file_bytes(args, kwargs, result):
+    """Size of the file scanned by `scan_file(project_path, filename, ...)`."""
+    project_path = kwargs.get("project_path", args[0] if args else "")
+    filename = kwargs.get("filename", args[1] if len(args) > 1 else "")
+    try:
+        return os.path.getsize(os.path.join(project_path, filename))
+    except OSError:
+        return 0
+
+
+def _buffer_bytes(args, kwargs, result):
+    """Size of the buffer parsed by `parse_blocks(buffer)`."""
+    return len(kwargs.get("buffer", args[0] if args else b""))
+
+
+def _output_file_bytes(args, kwargs, result):
+    """Size of the JSON written by `save_results_to_file(results, output_file)`."""
+    output_file = kwargs.get("output_file", args[1] if len(args) > 1 else "ifft_results.json")
+    try:
+        return os.path.getsize(output_file)
+    except OSError:
+        return 0
+
+
+# (module, function, how to count the bytes it processed)
+PROFILED_FUNCTIONS = [
+    ("ifft_core.ifft_parser", "scan_files", None),
+    ("ifft_core.ifft_parser", "iter_scan_files", None),
+    ("ifft_core.ifft_parser", "get_modified_lines_by_file", None),
+    ("ifft_core.ifft_parser", "get_modified_lines", None),
+    ("ifft_core.ifft_parser", "sync_label_index", None),
+    ("ifft_core.ifft_parser", "scan_file", _scanned_file_bytes),
+    ("ifft_core.ifft_parser", "parse_blocks", _buffer_bytes),
+    ("ifft_core.ifft_parser", "validate_associated_file", None),
+    ("ifft_core.ifft_parser", "save_results_to_file", _output_file_bytes),
+]
+
+
+class Profiler:
+    def __init__(self):
+        self.metrics = {}
+        self.started_at = time.perf_counter()
+        self._originals = []
+
+    def record(self, name, seconds, processed_bytes=0):
+        """
+        Add one call to the metrics of a phase.
+
+        Args:
+            name (str): The phase name.
+            seconds (float): The wall time of the call.
+            processed_bytes (int): The number of bytes the call processed.
+        """
+        metric = self.metrics.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+        metric["calls"] += 1
+        metric["seconds"] += seconds
+        metric["bytes"] += processed_bytes
+
+    def wrap(self, name, function, count_bytes=None):
+        """Return `function` wrapped to record its calls under `name`."""
+        profiler = self
+
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                # Only the time spent inside the generator counts, not the time its consumer takes
+                generator = function(*args, **kwargs)
+                elapsed = 0.0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        yield item
+                finally:
+                    start = time.perf_counter()
+                    generator.close()
+                    profiler.record(name, elapsed + time.perf_counter() - start)
+
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                profiler.record(name, time.perf_counter() - start)
+                raise
+            elapsed = time.perf_counter() - start
+            profiler.record(name, elapsed, count_bytes(args, kwargs, result) if count_bytes else 0)
+            return result
+
+        return wrapper
+
+    def instrument(self, namespaces=()):
+        """
+        Wrap every function of PROFILED_FUNCTIONS in place.
+
+        Args:
+            namespaces (Iterable[dict]): Other namespaces holding references to the same functions,
+                e.g. the globals of a script that imported them with `from ... import`.
+        """
+        for module_name, function_name, count_bytes in PROFILED_FUNCTIONS:
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = __import__(module_name, fromlist=[function_name])
+            original = getattr(module, function_name)
+            wrapper = self.wrap(function_name, original, count_bytes)
+
+            self._originals.append((vars(module), function_name, original))
+            setattr(module, function_name, wrapper)
+            for namespace in namespaces:
+                if namespace.get(function_name) is original:
+                    self._originals.append((namespace, function_name, original))
+                    namespace[function_name] = wrapper
+
+    def uninstrument(self):
+        """Put the original functions back."""
+        for namespace, function_name, original in reversed(self._originals):
+            namespace[function_name] = original
+        self._originals = []
+
+    def report(self):
+        """
+        Build the metrics of the run.
+
+        Returns:
+            dict: The total wall time and the calls, seconds and bytes of each phase.
+        """
+        return {
+            "total_seconds": time.perf_counter() - self.started_at,
+            "phases": {name: dict(metric) for name, metric in self.metrics.items()},
+        }
+
+    def print_table(self):
+        """Print the per-phase breakdown, slowest phase first."""
+        report = self.report()
+        total = report["total_seconds"] or 1e-9
+
+        print(f"{Fore.YELLOW}IFFT profile ({report['total_seconds'] * 1000:.1f} ms total){Style.RESET_ALL}")
+        print(f"{'phase':<28}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'KiB':>10}{'% run':>8}")
+        for name, metric in sorted(report["phases"].items(), key=lambda item: item[1]["seconds"], reverse=True):
+            mean = metric["seconds"] / metric["calls"] if metric["calls"] else 0.0
+            print(f"{name:<28}{metric['calls']:>8}{metric['seconds'] * 1000:>12.2f}{mean * 1000:>10.3f}"
+                  f"{metric['bytes'] / 1024:>10.1f}{metric['seconds'] / total * 100:>7.1f}%")
+
+    def save(self, output_file):
+        """Write the metrics of the run to a JSON file."""
+        try:
+            with open(output_file, "w") as f:
+                json.dump(self.report(), f, indent=4)
+            logging.info(f"{Fore.YELLOW}Profile metrics saved to {output_file}{Style.RESET_ALL}")
+        except OSError as e:
+            logging.error(f"{Fore.RED}Failed to save profile metrics: {e}{Style.RESET_ALL}")
+
+
+def enable(namespaces=()):
+    """
+    Start profiling the phases of PROFILED_FUNCTIONS.
+
+    Example:
+        >>>profiler = enable([globals()])
+        >>>main()
+        >>>profiler.print_table()
+
+    Args:
+        namespaces (Iterable[dict]): Other namespaces holding references to the profiled functions.
+
+    Returns:
+        Profiler: The profiler collecting the metrics.
+    """
+    profiler = Profiler()
+    profiler.instrument(namespaces)
+    return profiler
@@ -0,0 +1,154 @@
+# ifft_core/scan_cache.py
+
+"""Persistent scan cache
+
+Maps the git blob hash of a scanned file to the IFFT blocks parsed from it
+(boundaries, labels and targets), so files that did not change since the last
+run are not parsed again. The cache lives under `.git/ifft-cache` and is bounded
+by a least-recently-used eviction policy.
+
+Lookups only reorder the entries in memory: the file is rewritten when entries
+are added or evicted, and the order of the hits is saved along with them. A run
+where every lookup hits does not write anything.
+
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+
+from colorama import Fore, Style
+
+CACHE_VERSION = 2
+CACHE_DIR_NAME = "ifft-cache"
+CACHE_FILE_NAME = "scan_cache.json"
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def blob_sha(data: bytes) -> str:
+    """
+        Compute the git blob hash of a file content without calling git.
+
+        Example:
+            >>>blob_sha(b"")
+            'e69de29bb2d1d6434b8b29ae775ad8c2e48c5391'
+
+        Args:
+            data (bytes): The raw file content.
+
+        Returns:
+            str: The hexadecimal SHA-1 git would assign to the blob.
+    """
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ScanCache:
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_file = os.path.join(cache_dir, CACHE_FILE_NAME) if cache_dir else None
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        self._load()
+
+    @classmethod
+    def for_git_dir(cls, git_dir, max_entries=DEFAULT_MAX_ENTRIES):
+        """Open the cache stored in the `ifft-cache` folder of a git directory."""
+        return cls(os.path.join(git_dir, CACHE_DIR_NAME), max_entries=max_entries)
+
+    def _load(self):
+        """Load the cache file, discarding it if it was written by another cache version."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"{Fore.YELLOW}Ignoring unreadable scan cache {self.cache_file}: {e}{Style.RESET_ALL}")
+            return
+
+        if data.get("version") != CACHE_VERSION:
+            logging.info(f"{Fore.YELLOW}Scan cache version changed, starting from an empty cache.{Style.RESET_ALL}")
+            self._dirty = True
+            return
+
+        self.entries = OrderedDict(data.get("entries", []))
+
+    def get(self, digest):
+        """
+        Look up the parsed blocks of a blob.
+
+        Args:
+            digest (str): The blob hash of the file content.
+
+        Returns:
+            list: The cached parsed blocks, or None on a cache miss.
+        """
+        blocks = self.entries.get(digest)
+        if blocks is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # Saved with the next added entry, not worth a rewrite on its own
+        self.entries.move_to_end(digest)
+        return blocks
+
+    def put(self, digest, blocks):
+        """
+        Store the parsed blocks of a blob, evicting the least recently used entries.
+
+        Args:
+            digest (str): The blob hash of the file content.
+            blocks (list): The parsed blocks of the file.
+        """
+        if self.entries.get(digest) == blocks:
+            self.entries.move_to_end(digest)
+            return
+        self.entries[digest] = blocks
+        self.entries.move_to_end(digest)
+        self.new_entries[digest] = blocks
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._dirty = True
+
+    def merge(self, new_entries, hits=0, misses=0):
+        """
+        Merge the entries and counters collected by another cache, e.g. in a worker process.
+
+        Args:
+            new_entries (dict): The entries added by the other cache.
+            hits (int): The number of hits recorded by the other cache.
+            misses (int): The number of misses recorded by the other cache.
+        """
+        for digest, blocks in new_entries.items():
+            self.put(digest, blocks)
+        self.hits += hits
+        self.misses += misses
+
+    def save(self):
+        """Write the cache back to disk if it changed, replacing the old file atomically."""
+        if not self.cache_file or not self._dirty:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                # One C-encoded string: `json.dump` encodes chunk by chunk in Python
+                f.write(json.dumps({"version": CACHE_VERSION, "entries": list(self.entries.items())}))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"{Fore.YELLOW}Could not save scan cache {self.cache_file}: {e}{Style.RESET_ALL}")
+
+    def __repr__(self):
+        return f"ScanCache(entries={len(self.entries)}, hits={self.hits}, misses={self.misses})"
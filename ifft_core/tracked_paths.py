@@ -0,0 +1,133 @@
+# ifft_core/tracked_paths.py
+
+"""Tracked paths
+
+The set of files of a project, built once per run from `git ls-files` (or from
+a walk of the project when it is not a git repository), so checking that the
+target of an `#IFFT.Then(file, label)` exists is a set lookup instead of a
+stat per block. Targets that do not exist are collected and reported once, in
+aggregate, at the end of the scan.
+
+A target outside the project (e.g. `../billing/api.py`, in a repository checked
+out next to it) is looked up in the file list of the repository containing it.
+
+The file lists are shared by the scans of a run and dropped by
+`forget_tracked_paths` when the next one starts, so a long-lived process (the
+web interface, repeated `iter_scan_roots` calls) never checks targets against
+the files of a previous run. The daemon keeps its lists between checks and
+invalidates them from its file system events instead.
+
+"""
+
+import logging
+import os
+import subprocess
+
+from colorama import Fore, Style
+
+
+class TrackedPaths:
+    def __init__(self, project_path):
+        self.project_path = os.path.abspath(project_path)
+        # target -> number of blocks pointing at it
+        self.missing = {}
+        self._paths = None
+        self._memo = {}
+
+    def _list_paths(self):
+        """List the files of the project, relative to its root."""
+        try:
+            # Untracked files count too, as long as they are not ignored
+            output = subprocess.run(['git', '-c', 'core.quotepath=off', 'ls-files', '-z', '--cached', '--others',
+                                     '--exclude-standard'], cwd=self.project_path, capture_output=True, check=True).stdout
+            return {os.path.normpath(path) for path in output.decode('utf-8', 'replace').split('\0') if path}
+        except (OSError, subprocess.CalledProcessError):
+            logging.debug(f"{Fore.BLUE}git ls-files failed in {self.project_path}, walking the project instead{Style.RESET_ALL}")
+
+        paths = set()
+        for root, dirs, files in os.walk(self.project_path):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+            relative_root = os.path.relpath(root, self.project_path)
+            for file in files:
+                paths.add(os.path.normpath(os.path.join(relative_root, file)))
+        return paths
+
+    def exists(self, relative_path, record_missing=True):
+        """
+        Check whether a file exists in the project, recording it as missing otherwise.
+
+        Args:
+            relative_path (str): The file path, relative to the project root.
+            record_missing (bool): Whether to count the file in the next `report_missing`.
+
+        Returns:
+            bool: Whether the file exists.
+        """
+        found = self._memo.get(relative_path)
+        if found is None:
+            normalized = os.path.normpath(relative_path)
+            if normalized == os.pardir or normalized.startswith(os.pardir + os.sep):
+                found = _exists_outside(os.path.join(self.project_path, normalized))
+            else:
+                if self._paths is None:
+                    self._paths = self._list_paths()
+                found = normalized in self._paths
+            self._memo[relative_path] = found
+        if not found and record_missing:
+            self.missing[relative_path] = self.missing.get(relative_path, 0) + 1
+        return found
+
+    def merge_missing(self, missing):
+        """Add the missing targets recorded by another process, e.g. a scan worker."""
+        for target, count in missing.items():
+            self.missing[target] = self.missing.get(target, 0) + count
+
+    def invalidate(self):
+        """Forget the file list, e.g. after files were created or deleted."""
+        self._paths = None
+        self._memo = {}
+
+    def report_missing(self):
+        """
+        Log the targets that were not found since the last report, once each.
+
+        Returns:
+            dict: The missing targets and the number of blocks pointing at each of them.
+        """
+        missing, self.missing = self.missing, {}
+        if missing:
+            targets = ", ".join(f"{target} ({count} block(s))" for target, count in sorted(missing.items()))
+            logging.error(f"{Fore.RED} Associated files not found in {self.project_path}: {targets}{Style.RESET_ALL}")
+        return missing
+
+
+_tracked_paths = {}
+
+
+def _exists_outside(path):
+    """Check a file of another project through the file list of the repository containing it."""
+    path = os.path.normpath(path)
+    root = os.path.dirname(path)
+    while True:
+        if os.path.exists(os.path.join(root, '.git')):
+            return tracked_paths_for(root).exists(os.path.relpath(path, root), record_missing=False)
+        parent = os.path.dirname(root)
+        if parent == root:
+            # Not in a repository: fall back to the file system
+            return os.path.isfile(path)
+        root = parent
+
+
+def tracked_paths_for(project_path):
+    """Return the TrackedPaths of a project, shared until the next `forget_tracked_paths`."""
+    project_path = os.path.abspath(project_path)
+    tracked_paths = _tracked_paths.get(project_path)
+    if tracked_paths is None:
+        tracked_paths = _tracked_paths[project_path] = TrackedPaths(project_path)
+    return tracked_paths
+
+
+def forget_tracked_paths():
+    """Drop the file lists of every project, for a new run to list the files again."""
+    for tracked_paths in _tracked_paths.values():
+        tracked_paths.invalidate()
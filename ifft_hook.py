@@ -0,0 +1,94 @@
+"""Minimal IFFT entry point for the pre-commit hook
+
+Reads the staged file list (one path per line) from stdin, as sent by the
+`pre-commit` script, and checks the staged IFFT blocks. Only the modules the
+check path needs are imported: a running IFFT daemon is asked first using the
+standard library alone, and the scanner is only imported when it has to run
+in-process. `ifft.py` remains the entry point for every other mode.
+
+Usage:
+    git diff --cached --name-only --diff-filter=ACM | python3 ifft_hook.py [--project-root PATH]
+
+"""
+
+import os
+import sys
+
+
+def read_staged_files(stream):
+    """Read the staged file paths sent by the pre-commit script, ignoring blank lines."""
+    return [line.strip() for line in stream if line.strip()]
+
+
+def check_staged_files(project_root, staged_files):
+    """
+    Check the staged IFFT blocks and print the report.
+
+    Args:
+        project_root (str): The root of the repository being committed.
+        staged_files (list): The staged file paths, relative to the project root. When
+            empty, every staged file is checked.
+
+    Returns:
+        int: The exit code of the check (1 if a block changed without its associated file).
+    """
+    from ifft_core.daemon_client import find_git_dir, query_daemon
+
+    answer = query_daemon(project_root, {"command": "check", "auto_mode": True})
+    if answer is not None:
+        from ifft_core.ifft_parser import read_daemon_answer, report_block_changes
+
+        return report_block_changes(read_daemon_answer(project_root, answer), auto_mode=True)
+
+    from ifft_core.git_blobs import StagedBlobReader
+    from ifft_core.ifft_parser import get_modified_lines_by_file, mark_satisfied_blocks, report_block_changes, scan_file
+    from ifft_core.scan_cache import ScanCache
+    from ifft_core.tracked_paths import tracked_paths_for
+
+    python_files = [filename for filename in staged_files if filename.endswith(".py")]
+    modified_lines_by_file = get_modified_lines_by_file(project_root, auto_mode=True, paths=python_files or None)
+
+    git_dir = find_git_dir(project_root)
+    cache = ScanCache.for_git_dir(git_dir) if git_dir else None
+
+    modified_files = staged_files or list(modified_lines_by_file)
+    # What is committed is the staged content, not the working tree
+    blob_reader = StagedBlobReader(project_root)
+
+    def scan():
+        for filename, hunks in modified_lines_by_file.items():
+            if filename.endswith(".py"):
+                file_results = scan_file(project_root, filename, hunks, cache=cache, blob_reader=blob_reader)
+                if file_results:
+                    mark_satisfied_blocks({filename: file_results}, modified_files)
+                    yield filename, file_results
+
+    # The report stops at the first violation, and so does the scan
+    try:
+        return report_block_changes(scan(), auto_mode=True)
+    finally:
+        blob_reader.close()
+        tracked_paths_for(project_root).report_missing()
+        if cache is not None:
+            cache.save()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    project_root = os.getcwd()
+    if len(argv) == 2 and argv[0] == "--project-root":
+        project_root = os.path.abspath(argv[1])
+    elif argv:
+        print(__doc__.strip())
+        return 2
+
+    staged_files = [] if sys.stdin.isatty() else read_staged_files(sys.stdin)
+    if staged_files and not any(filename.endswith(".py") for filename in staged_files):
+        return 0
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    return check_staged_files(project_root, staged_files)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from dotenv import load_dotenv
+import os
+import subprocess
+import sys
+import pytest
+load_dotenv()
+
+project_path = os.getenv('PYTHONPATH')
+if project_path not in sys.path:
+    sys.path.append(project_path)
+
+
+class GitRepo:
+    """A throwaway git repository, for the tests that need real diffs."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.git('init', '-q', '.')
+        self.git('config', 'user.email', 'ifft@example.com')
+        self.git('config', 'user.name', 'IFFT tests')
+        self.git('config', 'core.autocrlf', 'false')
+
+    def git(self, *args):
+        return subprocess.run(['git', *args], cwd=self.path, check=True, capture_output=True).stdout
+
+    def write(self, filename, content):
+        file_path = os.path.join(self.path, filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write(content)
+
+    def read(self, filename):
+        with open(os.path.join(self.path, filename)) as f:
+            return f.read()
+
+    def commit(self, message='commit'):
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', message)
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    return GitRepo(tmp_path)
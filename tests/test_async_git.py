@@ -0,0 +1,93 @@
+import asyncio
+import os
+import pytest
+
+pytest.importorskip("git")
+
+from ifft_core.async_git import MIN_BLOBS_PER_BATCH, AsyncGit, async_scan_files
+from ifft_core.ifft_parser import scan_files
+
+FILE_COUNT = MIN_BLOBS_PER_BATCH * 3
+
+
+def block_file(index, value):
+    return f"x = 0\n#IFFT.If(label{index})\na = {value}\n#IFFT.Then(\"b{index}.py\", \"beta\")\nz = 0\n"
+
+
+@pytest.fixture
+def staged_repo(git_repo):
+    """Staged edits to many files, some edited again or deleted in the working tree only."""
+    for index in range(FILE_COUNT):
+        git_repo.write(f"pkg/a{index}.py", block_file(index, 1))
+    git_repo.write("gone.py", block_file("gone", 1))
+    git_repo.commit()
+
+    for index in range(FILE_COUNT):
+        git_repo.write(f"pkg/a{index}.py", block_file(index, 2))
+    git_repo.write("new file.py", block_file("new", 2))
+    git_repo.git("add", "-A")
+    git_repo.git("rm", "-q", "gone.py")
+
+    # Unstaged: lines added above the block, and a staged file deleted from the working tree
+    for index in range(0, FILE_COUNT, 7):
+        git_repo.write(f"pkg/a{index}.py", "u = 1\n" + git_repo.read(f"pkg/a{index}.py").replace("a = 2", "a = 3"))
+    os.remove(os.path.join(git_repo.path, "pkg", "a1.py"))
+    return git_repo
+
+
+def as_dicts(results):
+    return {file: [block.to_dict(include_content=False) for block in blocks] for file, blocks in results.items()}
+
+
+@pytest.mark.parametrize("auto_mode", [True, False])
+def test_same_results_as_scan_files(staged_repo, auto_mode):
+    results = asyncio.run(async_scan_files(staged_repo.path, auto_mode=auto_mode, use_cache=False,
+                                           max_concurrency=3))
+    expected = scan_files(staged_repo.path, auto_mode=auto_mode, use_cache=False)
+
+    assert as_dicts(results) == as_dicts(expected)
+    if auto_mode:
+        assert len(results) == FILE_COUNT + 1
+        assert "pkg/a1.py" in results and "gone.py" not in results
+        assert [block.modified_lines for block in results["pkg/a7.py"]] == [["~ a = 2"]]
+
+
+def test_read_objects_missing_and_concurrency_limit(staged_repo, monkeypatch):
+    git = AsyncGit(staged_repo.path, max_concurrency=2)
+    started = []
+    running = {"now": 0, "most": 0}
+    real_start = git._start
+
+    async def counting_start(args, stdin=None):
+        running["now"] += 1
+        running["most"] = max(running["most"], running["now"])
+        process = await real_start(args, stdin=stdin)
+        started.append(process)
+        real_wait = process.wait
+
+        async def wait():
+            returncode = await real_wait()
+            running["now"] -= 1
+            return returncode
+
+        process.wait = wait
+        return process
+
+    monkeypatch.setattr(git, "_start", counting_start)
+    names = [f":pkg/a{index}.py" for index in range(FILE_COUNT)]
+    names[5:5] = [":missing.py", ":new file.py", "HEAD:gone.py"]
+
+    async def read_with_other_commands():
+        return await asyncio.gather(git.read_objects(names), git.unstaged_files(), git.modified_lines_by_file(True))
+
+    blobs, unstaged_files, hunks_by_file = asyncio.run(read_with_other_commands())
+
+    # Two batch processes and two other commands, never more than two git processes at once
+    assert len(started) == 4
+    assert running["most"] == 2
+    assert unstaged_files == {"pkg/a1.py"} | {f"pkg/a{index}.py" for index in range(0, FILE_COUNT, 7)}
+    assert len(hunks_by_file) == FILE_COUNT + 1
+    assert set(blobs) == set(names) - {":missing.py"}
+    for name in (":pkg/a0.py", ":new file.py", "HEAD:gone.py", f":pkg/a{FILE_COUNT - 1}.py"):
+        sha = staged_repo.git("rev-parse", name).decode().strip()
+        assert blobs[name] == (sha, staged_repo.git("cat-file", "blob", sha))
@@ -0,0 +1,80 @@
+import json
+import os
+import pytest
+
+from conftest import GitRepo
+from ifft_core import audit
+from ifft_core.audit import audit_project, run_audit
+
+
+@pytest.fixture
+def audited_repo(git_repo):
+    git_repo.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"missing.py\", \"beta\")\n")
+    git_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"c.py\", \"delta\")\n")
+    git_repo.write("c.py", "#IFFT.If(gamma)\nc = 1\n#IFFT.Then(\"b.py\", \"beta\")\n")
+    git_repo.write("pkg/d.py", "#IFFT.If(alpha)\nd = 1\nd = 2\n#IFFT.Then(\"c.py\", \"gamma\")\n")
+    git_repo.write("e.py", "e = 1\n")
+    git_repo.commit()
+    return git_repo
+
+
+def test_report(audited_repo):
+    report = audit_project(audited_repo.path)
+
+    assert report["totals"] == {"files": 5, "files_with_blocks": 4, "blocks": 4, "labels": 3,
+                                "dangling_targets": 2, "duplicated_labels": 1}
+    assert report["blocks_per_file"] == {"a.py": 1, "b.py": 1, "c.py": 1, "pkg/d.py": 1}
+    assert report["largest_blocks"][0]["file"] == "pkg/d.py"
+    assert report["duplicated_labels"] == {"alpha": ["a.py:1", "pkg/d.py:1"]}
+    assert [(block["file"], block["reason"]) for block in report["dangling_targets"]] == [
+        ("a.py", "missing file"), ("b.py", "missing label")]
+
+
+def test_second_run_parses_nothing(audited_repo, monkeypatch):
+    first = audit_project(audited_repo.path)
+    assert first["cache"] == {"hits": 0, "misses": 5}
+
+    def no_parse(buffer):
+        raise AssertionError("parsed a file the cache knows")
+
+    monkeypatch.setattr(audit, "parse_blocks", no_parse)
+    second = audit_project(audited_repo.path)
+    assert second["cache"] == {"hits": 5, "misses": 0}
+    assert second["totals"] == first["totals"]
+
+
+def test_unstaged_edit_is_parsed_again(audited_repo):
+    audit_project(audited_repo.path)
+    audited_repo.write("b.py", "#IFFT.If(beta)\nb = 2\n#IFFT.Then(\"c.py\", \"gamma\")\n")
+
+    report = audit_project(audited_repo.path)
+    assert report["cache"] == {"hits": 4, "misses": 1}
+    assert report["totals"]["dangling_targets"] == 1
+
+
+def test_exit_code_and_output(audited_repo, tmp_path, capsys):
+    output_file = str(tmp_path / "audit.json")
+    assert run_audit([audited_repo.path], output_file=output_file) == 1
+    with open(output_file) as f:
+        assert json.load(f)["totals"]["dangling_targets"] == 2
+    assert "Dangling target in a.py:1: missing.py 'beta' (missing file)" in capsys.readouterr().out
+
+    audited_repo.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"c.py\", \"gamma\")\n")
+    audited_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"c.py\", \"gamma\")\n")
+    assert run_audit([audited_repo.path]) == 0
+
+
+def test_every_root_is_audited(audited_repo, tmp_path):
+    os.makedirs(tmp_path / "other")
+    other = GitRepo(tmp_path / "other")
+    other.write("x.py", "#IFFT.If(chi)\nx = 1\n#IFFT.Then(\"y.py\", \"psi\")\n")
+    other.write("y.py", "#IFFT.If(psi)\ny = 1\n#IFFT.Then(\"x.py\", \"chi\")\n")
+    other.commit()
+
+    output_file = str(tmp_path / "audit.json")
+    assert run_audit([other.path], output_file=output_file) == 0
+    assert run_audit([other.path, audited_repo.path], output_file=output_file) == 1
+    with open(output_file) as f:
+        reports = json.load(f)
+    assert [(report["project_path"], report["totals"]["blocks"]) for report in reports] == [
+        (other.path, 2), (audited_repo.path, 4)]
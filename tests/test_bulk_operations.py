@@ -0,0 +1,95 @@
+import os
+import pytest
+
+from block_manager import bulk_operations
+from block_manager.bulk_operations import FileTransaction, _apply
+
+
+@pytest.fixture
+def project(tmp_path):
+    contents = {}
+    for index in range(5):
+        path = str(tmp_path / f"file{index}.py")
+        content = f"#IFFT.If(block{index})\nx = {index}\n#IFFT.Then(\"other.py\", \"label\")\n".encode()
+        with open(path, "wb") as f:
+            f.write(content)
+        contents[path] = content
+    return tmp_path, contents
+
+
+def assert_untouched(tmp_path, contents):
+    for path, content in contents.items():
+        with open(path, "rb") as f:
+            assert f.read() == content
+    leftovers = [name for name in os.listdir(tmp_path) if name.endswith((".ifft-tmp", ".ifft-bak"))]
+    assert leftovers == []
+
+
+def stage_all(contents):
+    transaction = FileTransaction()
+    for path in contents:
+        transaction.stage(path, ["x = 'new'\n"])
+    return transaction
+
+
+def test_commit_replaces_every_file(project):
+    tmp_path, contents = project
+    stage_all(contents).commit()
+
+    assert_untouched(tmp_path, {path: b"x = 'new'\n" for path in contents})
+
+
+def test_failing_on_commit_rolls_back_every_file(project):
+    tmp_path, contents = project
+
+    def on_commit():
+        raise RuntimeError("metadata store is locked")
+
+    with pytest.raises(RuntimeError):
+        stage_all(contents).commit(on_commit=on_commit)
+
+    assert_untouched(tmp_path, contents)
+
+
+def test_failing_replace_rolls_back_every_file(project, monkeypatch):
+    tmp_path, contents = project
+    transaction = stage_all(contents)
+    real_replace = os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append(dst)
+        # The third file cannot be replaced; the rollback itself goes through
+        if len(calls) == 3:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(bulk_operations.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        transaction.commit()
+
+    assert_untouched(tmp_path, contents)
+
+
+def test_failing_job_leaves_no_staged_file(project):
+    tmp_path, contents = project
+    paths = list(contents)
+
+    def job(path):
+        if path == paths[3]:
+            raise ValueError("cannot parse")
+        return path, [], ["x = 'new'\n"]
+
+    with pytest.raises(ValueError):
+        _apply(job, paths, 1, "Testing", dry_run=False)
+
+    assert_untouched(tmp_path, contents)
+
+
+def test_dry_run_changes_nothing(project):
+    tmp_path, contents = project
+    changes = _apply(lambda path: (path, [{"label": "x"}], ["x = 'new'\n"]), list(contents), 1, "Testing",
+                     dry_run=True)
+
+    assert sorted(changes) == sorted(contents)
+    assert_untouched(tmp_path, contents)
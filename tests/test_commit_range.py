@@ -0,0 +1,70 @@
+import pytest
+
+from ifft_core.commit_range import check_range, iter_range_commits, iter_range_results, split_range
+
+A_FILE = "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"b.py\", \"beta\")\n"
+B_FILE = "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n"
+
+
+@pytest.fixture
+def history(git_repo):
+    """A base commit, then one commit changing the block of a.py and one changing the block of b.py."""
+    git_repo.write("a.py", A_FILE)
+    git_repo.write("b.py", B_FILE)
+    git_repo.commit("base")
+    git_repo.write("a.py", A_FILE.replace("a = 1", "a = 2"))
+    git_repo.commit("change a")
+    git_repo.write("b.py", B_FILE.replace("b = 1", "b = 2"))
+    git_repo.write("notes.txt", "b changed\n")
+    git_repo.commit("change b")
+    return git_repo
+
+
+def rev_parse(git_repo, revision):
+    return git_repo.git("rev-parse", revision).decode().strip()
+
+
+@pytest.mark.parametrize("commit_range, ends", [
+    ("origin/main..HEAD", ("origin/main", "HEAD")),
+    ("origin/main..", ("origin/main", "HEAD")),
+    ("main...feature", ("main", "feature")),
+    ("v1.0", ("v1.0", "HEAD")),
+])
+def test_split_range(commit_range, ends):
+    assert split_range(commit_range) == ends
+
+
+def test_commits_split_from_one_log(history):
+    commits = list(iter_range_commits(history.path, "HEAD~2..HEAD"))
+
+    assert commits == [
+        (rev_parse(history, "HEAD~1"), "change a", {"a.py": [(2, 1, 2, 1)]}),
+        (rev_parse(history, "HEAD"), "change b", {"b.py": [(2, 1, 2, 1)], "notes.txt": [(0, 0, 1, 1)]}),
+    ]
+
+
+def test_whole_range_satisfies_both_blocks(history):
+    results = dict(iter_range_results(history.path, "HEAD~2..HEAD"))
+
+    assert list(results) == ["a.py", "b.py"]
+    assert check_range(history.path, "HEAD~2..HEAD") == 0
+
+
+def test_per_commit_requires_each_commit_to_change_both(history):
+    results = dict(iter_range_results(history.path, "HEAD~2..HEAD", per_commit=True))
+
+    assert list(results) == [f"a.py ({rev_parse(history, 'HEAD~1')[:12]})",
+                             f"b.py ({rev_parse(history, 'HEAD')[:12]})"]
+    assert check_range(history.path, "HEAD~2..HEAD", per_commit=True) == 1
+
+
+def test_lone_base_means_base_to_head(history):
+    assert check_range(history.path, "HEAD~2") == 0
+    # Only the commit changing b.py is in HEAD~1..HEAD
+    assert list(dict(iter_range_results(history.path, "HEAD~1"))) == ["b.py"]
+    assert check_range(history.path, "HEAD~1") == 1
+
+
+@pytest.mark.parametrize("per_commit", [False, True])
+def test_bad_range(history, per_commit):
+    assert check_range(history.path, "no-such-branch..HEAD", per_commit=per_commit) == 2
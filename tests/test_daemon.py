@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import socket
+import threading
+import pytest
+
+pytest.importorskip("git")
+
+from ifft_core.daemon import IFFTDaemon
+from ifft_core.daemon_client import daemon_socket_path, query_daemon
+from ifft_core.ifft_parser import read_daemon_answer, scan_files
+
+BLOCK_FILE = "x = 0\n#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"b.py\", \"beta\")\nz = 0\n"
+
+
+@pytest.fixture
+def staged_outside_block(git_repo):
+    """Stage an edit outside the block, then add unstaged lines above it."""
+    git_repo.write("a.py", BLOCK_FILE)
+    git_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+    git_repo.commit()
+
+    git_repo.write("a.py", BLOCK_FILE.replace("z = 0", "z = 1"))
+    git_repo.git("add", "a.py")
+    git_repo.write("a.py", "u = 1\nv = 2\n" + git_repo.read("a.py"))
+    return git_repo
+
+
+def test_daemon_auto_mode_scans_staged_content(staged_outside_block):
+    daemon = IFFTDaemon(staged_outside_block.path)
+    daemon.warm_up()
+    answer = daemon.check(auto_mode=True)
+
+    assert [block["modified_lines"] for block in answer["results"]["a.py"]] == [[]]
+
+
+def test_daemon_auto_mode_matches_scan_files(staged_outside_block):
+    daemon = IFFTDaemon(staged_outside_block.path)
+    daemon.warm_up()
+    answer = daemon.check(auto_mode=True)
+    results = scan_files(staged_outside_block.path, auto_mode=True, use_cache=False)
+
+    assert answer["results"] == {file: [block.to_dict(include_content=False) for block in blocks]
+                                 for file, blocks in results.items()}
+
+
+def test_daemon_manual_mode_uses_working_tree(staged_outside_block):
+    staged_outside_block.write("a.py", staged_outside_block.read("a.py").replace("a = 1", "a = 2"))
+    daemon = IFFTDaemon(staged_outside_block.path)
+    daemon.warm_up()
+    answer = daemon.check(auto_mode=False)
+
+    assert [block["modified_lines"] for block in answer["results"]["a.py"]] == [["~ a = 2"]]
+
+
+def warnings_logged(caplog, function):
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        result = function()
+    return result, sorted(record.getMessage() for record in caplog.records if record.levelno >= logging.WARNING)
+
+
+def test_daemon_reports_label_issues_like_a_local_scan(git_repo, caplog):
+    git_repo.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"b.py\", \"gamma\")\n")
+    git_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"missing.py\", \"alpha\")\n")
+    git_repo.commit()
+    git_repo.write("a.py", git_repo.read("a.py").replace("a = 1", "a = 2"))
+    git_repo.write("b.py", git_repo.read("b.py").replace("b = 1", "b = 2"))
+
+    _, local_warnings = warnings_logged(caplog, lambda: scan_files(git_repo.path))
+    daemon = IFFTDaemon(git_repo.path)
+    daemon.warm_up()
+    answer = daemon.check(auto_mode=False)
+    results, daemon_warnings = warnings_logged(caplog, lambda: read_daemon_answer(git_repo.path, answer))
+
+    assert answer["label_issues"]["missing_targets"] == {"missing.py": 1}
+    assert [target["file"] for target in answer["label_issues"]["dangling_targets"]] == ["a.py"]
+    assert daemon_warnings == local_warnings
+    assert any("which is not defined in b.py" in message for message in daemon_warnings)
+    assert sorted(results) == ["a.py", "b.py"]
+
+
+def test_long_socket_path_in_runtime_dir(tmp_path, monkeypatch):
+    long_git_dir = "/" + "x" * 100 + "/.git"
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert os.path.dirname(daemon_socket_path(long_git_dir)) == str(tmp_path)
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert os.path.dirname(daemon_socket_path(long_git_dir)) == f"/tmp/ifft-{os.getuid()}"
+    assert daemon_socket_path(str(tmp_path / ".git")) == str(tmp_path / ".git" / "ifft-cache" / "daemon.sock")
+
+
+def test_query_trusts_only_own_socket(git_repo, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    socket_path = daemon_socket_path(os.path.join(git_repo.path, ".git"))
+    os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+
+    def answer_once():
+        connection, _ = server.accept()
+        with connection:
+            connection.makefile("rb").readline()
+            connection.sendall(json.dumps({"results": {}, "modified_files": []}).encode())
+
+    thread = threading.Thread(target=answer_once, daemon=True)
+    thread.start()
+    try:
+        real_uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: real_uid + 1)
+        assert query_daemon(git_repo.path, {"command": "check"}) is None
+        monkeypatch.setattr(os, "getuid", lambda: real_uid)
+        assert query_daemon(git_repo.path, {"command": "check"}, timeout=5) == {"results": {}, "modified_files": []}
+    finally:
+        thread.join(5)
+        server.close()
@@ -0,0 +1,97 @@
+import pytest
+
+from ifft_core.ifft_parser import _parse_hunk_header, _unquote_diff_path, parse_diff_lines
+
+
+def file_diff(old_name, new_name, *hunk_lines):
+    return [f"diff --git {old_name} {new_name}\n", "index 1111111..2222222 100644\n",
+            f"--- {old_name}\n", f"+++ {new_name}\n", *hunk_lines]
+
+
+def test_hunks_in_order():
+    lines = file_diff("app.py", "app.py", "@@ -3,0 +4 @@\n", "+line1\n", "@@ -9,2 +9,0 @@\n", "-line2\n", "-line3\n")
+    assert parse_diff_lines(lines) == {"app.py": [(3, 0, 4, 1), (9, 2, 9, 0)]}
+
+
+@pytest.mark.parametrize("header, hunk", [
+    ("@@ -3 +3 @@", (3, 1, 3, 1)),
+    ("@@ -3,0 +4 @@", (3, 0, 4, 1)),
+    ("@@ -5 +4,0 @@", (5, 1, 4, 0)),
+    ("@@ -10,4 +12,7 @@ def foo():", (10, 4, 12, 7)),
+])
+def test_hunk_header(header, hunk):
+    assert _parse_hunk_header(header) == hunk
+
+
+@pytest.mark.parametrize("printed, path", [
+    ("app.py\n", "app.py"),
+    ("my file.py\t\n", "my file.py"),
+    ('"caf\\303\\251.py"\n', "café.py"),
+    ('"tab\\there.py"\n', "tab\there.py"),
+    ('"quote\\"d.py"\n', 'quote"d.py'),
+    ("café.py\n", "café.py"),
+    # `core.quotepath=off` keeps the non-ASCII characters raw next to the escapes
+    ('"tab\\té.py"\n', "tab\té.py"),
+    ('"tab\\t中.py"\n', "tab\t中.py"),
+    ('"back\\\\slash\\344\\270\\255.py"\n', "back\\slash中.py"),
+])
+def test_unquote_diff_path(printed, path):
+    assert _unquote_diff_path(printed) == path
+
+
+def test_quoted_path_and_path_with_spaces():
+    lines = (file_diff('"caf\\303\\251.py"', '"caf\\303\\251.py"', "@@ -1 +1 @@\n", "-a\n", "+b\n")
+             + file_diff("my file.py\t", "my file.py\t", "@@ -2,0 +3,2 @@\n", "+c\n", "+d\n"))
+    assert parse_diff_lines(lines) == {"café.py": [(1, 1, 1, 1)], "my file.py": [(2, 0, 3, 2)]}
+
+
+def test_deleted_and_added_files():
+    lines = (["diff --git gone.py gone.py\n", "deleted file mode 100644\n", "--- gone.py\n", "+++ /dev/null\n",
+              "@@ -1,2 +0,0 @@\n", "-a\n", "-b\n"]
+             + ["diff --git new.py new.py\n", "new file mode 100644\n", "--- /dev/null\n", "+++ new.py\n",
+                "@@ -0,0 +1 @@\n", "+a\n"])
+    assert parse_diff_lines(lines) == {"new.py": [(0, 0, 1, 1)]}
+
+
+def test_binary_entry_between_files():
+    lines = (file_diff("a.py", "a.py", "@@ -1 +1 @@\n", "-a\n", "+b\n")
+             + ["diff --git logo.png logo.png\n", "index 1111111..2222222 100644\n",
+                "Binary files logo.png and logo.png differ\n"]
+             + file_diff("b.py", "b.py", "@@ -4 +4 @@\n", "-c\n", "+d\n"))
+    assert parse_diff_lines(lines) == {"a.py": [(1, 1, 1, 1)], "b.py": [(4, 1, 4, 1)]}
+
+
+def test_content_lines_looking_like_headers():
+    # Removed and added lines start with `-`/`+`, so `--- x`/`+++ x` content is not a header
+    lines = file_diff("a.py", "a.py", "@@ -1 +1 @@\n", "--- not a header\n", "+++ not a header\n")
+    assert parse_diff_lines(lines) == {"a.py": [(1, 1, 1, 1)]}
+
+
+def test_real_git_diff(git_repo):
+    pytest.importorskip("git")
+    from ifft_core.ifft_parser import get_modified_lines_by_file
+
+    # git quotes the tab even with `core.quotepath=off`
+    for name in ("café.py", "my file.py", "tab\tname.py", "tab\té.py", "tab\t中.py", "plain.py"):
+        git_repo.write(name, "a = 1\nb = 2\nc = 3\n")
+    with open(f"{git_repo.path}/logo.png", "wb") as f:
+        f.write(b"\x89PNG\x00\x01")
+    git_repo.commit()
+
+    git_repo.write("café.py", "a = 1\nb = 20\nc = 3\n")
+    git_repo.write("my file.py", "a = 1\nb = 2\nc = 3\nd = 4\n")
+    git_repo.write("tab\tname.py", "a = 0\nb = 2\nc = 3\n")
+    git_repo.write("tab\té.py", "a = 0\nb = 2\nc = 3\n")
+    git_repo.write("tab\t中.py", "a = 1\nb = 2\nc = 30\n")
+    git_repo.write("plain.py", "a = 1\nc = 3\n")
+    with open(f"{git_repo.path}/logo.png", "wb") as f:
+        f.write(b"\x89PNG\x00\x02")
+
+    assert get_modified_lines_by_file(git_repo.path, auto_mode=False) == {
+        "café.py": [(2, 1, 2, 1)],
+        "my file.py": [(3, 0, 4, 1)],
+        "tab\tname.py": [(1, 1, 1, 1)],
+        "tab\té.py": [(1, 1, 1, 1)],
+        "tab\t中.py": [(3, 1, 3, 1)],
+        "plain.py": [(2, 1, 1, 0)],
+    }
@@ -0,0 +1,50 @@
+import logging
+import pytest
+
+from block_manager.block_manager_class import BlockManager
+from ifft_core.fingerprints import compare_blocks, scan_fingerprints
+from ifft_core.tracked_paths import tracked_paths_for
+
+A_FILE = ("#IFFT.If(alpha)\n"
+          "a = 1\n"
+          "#IFFT.Then(\"b.py\", \"beta\")\n"
+          "#IFFT.If(gamma)\n"
+          "c = 1\n"
+          "#IFFT.Then(\"missing.py\", \"delta\")\n")
+
+
+@pytest.fixture
+def exported_tree(tmp_path):
+    """A project outside git, with the baseline of its blocks extracted."""
+    project_root = tmp_path / "project"
+    project_root.mkdir()
+    (project_root / "a.py").write_text(A_FILE)
+    (project_root / "b.py").write_text("#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+
+    block_manager = BlockManager(storage_dir=str(tmp_path / "metadata"), project_root=str(project_root))
+    blocks = compare_blocks(str(project_root), "a.py", A_FILE.encode(), [])
+    block_manager.extract_blocks("a.py", blocks)
+    # Building the baseline looked the targets up too
+    tracked_paths_for(str(project_root)).report_missing()
+    return project_root, block_manager.store
+
+
+def test_unchanged_tree_reports_nothing(exported_tree):
+    project_root, store = exported_tree
+    assert scan_fingerprints(str(project_root), store) == {}
+
+
+def test_changed_block_and_missing_target(exported_tree, caplog):
+    project_root, store = exported_tree
+    (project_root / "a.py").write_text(A_FILE.replace("a = 1", "a = 2").replace("c = 1", "c = 2"))
+
+    with caplog.at_level(logging.ERROR):
+        results = scan_fingerprints(str(project_root), store)
+
+    alpha, gamma = results["a.py"]
+    assert (alpha.associated_file_name, alpha.modified_lines) == ("b.py", ["~ a = 2"])
+    assert (gamma.associated_file_name, gamma.associated_file_label, gamma.modified_lines) == ("", "", ["~ c = 2"])
+    # Missing targets are reported once, together
+    missing_reports = [record.getMessage() for record in caplog.records if "Associated files not found" in record.getMessage()]
+    assert len(missing_reports) == 1
+    assert "missing.py (1 block(s))" in missing_reports[0]
@@ -0,0 +1,58 @@
+import os
+import pytest
+
+pytest.importorskip("git")
+
+from git import Repo
+
+from ifft_core.ifft_parser import scan_files, sync_label_index
+from ifft_core.label_index import LabelIndex
+
+
+@pytest.fixture
+def labeled_repo(git_repo):
+    git_repo.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"b.py\", \"beta\")\n")
+    git_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+    git_repo.commit()
+    return git_repo
+
+
+def load_index(git_repo):
+    return LabelIndex.for_git_dir(os.path.join(git_repo.path, ".git"))
+
+
+def test_sync_indexes_head(labeled_repo):
+    label_index = load_index(labeled_repo)
+    sync_label_index(Repo(labeled_repo.path), label_index, labeled_repo.path)
+
+    assert label_index.resolve("b.py", "beta")["block_start"] == 1
+    assert label_index.dangling_targets() == []
+    assert label_index.overlay == set()
+
+
+def test_discarded_edit_leaves_the_index(labeled_repo):
+    labeled_repo.write("b.py", labeled_repo.read("b.py").replace("If(beta)", "If(renamed)"))
+    scan_files(labeled_repo.path)
+    label_index = load_index(labeled_repo)
+    assert label_index.resolve("b.py", "renamed") is not None
+    assert "b.py" in label_index.overlay
+
+    labeled_repo.git("checkout", "--", "b.py")
+    scan_files(labeled_repo.path)
+    label_index = load_index(labeled_repo)
+
+    assert label_index.resolve("b.py", "beta") is not None
+    assert label_index.resolve("b.py", "renamed") is None
+    assert label_index.overlay == set()
+
+
+def test_staged_edit_reverted_in_working_tree(labeled_repo):
+    labeled_repo.write("b.py", labeled_repo.read("b.py").replace("If(beta)", "If(renamed)"))
+    labeled_repo.git("add", "b.py")
+    scan_files(labeled_repo.path, auto_mode=True)
+    assert load_index(labeled_repo).resolve("b.py", "renamed") is not None
+
+    labeled_repo.git("reset", "-q", "--hard")
+    scan_files(labeled_repo.path, auto_mode=True)
+
+    assert load_index(labeled_repo).resolve("b.py", "beta") is not None
@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+
+from block_manager.metadata_store import METADATA_DB_NAME, SCHEMA_VERSION, MetadataStore
+
+BLOCK = {"block_start": 2, "block_end": 4, "block_content": "a = 1\n", "associated_file_name": "b.py",
+         "associated_file_label": "beta", "label": "alpha", "if_line": "    #IFFT.If(alpha)\n",
+         "then_line": "    #IFFT.Then(\"b.py\", \"beta\")\n", "fingerprint": "f00d"}
+
+
+def write_file(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_round_trip(tmp_path):
+    storage_dir = str(tmp_path / "block_metadata")
+    store = MetadataStore(storage_dir, project_root=str(tmp_path))
+    store.replace_blocks({str(tmp_path / "a" / "utils.py"): [BLOCK], "b/utils.py": [BLOCK, dict(BLOCK, block_start=8)]})
+    store.replace_file_stats({"a/utils.py": (1, 2, "digest")})
+    store.close()
+
+    store = MetadataStore(storage_dir, project_root=str(tmp_path))
+    assert store.files() == ["a/utils.py", "b/utils.py"]
+    assert store.file_blocks("a/utils.py") == [BLOCK]
+    assert store.count_blocks_by_file() == {"a/utils.py": 1, "b/utils.py": 2}
+    assert store.file_stats() == {"a/utils.py": (1, 2, "digest")}
+
+    store.replace_file_blocks("b/utils.py", [])
+    store.remove_file(str(tmp_path / "a" / "utils.py"))
+    assert store.count_blocks() == 0
+    assert store.file_stats() == {}
+    store.close()
+
+
+def test_migrate_version_1(tmp_path):
+    storage_dir = str(tmp_path)
+    # Version 1 had neither the marker lines nor the fingerprints
+    connection = sqlite3.connect(os.path.join(storage_dir, METADATA_DB_NAME))
+    connection.executescript("""
+        CREATE TABLE blocks (file TEXT NOT NULL, block_start INTEGER NOT NULL, block_end INTEGER NOT NULL,
+                             block_content TEXT NOT NULL DEFAULT '', associated_file_name TEXT NOT NULL DEFAULT '',
+                             associated_file_label TEXT NOT NULL DEFAULT '', label TEXT NOT NULL DEFAULT '',
+                             PRIMARY KEY (file, block_start));
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO meta VALUES ('legacy_json_imported', '1');
+        INSERT INTO blocks VALUES ('a.py', 2, 4, 'a = 1\n', 'b.py', 'beta', 'alpha');
+    """)
+    connection.close()
+
+    store = MetadataStore(storage_dir)
+    assert store.file_blocks("a.py") == [dict(BLOCK, if_line="", then_line="", fingerprint="")]
+    assert store.connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0] == \
+        str(SCHEMA_VERSION)
+    store.replace_file_blocks("a.py", [BLOCK])
+    assert store.file_blocks("a.py") == [BLOCK]
+    store.close()
+
+
+def test_import_legacy_json(tmp_path, monkeypatch):
+    from helpers import helpers
+
+    project = tmp_path / "project"
+    for name in ("root.py", "sub/unique.py", "a/utils.py", "b/utils.py"):
+        write_file(str(project / name))
+    storage_dir = tmp_path / "block_metadata"
+    for prefix in ("root", "unique", "utils", "gone"):
+        write_file(str(storage_dir / f"{prefix}.json"), json.dumps([dict(BLOCK, label=prefix)]))
+    write_file(str(storage_dir / "export.json"), json.dumps({"c/export.py": [BLOCK]}))
+    write_file(str(storage_dir / "broken.json"), "{")
+
+    walks = []
+    real_iter_project_files = helpers.iter_project_files
+
+    def counting_iter_project_files(*args, **kwargs):
+        walks.append(args)
+        return real_iter_project_files(*args, **kwargs)
+
+    monkeypatch.setattr(helpers, "iter_project_files", counting_iter_project_files)
+    store = MetadataStore(str(storage_dir), project_root=str(project))
+
+    assert {file_name: [block["label"] for block in store.file_blocks(file_name)] for file_name in store.files()} == {
+        "root.py": ["root"],
+        "sub/unique.py": ["unique"],
+        # Ambiguous base names are taken at the root
+        "utils.py": ["utils"],
+        "gone.py": ["gone"],
+        "c/export.py": ["alpha"],
+    }
+    # One walk for every legacy file not found at the root
+    assert len(walks) == 1
+
+    # The import runs once
+    store.close()
+    os.remove(str(storage_dir / "root.json"))
+    store = MetadataStore(str(storage_dir), project_root=str(project))
+    assert store.has_file("root.py")
+    store.close()
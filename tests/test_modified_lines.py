@@ -0,0 +1,84 @@
+import pytest
+
+from ifft_core.ifft_parser import _modified_lines_by_block, parse_blocks
+
+BLOCK_FILE = ("x = 0\n"
+              "#IFFT.If(alpha)\n"
+              "a = 1\n"
+              "b = 2\n"
+              "#IFFT.Then(\"b.py\", \"beta\")\n"
+              "y = 0\n")
+
+TWO_BLOCKS = ("#IFFT.If(alpha)\n"
+              "a = 2\n"
+              "#IFFT.Then(\"b.py\", \"beta\")\n"
+              "#IFFT.If(gamma)\n"
+              "c = 2\n"
+              "d = 2\n"
+              "#IFFT.Then(\"b.py\", \"beta\")\n")
+
+
+@pytest.fixture
+def block_repo(git_repo):
+    pytest.importorskip("git")
+    git_repo.write("a.py", BLOCK_FILE)
+    git_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+    git_repo.commit()
+    return git_repo
+
+
+def modified_lines_after(git_repo, content):
+    from ifft_core.ifft_parser import scan_files
+
+    git_repo.write("a.py", content)
+    results = scan_files(git_repo.path, use_cache=False)
+    return [block.modified_lines for block in results.get("a.py", [])]
+
+
+def test_deletion_right_after_if(block_repo):
+    assert modified_lines_after(block_repo, BLOCK_FILE.replace("a = 1\n", "")) == [["- 1 line(s) removed"]]
+
+
+def test_deletion_right_before_then(block_repo):
+    assert modified_lines_after(block_repo, BLOCK_FILE.replace("b = 2\n", "")) == [["- 1 line(s) removed"]]
+
+
+@pytest.mark.parametrize("line", ["x = 0\n", "y = 0\n"])
+def test_deletion_just_outside_block(block_repo, line):
+    assert modified_lines_after(block_repo, BLOCK_FILE.replace(line, "")) == [[]]
+
+
+def test_whitespace_only_change(block_repo):
+    assert modified_lines_after(block_repo, BLOCK_FILE.replace("a = 1", "a  =  1   ")) == [["~ a  =  1"]]
+
+
+def test_changed_and_removed_lines(block_repo):
+    content = BLOCK_FILE.replace("a = 1\nb = 2\n", "a = 3\n")
+    assert modified_lines_after(block_repo, content) == [["~ a = 3", "- 1 line(s) removed"]]
+
+
+def test_hunk_spanning_two_blocks_removes_from_one():
+    buffer = TWO_BLOCKS.encode()
+    # Old lines 2-10 became new lines 2-6: lines 2-6 changed, the 4 others removed after new line 6
+    modified_lines = _modified_lines_by_block(buffer, parse_blocks(buffer), [(2, 9, 2, 5)])
+
+    assert modified_lines == [
+        ["~ a = 2"],
+        ["~ c = 2", "~ d = 2", "- 4 line(s) removed"]
+    ]
+
+
+def test_hunk_spanning_two_blocks_removes_outside_both():
+    buffer = TWO_BLOCKS.encode()
+    # The removed lines follow the `#IFFT.Then` of the second block
+    modified_lines = _modified_lines_by_block(buffer, parse_blocks(buffer), [(2, 10, 2, 6)])
+
+    assert modified_lines == [["~ a = 2"], ["~ c = 2", "~ d = 2"]]
+
+
+def test_removal_right_after_changed_if_marker():
+    buffer = TWO_BLOCKS.encode()
+    # The `#IFFT.If(gamma)` line changed and the line after it was removed
+    modified_lines = _modified_lines_by_block(buffer, parse_blocks(buffer), [(4, 2, 4, 1)])
+
+    assert modified_lines == [[], ["- 1 line(s) removed"]]
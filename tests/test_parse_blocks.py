@@ -0,0 +1,42 @@
+import mmap
+import pytest
+
+from ifft_core import ifft_parser
+from ifft_core.ifft_parser import has_ifft_markers, parse_blocks
+
+
+@pytest.mark.parametrize("prefix", ["IFFT", "ifft", "Ifft", "iFfT"])
+def test_mixed_case_markers(prefix):
+    buffer = f'x = 0\n# {prefix}.If(alpha)\na = 1\n# {prefix}.Then("b.py", "beta")\n'.encode()
+
+    assert has_ifft_markers(buffer)
+    assert parse_blocks(buffer) == [{
+        "block_start": 2,
+        "block_end": 4,
+        "start_offset": 6,
+        "end_offset": 29,
+        "label": "alpha",
+        "associated_file_name": "b.py",
+        "associated_file_label": "beta"
+    }]
+
+
+def test_no_markers():
+    assert not has_ifft_markers(b"import os\n# a plain comment\n")
+    assert parse_blocks(b"import os\n# a plain comment\n") == []
+
+
+def test_marker_split_between_check_chunks(monkeypatch):
+    monkeypatch.setattr(ifft_parser, "MARKER_CHECK_CHUNK", 16)
+    # `ifft.` spans bytes 14 to 18, across the first chunk boundary
+    buffer = b"x" * 12 + b"\n#Ifft.If(alpha)\n"
+
+    assert has_ifft_markers(buffer)
+    assert not has_ifft_markers(b"x" * 12 + b"\n#Ifft If(alpha)\n")
+
+
+def test_mixed_case_markers_in_mmap(tmp_path):
+    file_path = tmp_path / "a.py"
+    file_path.write_bytes(b'#ifft.if(alpha)\na = 1\n#Ifft.Then("b.py", "beta")\n')
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert [parsed["label"] for parsed in parse_blocks(buffer)] == ["alpha"]
@@ -0,0 +1,46 @@
+import os
+import pytest
+
+from helpers import helpers
+from helpers.helpers import iter_project_files
+
+# `generated/` in pkg/.gitignore only applies below pkg
+EXPECTED = ["app.py", "pkg/keep_pb2.py", "pkg/mod.py", "pkg/sub/deep.py", "tools/generated/tool.py", "tools/run.py"]
+
+
+@pytest.fixture
+def ignoring_tree(git_repo):
+    for name in ["app.py", "local.py", "node_modules/dep.py", "build/out.py", "pkg/mod.py", "pkg/api_pb2.py",
+                 "pkg/keep_pb2.py", "pkg/generated/gen.py", "pkg/sub/deep.py", "pkg/sub/scratch.py",
+                 "tools/run.py", "tools/generated/tool.py"]:
+        git_repo.write(name, "x = 1\n")
+    git_repo.write(".gitignore", "node_modules/\n")
+    git_repo.write("pkg/.gitignore", "generated/\n*_pb2.py\n!keep_pb2.py\n")
+    git_repo.write("pkg/sub/.gitignore", "/scratch.py\n")
+    with open(os.path.join(git_repo.path, ".git", "info", "exclude"), "a") as f:
+        f.write("/local.py\n")
+    return git_repo
+
+
+def listed(project_root, **kwargs):
+    return sorted(os.path.relpath(path, project_root)
+                  for path in iter_project_files(project_root, excluded_folders=["build"], **kwargs))
+
+
+def test_walk_matches_git(ignoring_tree):
+    assert listed(ignoring_tree.path) == EXPECTED
+    assert listed(ignoring_tree.path, use_git=True) == EXPECTED
+
+
+def test_ignored_folders_are_not_entered(ignoring_tree, monkeypatch):
+    scanned = []
+    real_scandir = os.scandir
+
+    def recording_scandir(path):
+        scanned.append(os.path.relpath(path, ignoring_tree.path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(helpers.os, "scandir", recording_scandir)
+    listed(ignoring_tree.path)
+
+    assert sorted(scanned) == [".", "pkg", "pkg/sub", "tools", "tools/generated"]
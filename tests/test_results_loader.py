@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import time
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("networkx")
+pytest.importorskip("plotly")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IFFT_WEB"))
+
+from app import app
+from modules import results_loader
+from modules.results_loader import ResultsLoader
+
+RESULTS = {"a.py": [{"associated_file_name": "b.py", "status": "modified"}]}
+
+
+@pytest.fixture
+def results_file(tmp_path, monkeypatch):
+    """Serve the results of a temporary file instead of IFFT_WEB/data/ifft_results.json."""
+    path = tmp_path / "ifft_results.json"
+    monkeypatch.setattr(results_loader, "results_loader", ResultsLoader(str(path)))
+    return path
+
+
+def write_results(path, results, age=0):
+    path.write_text(json.dumps(results))
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+
+def test_output_data_etag_cycle(results_file):
+    client = app.test_client()
+    write_results(results_file, RESULTS, age=10)
+
+    first = client.get("/output-data")
+    assert first.status_code == 200
+    assert first.get_json() == RESULTS
+    etag = first.headers["ETag"]
+
+    assert client.get("/output-data", headers={"If-None-Match": etag}).status_code == 304
+    last_modified = first.headers["Last-Modified"]
+    assert client.get("/output-data", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    changed = dict(RESULTS, **{"b.py": []})
+    write_results(results_file, changed)
+    second = client.get("/output-data", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.get_json() == changed
+    assert second.headers["ETag"] != etag
+
+
+def test_if_modified_since_ignored_within_the_second_of_a_write(results_file):
+    client = app.test_client()
+    write_results(results_file, RESULTS)
+    written = os.stat(results_file).st_mtime
+    if time.time() - int(written) > 0.8:
+        # Too close to the next second for the file to still be in its own
+        time.sleep(0.3)
+        write_results(results_file, RESULTS)
+        written = os.stat(results_file).st_mtime
+
+    # What a browser would send if told the second of the write, before a rewrite in that same second
+    if_modified_since = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(int(written)))
+    response = client.get("/output-data", headers={"If-Modified-Since": if_modified_since})
+    assert response.status_code == 200
+    assert "Last-Modified" not in response.headers
+
+
+def test_unparsable_results_read_once(results_file, monkeypatch, caplog):
+    loader = results_loader.results_loader
+    write_results(results_file, RESULTS, age=10)
+    snapshot = loader.load()
+
+    results_file.write_text("{\"a.py\": [")
+    reads = []
+    real_open = open
+    monkeypatch.setattr(results_loader, "open", lambda *args: reads.append(args) or real_open(*args), raising=False)
+
+    assert loader.load() is snapshot
+    assert loader.load() is snapshot
+    assert len(reads) == 1
+    assert caplog.text.count("Could not parse") == 1
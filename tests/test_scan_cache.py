@@ -0,0 +1,49 @@
+import os
+
+from ifft_core.scan_cache import CACHE_FILE_NAME, ScanCache, blob_sha
+
+BLOCKS = [{"block_start": 1, "block_end": 3, "start_offset": 0, "end_offset": 20, "label": "foo",
+           "associated_file_name": "b.py", "associated_file_label": "bar"}]
+
+
+def saved_cache(tmp_path, digests):
+    cache = ScanCache(str(tmp_path))
+    for digest in digests:
+        cache.put(digest, BLOCKS)
+    cache.save()
+    return os.path.join(str(tmp_path), CACHE_FILE_NAME)
+
+
+def test_blob_sha_matches_git():
+    assert blob_sha(b"") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+
+
+def test_hits_only_run_does_not_rewrite(tmp_path):
+    cache_file = saved_cache(tmp_path, ["a", "b"])
+    before = os.stat(cache_file)
+
+    cache = ScanCache(str(tmp_path))
+    assert cache.get("a") == BLOCKS
+    assert cache.get("b") == BLOCKS
+    cache.put("a", BLOCKS)
+    cache.merge({}, hits=3)
+    cache.save()
+
+    after = os.stat(cache_file)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+
+def test_recency_saved_with_new_entries(tmp_path):
+    saved_cache(tmp_path, ["a", "b", "c"])
+
+    cache = ScanCache(str(tmp_path))
+    cache.get("a")
+    cache.put("d", BLOCKS)
+    cache.save()
+
+    cache = ScanCache(str(tmp_path), max_entries=3)
+    cache.put("e", BLOCKS)
+    # "a" was hit after "b" and "c", so they are evicted first
+    assert list(cache.entries) == ["a", "d", "e"]
+    assert cache.get("b") is None
+    assert cache.get("a") == BLOCKS
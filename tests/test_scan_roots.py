@@ -0,0 +1,56 @@
+import logging
+import os
+import pytest
+
+from conftest import GitRepo
+from ifft_block.ifft_block_class import STATUS_MODIFIED, STATUS_SATISFIED
+
+
+@pytest.fixture
+def two_roots(tmp_path):
+    pytest.importorskip("git")
+    roots = []
+    for name in ("svc1", "svc2"):
+        os.makedirs(tmp_path / name)
+        roots.append(GitRepo(tmp_path / name))
+    svc1, svc2 = roots
+    svc1.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"../svc2/b.py\", \"beta\")\n")
+    svc2.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"../svc1/a.py\", \"alpha\")\n")
+    svc1.commit()
+    svc2.commit()
+    return svc1, svc2
+
+
+def scan_roots(*roots):
+    from ifft_core.ifft_parser import iter_scan_roots
+
+    return {(os.path.basename(root), filename): [block.status for block in blocks]
+            for root, filename, blocks in iter_scan_roots([root.path for root in roots])}
+
+
+def test_cross_root_label_resolves(two_roots, caplog):
+    svc1, svc2 = two_roots
+    svc1.write("a.py", svc1.read("a.py").replace("a = 1", "a = 2"))
+
+    with caplog.at_level(logging.WARNING):
+        assert scan_roots(svc1, svc2) == {("svc1", "a.py"): [STATUS_MODIFIED]}
+    assert "not defined" not in caplog.text
+
+
+def test_cross_root_change_satisfies_block(two_roots, caplog):
+    svc1, svc2 = two_roots
+    svc1.write("a.py", svc1.read("a.py").replace("a = 1", "a = 2"))
+    svc2.write("b.py", svc2.read("b.py").replace("b = 1", "b = 2"))
+
+    with caplog.at_level(logging.WARNING):
+        assert scan_roots(svc1, svc2) == {("svc1", "a.py"): [STATUS_SATISFIED], ("svc2", "b.py"): [STATUS_SATISFIED]}
+    assert "not defined" not in caplog.text
+
+
+def test_cross_root_missing_label_is_reported(two_roots, caplog):
+    svc1, svc2 = two_roots
+    svc1.write("a.py", svc1.read("a.py").replace("a = 1", "a = 2").replace('"beta"', '"gamma"'))
+
+    with caplog.at_level(logging.WARNING):
+        scan_roots(svc1, svc2)
+    assert "points at label 'gamma', which is not defined in ../svc2/b.py" in caplog.text
@@ -0,0 +1,37 @@
+import logging
+import os
+import pytest
+
+
+@pytest.fixture
+def target_repo(git_repo):
+    pytest.importorskip("git")
+    git_repo.write("a.py", "#IFFT.If(alpha)\na = 1\n#IFFT.Then(\"b.py\", \"beta\")\n")
+    git_repo.commit()
+    git_repo.write("a.py", git_repo.read("a.py").replace("a = 1", "a = 2"))
+    return git_repo
+
+
+def missing_targets_logged(git_repo, caplog):
+    from ifft_core.ifft_parser import scan_files
+
+    caplog.clear()
+    with caplog.at_level(logging.ERROR):
+        scan_files(git_repo.path, use_cache=False)
+    return "Associated files not found" in caplog.text
+
+
+def test_new_target_found_by_next_run(target_repo, caplog):
+    assert missing_targets_logged(target_repo, caplog)
+
+    # Same process, e.g. the web interface: the file created since the first run counts
+    target_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+    assert not missing_targets_logged(target_repo, caplog)
+
+
+def test_deleted_target_missing_in_next_run(target_repo, caplog):
+    target_repo.write("b.py", "#IFFT.If(beta)\nb = 1\n#IFFT.Then(\"a.py\", \"alpha\")\n")
+    assert not missing_targets_logged(target_repo, caplog)
+
+    os.remove(os.path.join(target_repo.path, "b.py"))
+    assert missing_targets_logged(target_repo, caplog)